@@ -0,0 +1,47 @@
+"""
+Benchmark COPY text codec
+
+Usage: python script/copy-benchmark.py [ROWS]
+"""
+
+import random
+import string
+import sys
+import timeit
+
+from slice_db.pg.copy import COPY_FORMAT
+
+
+def _field(rnd: random.Random):
+    n = rnd.random()
+    if n < 0.05:
+        return None
+    if n < 0.15:
+        return "".join(rnd.choice("ab\\\t\n") for _ in range(rnd.randint(1, 20)))
+    return "".join(rnd.choice(string.ascii_letters) for _ in range(rnd.randint(1, 40)))
+
+
+def main():
+    count = int(sys.argv[1]) if 1 < len(sys.argv) else 100000
+    rnd = random.Random(0)
+    rows = [[_field(rnd) for _ in range(8)] for _ in range(count)]
+    lines = [COPY_FORMAT.serialize_row(row) for row in rows]
+    fields = [field for row in rows for field in row]
+    texts = [COPY_FORMAT.serialize_field(field) for field in fields]
+
+    benchmarks = [
+        ("parse_field", lambda: [COPY_FORMAT.parse_field(text) for text in texts]),
+        (
+            "serialize_field",
+            lambda: [COPY_FORMAT.serialize_field(field) for field in fields],
+        ),
+        ("parse_row", lambda: [COPY_FORMAT.parse_row(line) for line in lines]),
+        ("serialize_row", lambda: [COPY_FORMAT.serialize_row(row) for row in rows]),
+    ]
+    for name, fn in benchmarks:
+        seconds = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"{name:16} {count / seconds:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
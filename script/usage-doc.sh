@@ -16,11 +16,14 @@ echo '# Usage'
 echo
 
 usage common slicedb --help
+usage copy slicedb copy --help
 usage dump slicedb dump --help
+usage repack slicedb repack --help
 usage restore slicedb restore --help
 usage schema slicedb schema --help
 usage schema-filter slicedb schema-filter --help
 usage transform slicedb transform --help
 usage transform-field slicedb transform-field --help
+usage verify slicedb verify --help
 
 "$base/../node_modules/.bin/prettier" --write "$base/../doc/usage.md"
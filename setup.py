@@ -26,7 +26,20 @@ setuptools.setup(
         ]
     },
     extras_require={
-        "dev": ["black", "psutil", "pytest-env", "isort", "pytest", "snapshottest"]
+        "dev": [
+            "black",
+            "lz4",
+            "psutil",
+            "pytest-env",
+            "isort",
+            "pyarrow",
+            "pytest",
+            "snapshottest",
+            "zstandard",
+        ],
+        "lz4": ["lz4"],
+        "parquet": ["pyarrow"],
+        "zstd": ["zstandard"],
     },
     long_description=long_description,
     long_description_content_type="text/markdown",
@@ -44,7 +57,7 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     package_data={
         "slice_db.formats": ["*.json"],
-        "slice_db.data": ["*.txt"],
+        "slice_db.data": ["*.bin", "*.txt"],
     },
     project_urls={
         "Issues": "https://github.com/rivethealth/slice-db/issues",
@@ -0,0 +1,137 @@
+"""
+Content-addressed store of compressed segments, shared across dumps
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import typing
+import zlib
+
+from .codec import Codec
+from .slice import checksum_hash
+
+_SPOOL_SIZE = 1024 * 1024 * 8
+
+
+class SegmentCache:
+    """
+    Compressed segments, by codec and checksum of uncompressed data
+
+    Entries are written atomically, so concurrent dumps may share a cache.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._path = path
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, codec: Codec, standalone: bool, checksum: str) -> str:
+        # zip members and standalone files differ for deflate
+        suffix = codec.file_suffix if standalone else codec.suffix
+        return os.path.join(
+            self._path, codec.name + suffix, checksum[:2], checksum + suffix
+        )
+
+    def get(
+        self, codec: Codec, standalone: bool, checksum: str
+    ) -> typing.Optional[str]:
+        """
+        Path of cached segment, if any
+        """
+        path = self._entry_path(codec, standalone, checksum)
+        found = os.path.exists(path)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path if found else None
+
+    def add(
+        self,
+        codec: Codec,
+        standalone: bool,
+        checksum: str,
+        copy: typing.Callable[[typing.BinaryIO], None],
+    ):
+        """
+        Add segment, with a function that writes its compressed data
+        """
+        path = self._entry_path(codec, standalone, checksum)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+            try:
+                copy(f)
+            except:
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+
+    def add_file(self, codec: Codec, checksum: str, source: str):
+        """
+        Add standalone segment file, linking it if possible
+        """
+        path = self._entry_path(codec, True, checksum)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            with open(source, "rb") as f:
+                self.add(codec, True, checksum, lambda out: shutil.copyfileobj(f, out))
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        if total:
+            logging.info(
+                "Reused %d of %d segments from cache (%.1f%%)",
+                self.hits,
+                total,
+                100 * self.hits / total,
+            )
+
+
+class HashingSpool:
+    """
+    Spool uncompressed segment, computing its checksum and CRC
+    """
+
+    def __init__(self):
+        self.crc = 0
+        self.size = 0
+        self._checksum = checksum_hash()
+        self._file = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def checksum(self) -> str:
+        return self._checksum.hexdigest()
+
+    def write(self, data: bytes):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self._checksum.update(data)
+        self._file.write(data)
+
+    def copy(self, out: typing.BinaryIO):
+        """
+        Copy spooled data
+        """
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, out)
+
+    def close(self):
+        self._file.close()
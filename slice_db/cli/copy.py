@@ -0,0 +1,76 @@
+import secrets
+import traceback
+
+import asyncpg
+
+from ..common import setup_connection
+from ..copy import CopyIo, CopyParams, copy
+from ..dump_temp_table import TempTableStrategy
+from ..formats.dump import DumpRoot
+from ..pg import server_settings, set_tid_codec
+from .common import open_str_read
+
+
+async def copy_main(args):
+    roots = [
+        DumpRoot(condition=condition, table=table) for table, condition in args.roots
+    ]
+
+    if args.pepper is not None:
+        pepper = args.pepper.encode("ascii")
+    else:
+        pepper = secrets.token_bytes(8)
+
+    source_pool = await asyncpg.create_pool(
+        init=_init_source_connection,
+        max_inactive_connection_lifetime=10,
+        max_size=args.jobs + 1,
+        min_size=0,
+        statement_cache_size=0,
+        server_settings=server_settings(),
+    )
+    target_pool = await asyncpg.create_pool(
+        args.target,
+        init=_init_target_connection,
+        max_inactive_connection_lifetime=10,
+        max_size=args.jobs,
+        min_size=0,
+        statement_cache_size=0,
+        server_settings=server_settings(),
+    )
+    try:
+        io = CopyIo(
+            schema_file=lambda: open_str_read(args.schema),
+            source_conn=lambda: source_pool.acquire(),
+            target_conn=lambda: target_pool.acquire(),
+            transform_file=args.transform and (lambda: open_str_read(args.transform)),
+        )
+        if args.temp_tables:
+            strategy = TempTableStrategy()
+        else:
+            raise Exception("--no-temp-tables not supported")
+        params = CopyParams(
+            parallelism=args.jobs,
+            pepper=pepper,
+            strategy=strategy,
+            transaction=args.transaction,
+            transform_cache_size=args.transform_cache_size,
+            transform_parallelism=args.transform_jobs,
+        )
+
+        await copy(roots, io, params)
+    except:
+        print("Exception caught in cli/copy.py:")
+        traceback.print_exc()
+    finally:
+        await target_pool.close()
+        await source_pool.close()
+
+
+async def _init_source_connection(conn):
+    await set_tid_codec(conn)
+    await setup_connection(conn)
+
+
+async def _init_target_connection(conn):
+    await setup_connection(conn)
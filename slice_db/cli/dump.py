@@ -5,6 +5,8 @@ import traceback
 
 import asyncpg
 
+from ..cache import SegmentCache
+from ..codec import get_codec
 from ..common import setup_connection
 from ..dump import DumpIo, DumpParams, OutputType, dump
 from ..dump_temp_table import TempTableStrategy
@@ -18,10 +20,37 @@ async def dump_main(args):
         DumpRoot(condition=condition, table=table) for table, condition in args.roots
     ]
 
-    if args.output_type == "slice":
+    if args.output_type == "directory":
+        if args.output == "-":
+            raise Exception("Directory output requires --output path")
+        output_type = OutputType.DIRECTORY
+    elif args.output_type == "parquet":
+        if args.output == "-":
+            raise Exception("Parquet output requires --output path")
+        if args.include_schema:
+            raise Exception("Parquet output does not support --include-schema")
+        output_type = OutputType.PARQUET
+    elif args.output_type == "slice":
         output_type = OutputType.SLICE
     elif args.output_type == "sql":
         output_type = OutputType.SQL
+    elif args.output_type == "sql-directory":
+        if args.output == "-":
+            raise Exception("SQL directory output requires --output path")
+        output_type = OutputType.SQL_DIRECTORY
+    elif args.output_type == "stream":
+        output_type = OutputType.STREAM
+
+    if args.segment_cache is not None:
+        if output_type not in (
+            OutputType.DIRECTORY,
+            OutputType.SLICE,
+            OutputType.STREAM,
+        ):
+            raise Exception("Segment cache requires directory, slice, or stream output")
+        segment_cache = SegmentCache(args.segment_cache)
+    else:
+        segment_cache = None
 
     if args.pepper is not None:
         pepper = args.pepper.encode("ascii")
@@ -40,6 +69,10 @@ async def dump_main(args):
         io = DumpIo(
             conn=lambda: pool.acquire(),
             output=lambda: open_bytes_write(args.output),
+            output_directory=args.output
+            if output_type
+            in (OutputType.DIRECTORY, OutputType.PARQUET, OutputType.SQL_DIRECTORY)
+            else None,
             schema_file=lambda: open_str_read(args.schema),
             transform_file=args.transform and (lambda: open_str_read(args.transform)),
         )
@@ -48,11 +81,15 @@ async def dump_main(args):
         else:
             raise Exception("--no-temp-tables not supported")
         params = DumpParams(
+            codec=get_codec(args.codec, args.codec_level),
             include_schema=args.include_schema,
             parallelism=args.jobs,
             output_type=output_type,
             pepper=pepper,
+            segment_cache=segment_cache,
             strategy=strategy,
+            transform_cache_size=args.transform_cache_size,
+            transform_parallelism=args.transform_jobs,
         )
 
         await dump(roots, io, params)
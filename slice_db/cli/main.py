@@ -5,7 +5,9 @@ import warnings
 
 import uvloop
 
+from ..codec import CODEC_NAMES, DEFAULT_CODEC
 from ..log import TRACE
+from ..transform import DEFAULT_CACHE_SIZE
 from ..version import __version__
 from .common import json_type
 
@@ -27,10 +29,18 @@ def main():
 
     setup_logging(args)
 
-    if args.command == "dump":
+    if args.command == "copy":
+        from .copy import copy_main
+
+        asyncio.run(copy_main(args))
+    elif args.command == "dump":
         from .dump import dump_main
 
         asyncio.run(dump_main(args))
+    elif args.command == "repack":
+        from .repack import repack_main
+
+        asyncio.run(repack_main(args))
     elif args.command == "restore":
         from .restore import restore_main
 
@@ -51,6 +61,10 @@ def main():
         from .transform_field import transform_field_main
 
         transform_field_main(args)
+    elif args.command == "verify":
+        from .verify import verify_main
+
+        asyncio.run(verify_main(args))
 
 
 def create_parser():
@@ -80,16 +94,86 @@ def create_parser():
         description="Provide one of the subcommands for more specific help.",
     )
 
+    _add_copy_command(subparsers)
     _add_dump_command(subparsers)
+    _add_repack_command(subparsers)
     _add_restore_command(subparsers)
     _add_schema_command(subparsers)
     _add_schema_filter_command(subparsers)
     _add_transform_command(subparsers)
     _add_transform_field_command(subparsers)
+    _add_verify_command(subparsers)
 
     return parser
 
 
+def _add_copy_command(subparsers):
+    parser = subparsers.add_parser(
+        "copy",
+        description="Copy data from database directly into another database.",
+        formatter_class=ArgumentFormatter,
+    )
+    update_help(parser)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        help="Number of workers (default: %(default)d). Using more than one worker requires disabling transactions.",
+        type=int,
+    )
+    parser.add_argument(
+        "--pepper", help="Pepper to use for transform. Autogenerated if not provided."
+    )
+    parser.add_argument("--transform", help="Path to transform config, or - for stdin")
+    parser.add_argument(
+        "--transform-cache-size",
+        default=DEFAULT_CACHE_SIZE,
+        help="Number of values to cache, per deterministic transform (default: %(default)d). 0 disables caching.",
+        type=int,
+    )
+    parser.add_argument(
+        "--transform-jobs",
+        help="Number of transform worker processes. Defaults to --jobs.",
+        type=int,
+    )
+    parser.add_argument(
+        "-r",
+        "--root",
+        action="append",
+        default=[],
+        dest="roots",
+        metavar=("TABLE", "CONDITION"),
+        nargs=2,
+        help="The ID of the root table and SQL condition. May be repeated.",
+    )
+    parser_required = parser.add_argument_group("required arguments")
+    parser_required.add_argument(
+        "-s", "--schema", required=True, help="Path to schema, or - for stdin."
+    )
+    parser_required.add_argument(
+        "-t",
+        "--target",
+        required=True,
+        help="Connection URI of target database, e.g. postgresql://host/db. Unspecified settings use libpq environment variables.",
+    )
+    parser.add_argument(
+        "--temp-tables",
+        "--no-table-tables",
+        action=NegateAction,
+        nargs=0,
+        default=True,
+        help="Whether temporary tables can be used.",
+    )
+    parser.add_argument(
+        "--transaction",
+        "--no-transaction",
+        default=True,
+        help="Whether to restore in a single transaction (default: %(default)s).",
+        action=NegateAction,
+        nargs=0,
+    )
+
+
 def _add_dump_command(subparsers):
     parser = subparsers.add_parser(
         "dump",
@@ -97,6 +181,17 @@ def _add_dump_command(subparsers):
         formatter_class=ArgumentFormatter,
     )
     update_help(parser)
+    parser.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=DEFAULT_CODEC,
+        help="Compression codec of slice segments (default: %(default)s). lz4 and zstd require the lz4 and zstandard packages.",
+    )
+    parser.add_argument(
+        "--codec-level",
+        help="Compression level. Defaults to the codec's default.",
+        type=int,
+    )
     parser.add_argument(
         "--include-schema",
         "--no-include-schema",
@@ -116,15 +211,33 @@ def _add_dump_command(subparsers):
         "-o",
         "--output",
         default="-",
-        help="Path to output slice, or - for stdout (default: %(default)s).",
+        help="Path to output slice, or - for stdout (default: %(default)s). For directory, parquet, and sql-directory output, path to directory.",
     )
     parser.add_argument(
-        "--output-type", choices=["slice", "sql"], default="slice", help="Output type."
+        "--output-type",
+        choices=["directory", "parquet", "slice", "sql", "sql-directory", "stream"],
+        default="slice",
+        help="Output type.",
     )
     parser.add_argument(
         "--pepper", help="Pepper to use for transform. Autogenerated if not provided."
     )
+    parser.add_argument(
+        "--segment-cache",
+        help="Directory of compressed segments to reuse across dumps. Only compatible with directory, slice, and stream output.",
+    )
     parser.add_argument("--transform", help="Path to transform config, or - for stdin")
+    parser.add_argument(
+        "--transform-cache-size",
+        default=DEFAULT_CACHE_SIZE,
+        help="Number of values to cache, per deterministic transform (default: %(default)d). 0 disables caching.",
+        type=int,
+    )
+    parser.add_argument(
+        "--transform-jobs",
+        help="Number of transform worker processes. Defaults to --jobs.",
+        type=int,
+    )
     parser.add_argument(
         "-r",
         "--root",
@@ -149,6 +262,63 @@ def _add_dump_command(subparsers):
     )
 
 
+def _add_repack_command(subparsers):
+    parser = subparsers.add_parser(
+        "repack",
+        description="Rewrite slice, with a different codec, container, or segment sizes.",
+        formatter_class=ArgumentFormatter,
+    )
+    update_help(parser)
+    parser.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=DEFAULT_CODEC,
+        help="Compression codec of slice segments (default: %(default)s). lz4 and zstd require the lz4 and zstandard packages.",
+    )
+    parser.add_argument(
+        "--codec-level",
+        help="Compression level. Defaults to the codec's default.",
+        type=int,
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="-",
+        help="Path to slice or slice directory, or - for stdin (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        help="Number of workers (default: %(default)d).",
+        type=int,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="Path to output slice, or - for stdout (default: %(default)s). For directory output, path to directory.",
+    )
+    parser.add_argument(
+        "--output-type",
+        choices=["directory", "slice", "stream"],
+        default="slice",
+        help="Output type.",
+    )
+    parser.add_argument(
+        "--segment-rows",
+        default=100000,
+        help="Coalesce consecutive segments of a table up to this many rows (default: %(default)d).",
+        type=int,
+    )
+    parser.add_argument(
+        "--segment-size",
+        default=64 * 1024 * 1024,
+        help="Coalesce consecutive segments of a table up to this many uncompressed bytes (default: %(default)d).",
+        type=int,
+    )
+
+
 def _add_restore_command(subparsers):
     parser = subparsers.add_parser(
         "restore", description="Restore data.", formatter_class=ArgumentFormatter
@@ -181,7 +351,7 @@ def _add_restore_command(subparsers):
         "-i",
         "--input",
         default="-",
-        help="Path to slice, or - for stdin (default: %(default)s).",
+        help="Path to slice or slice directory, or - for stdin (default: %(default)s).",
     )
     parser.add_argument(
         "--transaction",
@@ -250,6 +420,14 @@ def _add_transform_field_command(subparsers):
     )
     parser.add_argument("--name", default="", help="Name of transform")
     parser.add_argument("--pepper", help="Pepper.")
+    parser.add_argument(
+        "--transform-version",
+        choices=[1, 2],
+        default=1,
+        dest="version",
+        help="Version of deterministic replacement (default: %(default)s).",
+        type=int,
+    )
     parser.add_argument("field")
 
 
@@ -278,3 +456,25 @@ class NegateAction(argparse.Action):
 
 def update_help(parser):
     parser._actions[-1].help = "Show this help message and exit."
+
+
+def _add_verify_command(subparsers):
+    parser = subparsers.add_parser(
+        "verify",
+        description="Verify sizes and checksums of slice members.",
+        formatter_class=ArgumentFormatter,
+    )
+    update_help(parser)
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="-",
+        help="Path to slice or slice directory, or - for stdin (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        help="Number of workers (default: %(default)d).",
+        type=int,
+    )
@@ -0,0 +1,34 @@
+import os
+
+from ..codec import get_codec
+from ..repack import RepackIo, RepackOutputType, RepackParams, repack
+from .common import open_bytes_read, open_bytes_write
+
+
+async def repack_main(args):
+    if args.output_type == "directory":
+        if args.output == "-":
+            raise Exception("Directory output requires --output path")
+        output_type = RepackOutputType.DIRECTORY
+    elif args.output_type == "slice":
+        output_type = RepackOutputType.SLICE
+    elif args.output_type == "stream":
+        output_type = RepackOutputType.STREAM
+
+    io = RepackIo(
+        input=lambda: open_bytes_read(args.input),
+        input_directory=args.input if os.path.isdir(args.input) else None,
+        output=lambda: open_bytes_write(args.output),
+        output_directory=args.output
+        if output_type == RepackOutputType.DIRECTORY
+        else None,
+    )
+    params = RepackParams(
+        codec=get_codec(args.codec, args.codec_level),
+        output_type=output_type,
+        parallelism=args.jobs,
+        segment_rows=args.segment_rows,
+        segment_size=args.segment_size,
+    )
+
+    await repack(io, params)
@@ -1,4 +1,5 @@
 import contextlib
+import os
 
 import asyncpg
 
@@ -24,7 +25,9 @@ async def restore_main(args):
         statement_cache_size=0,
     ) as pool:
         io = RestoreIo(
-            conn=lambda: pool.acquire(), input=lambda: open_bytes_read(args.input)
+            conn=lambda: pool.acquire(),
+            input=lambda: open_bytes_read(args.input),
+            input_directory=args.input if os.path.isdir(args.input) else None,
         )
 
         await restore(io, params)
@@ -17,6 +17,7 @@ def transform_field_main(args):
             for name, value in args.transforms.items()
         },
         pepper,
+        version=args.version,
     )
     transform = transforms.field(args.name)
 
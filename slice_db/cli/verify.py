@@ -0,0 +1,14 @@
+import os
+
+from ..verify import VerifyIo, VerifyParams, verify
+from .common import open_bytes_read
+
+
+async def verify_main(args):
+    io = VerifyIo(
+        input=lambda: open_bytes_read(args.input),
+        input_directory=args.input if os.path.isdir(args.input) else None,
+    )
+    params = VerifyParams(parallelism=args.jobs)
+
+    await verify(io, params)
@@ -0,0 +1,270 @@
+"""
+Compression codecs for slice segments
+"""
+
+import gzip
+import importlib
+import typing
+import zipfile
+import zlib
+
+
+class Compressor(typing.Protocol):
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    def flush(self) -> bytes:
+        pass
+
+
+class Codec(typing.Protocol):
+    name: str
+    """Name, as recorded in manifest"""
+    suffix: str
+    """Suffix of member path"""
+    file_suffix: str
+    """Suffix of file path, in a directory"""
+    zip_compression: int
+    """Compression method of zip member"""
+
+    def compressor(self) -> Compressor:
+        pass
+
+    def file_compressor(self) -> Compressor:
+        pass
+
+    def open_reader(self, file: typing.BinaryIO) -> typing.BinaryIO:
+        """
+        Open decompressed reader for zip member
+        """
+        pass
+
+    def open_file_reader(self, file: typing.BinaryIO) -> typing.BinaryIO:
+        """
+        Open decompressed reader for file
+        """
+        pass
+
+
+class CompressedWriter:
+    """
+    Compress into a file, closing it when done
+    """
+
+    def __init__(self, file: typing.BinaryIO, compressor: Compressor):
+        self.compress_size = 0
+        self.size = 0
+        """Uncompressed size"""
+        self._compressor = compressor
+        self._file = file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write_compressed(self, data: bytes):
+        self.compress_size += len(data)
+        self._file.write(data)
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        self._write_compressed(self._compressor.compress(data))
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self._write_compressed(self._compressor.flush())
+        finally:
+            self._file.close()
+
+
+class _ClosingReader:
+    """
+    Decompressed reader, that also closes the underlying file
+    """
+
+    def __init__(self, reader: typing.BinaryIO, file: typing.BinaryIO):
+        self._file = file
+        self._reader = reader
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._reader.read(size)
+
+    def close(self):
+        try:
+            self._reader.close()
+        finally:
+            self._file.close()
+
+
+class DeflateCodec(Codec):
+    """
+    Deflate, native to zip, or gzip as a file
+    """
+
+    name = "deflate"
+    suffix = ""
+    file_suffix = ".gz"
+    zip_compression = zipfile.ZIP_DEFLATED
+
+    def __init__(self, level: typing.Optional[int] = None):
+        self._level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+
+    def compressor(self):
+        return zlib.compressobj(self._level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def file_compressor(self):
+        return zlib.compressobj(self._level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def open_reader(self, file):
+        return file
+
+    def open_file_reader(self, file):
+        return _ClosingReader(gzip.GzipFile(fileobj=file, mode="rb"), file)
+
+
+class _NoneCompressor(Compressor):
+    def compress(self, data):
+        return data
+
+    def flush(self):
+        return b""
+
+
+class NoneCodec(Codec):
+    """
+    No compression
+    """
+
+    name = "none"
+    suffix = ""
+    file_suffix = ""
+    zip_compression = zipfile.ZIP_STORED
+
+    def __init__(self, level: typing.Optional[int] = None):
+        pass
+
+    def compressor(self):
+        return _NoneCompressor()
+
+    def file_compressor(self):
+        return _NoneCompressor()
+
+    def open_reader(self, file):
+        return file
+
+    def open_file_reader(self, file):
+        return file
+
+
+class _Lz4Compressor(Compressor):
+    def __init__(self, compressor):
+        self._compressor = compressor
+        self._started = False
+
+    def _begin(self) -> bytes:
+        if self._started:
+            return b""
+        self._started = True
+        return self._compressor.begin()
+
+    def compress(self, data):
+        return self._begin() + self._compressor.compress(data)
+
+    def flush(self):
+        return self._begin() + self._compressor.flush()
+
+
+class Lz4Codec(Codec):
+    """
+    LZ4 frame, stored in zip
+    """
+
+    name = "lz4"
+    suffix = ".lz4"
+    file_suffix = ".lz4"
+    zip_compression = zipfile.ZIP_STORED
+
+    def __init__(self, level: typing.Optional[int] = None):
+        self._frame = _import("lz4.frame", "lz4")
+        self._level = 0 if level is None else level
+
+    def compressor(self):
+        return _Lz4Compressor(
+            self._frame.LZ4FrameCompressor(compression_level=self._level)
+        )
+
+    def file_compressor(self):
+        return self.compressor()
+
+    def open_reader(self, file):
+        return _ClosingReader(self._frame.open(file, "rb"), file)
+
+    def open_file_reader(self, file):
+        return self.open_reader(file)
+
+
+class ZstdCodec(Codec):
+    """
+    Zstandard frame, stored in zip
+    """
+
+    name = "zstd"
+    suffix = ".zst"
+    file_suffix = ".zst"
+    zip_compression = zipfile.ZIP_STORED
+
+    def __init__(self, level: typing.Optional[int] = None):
+        self._zstandard = _import("zstandard", "zstandard")
+        self._level = 3 if level is None else level
+
+    def compressor(self):
+        return self._zstandard.ZstdCompressor(level=self._level).compressobj()
+
+    def file_compressor(self):
+        return self.compressor()
+
+    def open_reader(self, file):
+        return self._zstandard.ZstdDecompressor().stream_reader(file)
+
+    def open_file_reader(self, file):
+        return self.open_reader(file)
+
+
+_CODECS = {
+    DeflateCodec.name: DeflateCodec,
+    Lz4Codec.name: Lz4Codec,
+    NoneCodec.name: NoneCodec,
+    ZstdCodec.name: ZstdCodec,
+}
+
+CODEC_NAMES = sorted(_CODECS.keys())
+
+DEFAULT_CODEC = DeflateCodec.name
+
+
+def get_codec(name: str, level: typing.Optional[int] = None) -> Codec:
+    """
+    Get codec by name
+    """
+    try:
+        codec_cls = _CODECS[name]
+    except KeyError:
+        raise Exception(f"Unknown codec {name}")
+    return codec_cls(level)
+
+
+def _import(module: str, package: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise Exception(f"Codec requires the {package} package")
@@ -9,6 +9,13 @@ class IntSet:
         self._dtype = dtype
         self._array = numpy.array([], dtype=dtype)
 
+    @property
+    def values(self) -> numpy.ndarray:
+        """
+        Items, in order
+        """
+        return self._array
+
     def add(self, items: typing.List[int]):
         """
         Add and return the new items
@@ -0,0 +1,68 @@
+import asyncio
+import contextlib
+import typing
+
+from . import to_thread
+
+AsyncWrite = typing.Callable[[bytes], typing.Awaitable[None]]
+
+
+class _BufferedWriter:
+    """
+    Write to file in a separate thread, buffering a bounded number of chunks
+    """
+
+    def __init__(self, file: typing.BinaryIO, max_chunks: int):
+        self._exception = None
+        self._file = file
+        self._queue = asyncio.Queue(max_chunks)
+
+    async def consume(self):
+        while True:
+            chunks = [await self._queue.get()]
+            # coalesce waiting chunks into one write
+            while chunks[-1] is not None and not self._queue.empty():
+                chunks.append(self._queue.get_nowait())
+            done = chunks[-1] is None
+            if done:
+                chunks.pop()
+            if chunks and self._exception is None:
+                try:
+                    await to_thread(self._file.write, b"".join(chunks))
+                except Exception as e:
+                    # keep draining, so that writers are not blocked
+                    self._exception = e
+            if done:
+                break
+
+    def check(self):
+        if self._exception is not None:
+            raise self._exception
+
+    async def write(self, chunk: bytes):
+        self.check()
+        await self._queue.put(chunk)
+
+    async def close(self):
+        await self._queue.put(None)
+
+
+@contextlib.asynccontextmanager
+async def buffered_writer(
+    file: typing.BinaryIO, max_chunks: int = 16
+) -> typing.AsyncIterator[AsyncWrite]:
+    """
+    Open asynchronous writer, that writes to a file in a separate thread
+    without waiting for each chunk
+    """
+    writer = _BufferedWriter(file, max_chunks)
+    task = asyncio.create_task(writer.consume())
+    try:
+        yield writer.write
+    except:
+        task.cancel()
+        await asyncio.wait([task])
+        raise
+    await writer.close()
+    await task
+    writer.check()
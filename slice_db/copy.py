@@ -0,0 +1,73 @@
+import dataclasses
+import typing
+
+import asyncpg
+
+from .dump import DumpIo, DumpParams, DumpStrategy, OutputType, dump
+from .formats.dump import DumpRoot
+from .resource import AsyncResourceFactory, ResourceFactory
+from .restore import RestoreParams, SegmentRestore, open_conn_factory
+from .transform import DEFAULT_CACHE_SIZE
+
+
+@dataclasses.dataclass
+class CopyIo:
+    schema_file: ResourceFactory[typing.TextIO]
+    source_conn: AsyncResourceFactory[asyncpg.Connection]
+    target_conn: AsyncResourceFactory[asyncpg.Connection]
+    transform_file: typing.Optional[AsyncResourceFactory[typing.TextIO]]
+
+
+@dataclasses.dataclass
+class CopyParams:
+    parallelism: int
+    pepper: bytes
+    strategy: DumpStrategy
+    transaction: bool
+    transform_parallelism: typing.Optional[int] = None
+    """Number of transform workers. Defaults to parallelism."""
+    transform_cache_size: int = DEFAULT_CACHE_SIZE
+    """Number of cached values, per cacheable transform"""
+
+
+async def copy(
+    root_configs: typing.List[DumpRoot],
+    io: CopyIo,
+    params: CopyParams,
+):
+    """
+    Copy slice from source database directly into target database
+    """
+    restore_params = RestoreParams(
+        include_schema=False,
+        parallelism=params.parallelism,
+        transaction=params.transaction,
+    )
+    async with open_conn_factory(io.target_conn, restore_params) as conn_factory:
+        segment_restore = SegmentRestore(
+            conn_factory=conn_factory,
+            include_schema=False,
+            parallelism=params.parallelism,
+            transaction=params.transaction,
+        )
+        dump_io = DumpIo(
+            conn=io.source_conn,
+            output=None,
+            output_restore=segment_restore,
+            schema_file=io.schema_file,
+            transform_file=io.transform_file,
+        )
+        dump_params = DumpParams(
+            include_schema=False,
+            parallelism=params.parallelism,
+            pepper=params.pepper,
+            output_type=OutputType.RESTORE,
+            strategy=params.strategy,
+            transform_parallelism=params.transform_parallelism,
+            transform_cache_size=params.transform_cache_size,
+        )
+        try:
+            await dump(root_configs, dump_io, dump_params)
+        except:
+            await segment_restore.cancel()
+            raise
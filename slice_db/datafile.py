@@ -0,0 +1,191 @@
+"""
+Compiled lists of strings, for transforms
+
+A compiled file holds a UTF-8 blob of strings with an offset array, plus
+groups of the strings by key, so that it can be memory-mapped and read without
+parsing. Pages are shared by all processes that map the file.
+
+Layout, with little-endian 32-bit unsigned integers:
+
+- magic and format version
+- number of values, groups, and grouped indices
+- value offsets, one more than the number of values
+- group key offsets, one more than the number of groups
+- group bounds in grouped indices, one more than the number of groups
+- grouped indices of values
+- value blob
+- group key blob
+"""
+
+import array
+import functools
+import itertools
+import mmap
+import os
+import struct
+import sys
+import typing
+
+_MAGIC = b"SDBD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+
+_DIRECTORY = os.path.join(os.path.dirname(__file__), "data")
+
+
+def _word_length(value: str) -> str:
+    return str(len(value))
+
+
+def _geozip(value: str) -> str:
+    return value.zfill(5)[0:3]
+
+
+DATA_FILES: typing.Dict[str, typing.Optional[typing.Callable[[str], str]]] = {
+    "city": None,
+    "given-name": None,
+    "street": None,
+    "surname": None,
+    "us-state": None,
+    "us-state-abbr": None,
+    "word": _word_length,
+    "zip": _geozip,
+}
+"""Data files, with group key function"""
+
+
+class StringList(typing.Sequence[str]):
+    """
+    Strings of compiled file, decoded on access
+    """
+
+    def __init__(self, blob, offsets, indices=None):
+        self._blob = blob
+        self._indices = indices
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1 if self._indices is None else len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if self._indices is not None:
+            i = self._indices[i]
+        return str(self._blob[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+
+class DataFile:
+    """
+    Compiled file
+    """
+
+    def __init__(self, buffer):
+        magic, version, value_count, group_count, index_count = _HEADER.unpack_from(
+            buffer
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise Exception("Data file is not compiled for this version")
+        view = memoryview(buffer)
+        position = _HEADER.size
+
+        def ints(count: int):
+            nonlocal position
+            start = position
+            position += count * 4
+            return _uint32s(view[start:position])
+
+        value_offsets = ints(value_count + 1)
+        key_offsets = ints(group_count + 1)
+        bounds = ints(group_count + 1)
+        indices = ints(index_count)
+        values_blob = view[position : position + value_offsets[-1]]
+        position += value_offsets[-1]
+        keys_blob = view[position : position + key_offsets[-1]]
+
+        self.values = StringList(values_blob, value_offsets)
+        """All values, in order"""
+        self.groups: typing.Dict[str, StringList] = {
+            key: StringList(values_blob, value_offsets, indices[start:end])
+            for key, start, end in zip(
+                StringList(keys_blob, key_offsets), bounds, bounds[1:]
+            )
+        }
+        """Values by key, in order"""
+
+
+def _uint32s(view: memoryview):
+    if sys.byteorder == "little":
+        return view.cast("I")
+    values = array.array("I", view)
+    values.byteswap()
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def load_data_file(name: str) -> DataFile:
+    """
+    Map compiled data file, once per process
+    """
+    with open(os.path.join(_DIRECTORY, f"{name}.bin"), "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return DataFile(buffer)
+
+
+def compile_data_file(
+    values: typing.List[str], key_fn: typing.Optional[typing.Callable[[str], str]]
+) -> bytes:
+    """
+    Compile strings, grouped by key
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    groups = {}
+    if key_fn is not None:
+        for i, value in enumerate(values):
+            groups.setdefault(key_fn(value), []).append(i)
+    keys = [key.encode("utf-8") for key in groups.keys()]
+    indices = [i for group in groups.values() for i in group]
+
+    ints = [
+        *_offsets(len(value) for value in encoded),
+        *_offsets(len(key) for key in keys),
+        *_offsets(len(group) for group in groups.values()),
+        *indices,
+    ]
+    return b"".join(
+        [
+            _HEADER.pack(_MAGIC, _VERSION, len(values), len(groups), len(indices)),
+            struct.pack(f"<{len(ints)}I", *ints),
+            *encoded,
+            *keys,
+        ]
+    )
+
+
+def _offsets(lengths: typing.Iterable[int]) -> typing.List[int]:
+    return [0, *itertools.accumulate(lengths)]
+
+
+def read_text_file(path: str) -> typing.List[str]:
+    """
+    Read non-empty lines of text file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [line for line in f.read().split("\n") if line]
+
+
+def main():
+    """
+    Compile text data files, given by name or else all
+    """
+    for name in sys.argv[1:] or DATA_FILES.keys():
+        key_fn = DATA_FILES[name]
+        values = read_text_file(os.path.join(_DIRECTORY, f"{name}.txt"))
+        with open(os.path.join(_DIRECTORY, f"{name}.bin"), "wb") as f:
+            f.write(compile_data_file(values, key_fn))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ import contextlib
 import dataclasses
 import enum
 import logging
+import os
 import tempfile
 import time
 import typing
@@ -14,6 +15,8 @@ import asyncpg
 import numpy
 from pg_sql import SqlId, SqlObject, sql_list
 
+from .cache import HashingSpool, SegmentCache
+from .codec import DEFAULT_CODEC, Codec, DeflateCodec, NoneCodec
 from .collection.set import IntSet
 from .concurrent import to_thread, wait_success
 from .concurrent.lock import LifoSemaphore
@@ -29,23 +32,39 @@ from .formats.manifest import (
     MANIFEST_DATA_JSON_FORMAT,
     Manifest,
     ManifestSchema,
+    ManifestSchemaEntry,
     ManifestSequence,
     ManifestTable,
     ManifestTableSegment,
 )
 from .formats.transform import TRANSFORM_DATA_JSON_FORMAT
 from .log import TRACE
+from .parquet import ParquetDirectoryWriter
 from .pg import export_snapshot, set_snapshot
 from .pg.token import parse_statements
 from .resource import AsyncResourceFactory, ResourceFactory
-from .slice import SliceWriter
-from .sql import SqlWriter
-from .transform import TableTransformer, Transforms
+from .restore import SegmentRestore
+from .slice import (
+    MemberStats,
+    SliceDirectoryWriter,
+    SliceMember,
+    SliceStreamWriter,
+    SliceWriter,
+)
+from .sql import SqlDirectoryWriter, SqlWriter
+from .transform import DEFAULT_CACHE_SIZE, TransformPool, Transforms
+
+_SPOOL_SIZE = 1024 * 1024 * 8
 
 
 class OutputType(enum.Enum):
+    DIRECTORY = enum.auto()
+    PARQUET = enum.auto()
+    RESTORE = enum.auto()
     SQL = enum.auto()
+    SQL_DIRECTORY = enum.auto()
     SLICE = enum.auto()
+    STREAM = enum.auto()
 
 
 @dataclasses.dataclass
@@ -54,6 +73,10 @@ class DumpIo:
     output: ResourceFactory[typing.BinaryIO]
     schema_file: ResourceFactory[typing.TextIO]
     transform_file: typing.Optional[AsyncResourceFactory[typing.TextIO]]
+    output_directory: typing.Optional[str] = None
+    """Output directory, for directory, parquet, and SQL directory output types"""
+    output_restore: typing.Optional[SegmentRestore] = None
+    """Restore into another database, for restore output type"""
 
 
 class DumpStrategy(typing.Protocol):
@@ -62,6 +85,13 @@ class DumpStrategy(typing.Protocol):
     def start(self, dump: Dump, roots: typing.List[Root]):
         pass
 
+    def lay_out(self, dump: Dump):
+        """
+        Start writing rows that were discovered without writing, for stable
+        layout
+        """
+        pass
+
 
 @dataclasses.dataclass
 class DumpParams:
@@ -70,6 +100,14 @@ class DumpParams:
     pepper: bytes
     output_type: OutputType
     strategy: DumpStrategy
+    codec: Codec = DeflateCodec()
+    segment_cache: typing.Optional[SegmentCache] = None
+    """Reuse compressed segments of earlier dumps, for slice, directory, and
+    stream output types"""
+    transform_parallelism: typing.Optional[int] = None
+    """Number of transform workers. Defaults to parallelism."""
+    transform_cache_size: int = DEFAULT_CACHE_SIZE
+    """Number of cached values, per cacheable transform"""
 
 
 async def dump(
@@ -90,29 +128,112 @@ async def dump(
             raise Exception(f"Root table {root_config.table} does not exist")
         roots.append(Root(table=table, condition=root_config.condition))
 
-    if io.transform_file is None:
-        transformers = {}
-    else:
+    transform_pool = None
+    if io.transform_file is not None:
         transform = TRANSFORM_DATA_JSON_FORMAT.load(io.transform_file)
-        transforms = Transforms(transform.transforms, params.pepper)
-        transformers = {
-            id: transforms.table(transform_table.columns, schema.get_table(id).columns)
-            for id, transform_table in transform.tables.items()
-        }
-
-    with io.output() as file, contextlib.ExitStack() as stack:
-        if params.output_type == OutputType.SLICE:
-            slice_writer = stack.enter_context(SliceWriter(file))
-            output = _SliceOutput(slice_writer)
+        transform_tables = {}
+        for id, transform_table in transform.tables.items():
+            columns = schema.get_table(id).columns
+            for column, name in transform_table.columns.items():
+                if column not in columns:
+                    raise Exception(f"Table {id} has no column {column}")
+                if name not in transform.transforms:
+                    raise Exception(f"Transformer {name} does not exist")
+            transform_tables[id] = (transform_table.columns, columns)
+        if transform_tables:
+            # push down tables whose transforms are all expressible in SQL
+            transforms = Transforms(
+                transform.transforms, params.pepper, 0, transform.version
+            )
+            tables = [schema.get_table(id) for id in transform_tables.keys()]
+            async with io.conn() as conn:
+                column_types = await _get_column_types(conn, tables)
+            for table, types in zip(tables, column_types):
+                id = table.id
+                transform_columns, columns = transform_tables[id]
+                sql = transforms.table_sql(transform_columns, columns, types)
+                if sql is not None:
+                    logging.debug("Transforming table %s in SQL", id)
+                    schema.get_table(id).transform_sql = sql
+                    del transform_tables[id]
+        if transform_tables:
+            transform_pool = TransformPool(
+                transform.transforms,
+                params.pepper,
+                transform_tables,
+                params.transform_parallelism or params.parallelism,
+                params.transform_cache_size,
+                transform.version,
+            )
+
+    with contextlib.ExitStack() as stack:
+        if transform_pool is not None:
+            stack.enter_context(transform_pool)
+        # cached segments are only reused if rows are in the same order
+        stable_layout = params.segment_cache is not None
+        result = _DiscoveryResult(codec=params.codec.name, stable_layout=stable_layout)
+
+        if params.output_type == OutputType.DIRECTORY:
+            slice_writer = stack.enter_context(
+                SliceDirectoryWriter(io.output_directory, params.codec)
+            )
+            output = _DirectoryOutput(slice_writer, result, params.segment_cache)
+        elif params.output_type == OutputType.SLICE:
+            file = stack.enter_context(io.output())
+            slice_writer = stack.enter_context(SliceWriter(file, params.codec))
+            output = _SliceOutput(slice_writer, result, params.segment_cache)
+        elif params.output_type == OutputType.STREAM:
+            file = stack.enter_context(io.output())
+            slice_writer = stack.enter_context(SliceStreamWriter(file, params.codec))
+            output = _SliceOutput(slice_writer, result, params.segment_cache)
+        elif params.output_type == OutputType.PARQUET:
+            parquet_writer = stack.enter_context(
+                ParquetDirectoryWriter(io.output_directory, params.codec.name)
+            )
+            output = _ParquetOutput(parquet_writer)
+        elif params.output_type == OutputType.RESTORE:
+            output = _RestoreOutput(io.output_restore)
         elif params.output_type == OutputType.SQL:
+            file = stack.enter_context(io.output())
             sql_writer = SqlWriter(file)
             if params.include_schema:
                 # must add schema before others
                 with sql_writer.open_predata() as f:
                     await _pg_dump_section("pre-data", f)
             output = _SqlOutput(sql_writer)
-
-        result = _DiscoveryResult()
+        elif params.output_type == OutputType.SQL_DIRECTORY:
+            sql_writer = stack.enter_context(
+                SqlDirectoryWriter(io.output_directory, params.codec)
+            )
+            if params.include_schema:
+                with sql_writer.open_predata() as f:
+                    await _pg_dump_section("pre-data", f)
+            output = _SqlDirectoryOutput(sql_writer)
+
+        if (
+            params.output_type
+            in (
+                OutputType.PARQUET,
+                OutputType.RESTORE,
+                OutputType.SQL,
+                OutputType.SQL_DIRECTORY,
+            )
+            or not params.include_schema
+        ):
+            schema_sections = []
+        elif params.output_type == OutputType.STREAM:
+            # restore creates tables before rows arrive
+            await _SchemaTask(section="pre-data", output=output, result=result)()
+            schema_sections = ["post-data"]
+        else:
+            schema_sections = ["pre-data", "post-data"]
+
+        if params.output_type == OutputType.RESTORE:
+            await io.output_restore.start(_header_manifest(schema, result).tables)
+        elif params.output_type == OutputType.STREAM:
+            MANIFEST_DATA_JSON_FORMAT.dump(
+                slice_writer.open_header, _header_manifest(schema, result)
+            )
 
         isolation = "repeatable_read" if params.parallelism == 1 else None
         async with io.conn() as conn, conn.transaction(
@@ -121,7 +242,13 @@ async def dump(
             # readonly=True
         ):
             await conn.execute("SET statement_timeout TO 0")
-            row_counts = await _set_row_counts(conn, list(schema.tables()))
+            if stable_layout:
+                await conn.execute("SET synchronize_seqscans TO off")
+            await _set_table_stats(conn, list(schema.tables()))
+            if params.output_type == OutputType.PARQUET:
+                tables = list(schema.tables())
+                for table, types in zip(tables, await _get_column_types(conn, tables)):
+                    parquet_writer.add_table(table.id, table.columns, types)
 
             if params.parallelism == 1 and not params.strategy.new_transactions:
 
@@ -142,52 +269,84 @@ async def dump(
                         # readonly=True
                     ):
                         await set_snapshot(conn, snapshot)
+                        if stable_layout:
+                            await conn.execute("SET synchronize_seqscans TO off")
                         yield conn
 
             await _dump_rows(
                 conn_factory=conn_factory,
-                include_schema=params.include_schema
-                and params.output_type != OutputType.SQL,
                 output=output,
                 parallelism=params.parallelism,
                 result=result,
                 roots=roots,
+                schema_sections=schema_sections,
+                stable_layout=stable_layout,
                 strategy=params.strategy,
-                transformers=transformers,
+                transform_pool=transform_pool,
             )
 
             await _dump_sequences(
                 conn_factory=conn_factory, result=result, output=output, schema=schema
             )
 
-        if params.output_type == OutputType.SLICE:
+        if params.output_type in (
+            OutputType.DIRECTORY,
+            OutputType.SLICE,
+            OutputType.STREAM,
+        ):
             manifest = Manifest(
-                pre_data=ManifestSchema(count=result.section_counts["pre-data"]),
-                post_data=ManifestSchema(count=result.section_counts["post-data"]),
+                pre_data=result.schema_manifest("pre-data"),
+                post_data=result.schema_manifest("post-data"),
                 sequences=result.sequence_manifests(),
                 tables=result.table_manifests(),
             )
             MANIFEST_DATA_JSON_FORMAT.dump(slice_writer.open_manifest, manifest)
-        elif params.output_type == OutputType.SQL:
+            if params.segment_cache is not None:
+                params.segment_cache.log_stats()
+        elif params.output_type == OutputType.RESTORE:
+            await io.output_restore.finish()
+        elif params.output_type in (OutputType.SQL, OutputType.SQL_DIRECTORY):
             if params.include_schema:
                 with sql_writer.open_postdata() as f:
                     await _pg_dump_section("post-data", f)
 
 
+def _header_manifest(schema: Schema, result: _DiscoveryResult) -> Manifest:
+    """
+    Manifest of all tables, before any segments
+    """
+    return Manifest(
+        pre_data=ManifestSchema(count=result.section_counts["pre-data"]),
+        post_data=ManifestSchema(count=0),
+        sequences={},
+        tables={
+            table.id: ManifestTable(
+                columns=table.columns,
+                name=table.name,
+                schema=table.schema,
+                segments=[],
+            )
+            for table in schema.tables()
+        },
+    )
+
+
 async def _dump_rows(
     conn_factory: ResourceFactory[asyncpg.Connection],
-    include_schema: bool,
     output: _Output,
     parallelism: int,
     result,
     roots: typing.List[Root],
+    schema_sections: typing.List[str],
+    stable_layout: bool,
     strategy: DumpStrategy,
-    transformers: typing.Dict[str, TableTransformer],
+    transform_pool: typing.Optional[TransformPool],
 ):
     """
     Dump rows
     """
 
+    include_schema = bool(schema_sections)
     if include_schema:
         logging.info("Dumping schema and rows")
     else:
@@ -200,21 +359,24 @@ async def _dump_rows(
         conn_factory=conn_factory,
         lock=lock,
         output=output,
+        parallelism=parallelism,
         result=result,
-        transformers=transformers,
+        stable_layout=stable_layout,
+        transform_pool=transform_pool,
         queue=queue,
     )
 
     strategy.start(dump, roots)
 
-    if include_schema:
-        dump.start_task(_SchemaTask(section="pre-data", output=output, result=result)())
-        dump.start_task(
-            _SchemaTask(section="post-data", output=output, result=result)()
-        )
+    for section in schema_sections:
+        dump.start_task(_SchemaTask(section=section, output=output, result=result)())
 
     await queue.finished()
 
+    if stable_layout:
+        strategy.lay_out(dump)
+        await queue.finished()
+
     end = time.perf_counter()
     if include_schema:
         logging.info(
@@ -258,6 +420,13 @@ async def _dump_sequences(
 
 
 class _Output(typing.Protocol):
+    @property
+    def busy(self) -> bool:
+        """
+        Whether opening would wait for another writer
+        """
+        pass
+
     async def open_schema(self, section: str, index: int) -> typing.BinaryIO:
         pass
 
@@ -273,32 +442,230 @@ class _SliceOutput(_Output):
     Concurrency-safe slice output
     """
 
-    def __init__(self, writer: SliceWriter):
+    def __init__(
+        self,
+        writer: SliceWriter,
+        result: _DiscoveryResult,
+        cache: typing.Optional[SegmentCache] = None,
+    ):
+        self._cache = cache
         self._lock = asyncio.Lock()
+        self._result = result
         self._writer = writer
 
+    @property
+    def busy(self):
+        # members are compressed separately, and only appended under the lock
+        return False
+
     @contextlib.asynccontextmanager
     async def open_schema(self, section: str, index: int):
         """
         Open schema for writing
         """
-        async with self._lock:
-            with self._writer.open_schema(section, index) as f:
-                yield f
+        with self._writer.schema_member(section, index) as member:
+            yield member
+            await self._write_member(member)
+        self._result.set_schema_stats(section, index, member.stats())
 
     @contextlib.asynccontextmanager
     async def open_segment(self, segment: TableSegment):
         """
         Open segment for writing
         """
+        with self._writer.segment_member(segment.table.id, segment.index) as member:
+            if self._cache is None:
+                yield member
+                await to_thread(member.finish)
+            else:
+                with HashingSpool() as spool:
+                    yield spool
+                    await to_thread(_write_cached_member, self._cache, member, spool)
+            async with self._lock:
+                await to_thread(self._writer.write_member, member)
+        self._result.set_segment_stats(segment, member.stats())
+
+    async def _write_member(self, member: SliceMember):
+        await to_thread(member.finish)
         async with self._lock:
-            with self._writer.open_segment(segment.table.id, segment.index) as f:
-                yield f
+            await to_thread(self._writer.write_member, member)
 
     def write_sequence(self, sequence: Sequence, value: int):
         self._writer.write_sequence(sequence.id, value)
 
 
+class _DirectoryOutput(_Output):
+    """
+    Concurrency-safe directory output
+
+    Each member is its own file, so writers do not wait on each other.
+    """
+
+    def __init__(
+        self,
+        writer: SliceDirectoryWriter,
+        result: _DiscoveryResult,
+        cache: typing.Optional[SegmentCache] = None,
+    ):
+        self._cache = cache
+        self._result = result
+        self._writer = writer
+
+    @property
+    def busy(self):
+        return False
+
+    @contextlib.asynccontextmanager
+    async def open_schema(self, section: str, index: int):
+        """
+        Open schema for writing
+        """
+        f = await to_thread(self._writer.open_schema, section, index)
+        try:
+            yield f
+        finally:
+            await to_thread(f.close)
+        self._result.set_schema_stats(section, index, f.stats())
+
+    @contextlib.asynccontextmanager
+    async def open_segment(self, segment: TableSegment):
+        """
+        Open segment for writing
+        """
+        if self._cache is not None:
+            with HashingSpool() as spool:
+                yield spool
+                stats = await to_thread(
+                    _write_cached_file, self._cache, self._writer, segment, spool
+                )
+            self._result.set_segment_stats(segment, stats)
+            return
+
+        f = await to_thread(self._writer.open_segment, segment.table.id, segment.index)
+        try:
+            yield f
+        finally:
+            await to_thread(f.close)
+        self._result.set_segment_stats(segment, f.stats())
+
+    def write_sequence(self, sequence: Sequence, value: int):
+        self._writer.write_sequence(sequence.id, value)
+
+
+def _write_cached_member(cache: SegmentCache, member: SliceMember, spool: HashingSpool):
+    """
+    Finish member from the cache, or compress and add it to the cache
+    """
+    path = cache.get(member.codec, member.standalone, spool.checksum)
+    if path is not None:
+        with open(path, "rb") as f:
+            member.write_precompressed(f, spool.size, spool.checksum, spool.crc)
+        return
+    spool.copy(member)
+    member.finish()
+    cache.add(member.codec, member.standalone, spool.checksum, member.copy_compressed)
+
+
+def _write_cached_file(
+    cache: SegmentCache,
+    writer: SliceDirectoryWriter,
+    segment: TableSegment,
+    spool: HashingSpool,
+) -> MemberStats:
+    """
+    Link segment file from the cache, or compress and add it to the cache
+    """
+    path = cache.get(writer.codec, True, spool.checksum)
+    if path is not None:
+        writer.link_segment(segment.table.id, segment.index, path)
+        compressed_size = os.path.getsize(path)
+    else:
+        with writer.open_segment(segment.table.id, segment.index) as f:
+            spool.copy(f)
+        compressed_size = f.compress_size
+        cache.add_file(
+            writer.codec,
+            spool.checksum,
+            writer.segment_path(segment.table.id, segment.index),
+        )
+    return MemberStats(
+        checksum=spool.checksum, compressed_size=compressed_size, size=spool.size
+    )
+
+
+class _RestoreOutput(_Output):
+    """
+    Concurrency-safe output, that restores into another database
+    """
+
+    def __init__(self, restore: SegmentRestore):
+        self._restore = restore
+
+    @property
+    def busy(self):
+        return False
+
+    def open_schema(self, section: str, index: int):
+        raise Exception("Not supported")
+
+    @contextlib.asynccontextmanager
+    async def open_segment(self, segment: TableSegment):
+        """
+        Open segment for writing, spooling it until it can be restored
+        """
+        file = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+        try:
+            yield file
+        except:
+            file.close()
+            raise
+        file.seek(0)
+        self._restore.add(segment.table.id, segment.index, NoneCodec(), file)
+
+    def write_sequence(self, sequence: Sequence, value: int):
+        self._restore.add_sequence(
+            sequence.id,
+            ManifestSequence(name=sequence.name, schema=sequence.schema),
+            value,
+        )
+
+
+class _ParquetOutput(_Output):
+    """
+    Concurrency-safe Parquet output
+    """
+
+    def __init__(self, writer: ParquetDirectoryWriter):
+        self._locks = collections.defaultdict(asyncio.Lock)
+        self._writer = writer
+
+    @property
+    def busy(self):
+        return False
+
+    def open_schema(self, section: str, index: int):
+        raise Exception("Not supported")
+
+    @contextlib.asynccontextmanager
+    async def open_segment(self, segment: TableSegment):
+        """
+        Open segment for writing, converting it once complete
+        """
+        with tempfile.SpooledTemporaryFile(_SPOOL_SIZE) as file:
+            yield file
+            file.seek(0)
+            batches = self._writer.convert(segment.table.id, file)
+            while True:
+                batch = await to_thread(next, batches, None)
+                if batch is None:
+                    break
+                async with self._locks[segment.table.id]:
+                    await to_thread(self._writer.write, segment.table.id, batch)
+
+    def write_sequence(self, sequence: Sequence, value: int):
+        pass
+
+
 class _SqlOutput(_Output):
     """
     Concurrency-safe SQL output
@@ -308,6 +675,10 @@ class _SqlOutput(_Output):
         self._lock = asyncio.Lock()
         self._writer = writer
 
+    @property
+    def busy(self):
+        return self._lock.locked()
+
     def open_schema(self, section: str):
         raise Exception("Not supported")
 
@@ -327,6 +698,42 @@ class _SqlOutput(_Output):
         self._writer.write_sequence(sequence.id, sequence.schema, sequence.name, value)
 
 
+class _SqlDirectoryOutput(_Output):
+    """
+    Concurrency-safe SQL directory output
+
+    Each segment is its own file, so writers do not wait on each other.
+    """
+
+    def __init__(self, writer: SqlDirectoryWriter):
+        self._writer = writer
+
+    @property
+    def busy(self):
+        return False
+
+    def open_schema(self, section: str, index: int):
+        raise Exception("Not supported")
+
+    @contextlib.asynccontextmanager
+    async def open_segment(self, segment: TableSegment):
+        f = await to_thread(
+            self._writer.open_data,
+            segment.table.id,
+            segment.index,
+            segment.table.schema,
+            segment.table.name,
+            segment.table.columns,
+        )
+        try:
+            yield f
+        finally:
+            await to_thread(f.close)
+
+    def write_sequence(self, sequence: Sequence, value: int):
+        self._writer.write_sequence(sequence.id, sequence.schema, sequence.name, value)
+
+
 async def _pg_dump_section(section: str, out: typing.BinaryIO) -> str:
     logging.log(TRACE, "Dumping %s schema", section)
     start = time.perf_counter()
@@ -354,17 +761,38 @@ class _DiscoveryResult:
     """
 
     _row_ids: typing.DefaultDict[str, IntSet]
+    _schema_entries: typing.DefaultDict[str, typing.Dict[int, ManifestSchemaEntry]]
     _sequence_manifests: typing.Dict[str, ManifestSequence]
     _table_manifests: typing.Dict[str, ManifestTable]
     section_counts: typing.DefaultDict[str, int]
 
-    def __init__(self):
+    def __init__(self, codec: str = DEFAULT_CODEC, stable_layout: bool = False):
+        """
+        stable_layout: Whether added rows are only tracked, for segments laid
+        out after discovery
+        """
+        self._codec = codec
+        self._discovered_counts = collections.defaultdict(lambda: 0)
+        self._stable_layout = stable_layout
+        self._tables = {}
+        self._full_table_ids = set()
         self._id_count = 0
         self._row_ids = collections.defaultdict(lambda: IntSet(numpy.int64))
+        self._schema_entries = collections.defaultdict(dict)
         self._sequence_manifests = {}
         self._table_manifests = {}
         self.section_counts = collections.defaultdict(lambda: 0)
 
+    def _table_manifest(self, table: Table) -> ManifestTable:
+        if table.id not in self._table_manifests:
+            self._table_manifests[table.id] = ManifestTable(
+                columns=table.columns,
+                name=table.name,
+                schema=table.schema,
+                segments=[],
+            )
+        return self._table_manifests[table.id]
+
     def add(
         self, table: Table, row_ids: typing.List[int]
     ) -> typing.Optional[TableSegment]:
@@ -378,24 +806,103 @@ class _DiscoveryResult:
 
         self._id_count += len(new_ids)
 
-        if table.id not in self._table_manifests:
-            self._table_manifests[table.id] = ManifestTable(
-                columns=table.columns,
-                name=table.name,
-                schema=table.schema,
-                segments=[],
-            )
-        table_manifest = self._table_manifests[table.id]
+        if self._stable_layout:
+            # segments depend on arrival order, so are laid out after discovery
+            self._tables[table.id] = table
+            index = self._discovered_counts[table.id]
+            self._discovered_counts[table.id] += 1
+            return TableSegment(table=table, row_ids=new_ids, index=index)
+
+        return self.add_segment(table, new_ids)
+
+    def add_segment(self, table: Table, row_ids: typing.List[int]) -> TableSegment:
+        """
+        Add segment of rows that have been added
+        """
+        table_manifest = self._table_manifest(table)
+
+        segment = TableSegment(
+            table=table,
+            row_ids=row_ids,
+            index=len(table_manifest.segments),
+        )
+        table_manifest.segments.append(
+            ManifestTableSegment(codec=self._codec, row_count=len(row_ids))
+        )
+
+        return segment
+
+    def tracked_rows(self) -> typing.Iterator[typing.Tuple[Table, numpy.ndarray]]:
+        """
+        Tables and all of their added row IDs, in order, for stable layout
+        """
+        for id in sorted(self._tables.keys()):
+            yield self._tables[id], self._row_ids[id].values
+
+    def add_full(self, table: Table) -> bool:
+        """
+        Add entire table, returning whether it was not already added
+        """
+        if table.id in self._full_table_ids:
+            return False
+        self._full_table_ids.add(table.id)
+        return True
+
+    def add_untracked(self, table: Table) -> TableSegment:
+        """
+        Add segment whose rows are not tracked
+        """
+        table_manifest = self._table_manifest(table)
 
         segment = TableSegment(
             table=table,
-            row_ids=new_ids,
+            row_ids=None,
             index=len(table_manifest.segments),
         )
-        table_manifest.segments.append(ManifestTableSegment(row_count=len(new_ids)))
+        table_manifest.segments.append(
+            ManifestTableSegment(codec=self._codec, row_count=0)
+        )
 
         return segment
 
+    def set_row_count(self, segment: TableSegment, row_count: int):
+        """
+        Set row count of segment whose rows are not tracked
+        """
+        self._id_count += row_count
+        table_manifest = self._table_manifests[segment.table.id]
+        table_manifest.segments[segment.index].row_count = row_count
+
+    def set_segment_stats(self, segment: TableSegment, stats: MemberStats):
+        """
+        Set sizes and checksum of written segment
+        """
+        table_manifest = self._table_manifests[segment.table.id]
+        segment_manifest = table_manifest.segments[segment.index]
+        segment_manifest.checksum = stats.checksum
+        segment_manifest.compressed_size = stats.compressed_size
+        segment_manifest.size = stats.size
+
+    def set_schema_stats(self, section: str, index: int, stats: MemberStats):
+        """
+        Set sizes and checksum of written schema statement
+        """
+        self._schema_entries[section][index] = ManifestSchemaEntry(
+            checksum=stats.checksum,
+            compressed_size=stats.compressed_size,
+            size=stats.size,
+        )
+
+    def schema_manifest(self, section: str) -> ManifestSchema:
+        """
+        Manifest of schema section
+        """
+        entries = self._schema_entries[section]
+        return ManifestSchema(
+            count=self.section_counts[section],
+            entries=[entries[i] for i in sorted(entries)],
+        )
+
     def add_sequence(self, sequence: Sequence):
         self._sequence_manifests[sequence.id] = ManifestSequence(
             name=sequence.name, schema=sequence.schema
@@ -426,8 +933,12 @@ class Dump:
     conn_factory: AsyncResourceFactory[asyncpg.Connection]
     lock: typing.AsyncContextManager
     output: _SliceOutput
+    parallelism: int
     result: _DiscoveryResult
-    transformers: typing.Dict[str, TableTransformer]
+    stable_layout: bool
+    """Whether segments must be the same across dumps"""
+    transform_pool: typing.Optional[TransformPool]
+    """Workers of transformed tables, if any"""
     queue: Queue
 
     async def _wrap(self, fn: typing.Callable):
@@ -491,6 +1002,10 @@ class Table:
     """Schema"""
     columns: typing.List[str]
     """Columns"""
+    full: bool
+    """Whether to dump entire table"""
+    page_count: int
+    """Estimated number of heap pages"""
     references: typing.List[Reference]
     """References to parent tables"""
     reverse_references: typing.List[Reference]
@@ -499,9 +1014,13 @@ class Table:
     """Estimated number of total rows"""
     sequences: typing.List[Sequence]
     """Sequences"""
+    transform_sql: typing.Optional[typing.List[str]] = None
+    """Transformed expressions of columns, if transformed by the database"""
 
     @property
     def columns_sql(self):
+        if self.transform_sql is not None:
+            return self.transform_sql
         return [SqlId(column) for column in self.columns]
 
     @property
@@ -540,6 +1059,8 @@ class Schema:
         for id, table_config in schema.tables.items():
             table = Table(
                 columns=table_config.columns,
+                full=table_config.full,
+                page_count=0,
                 references=[],
                 id=id,
                 name=table_config.name,
@@ -596,17 +1117,42 @@ class Schema:
 @dataclasses.dataclass
 class TableSegment:
     index: int
-    row_ids: numpy.ndarray
+    row_ids: typing.Optional[numpy.ndarray]
+    """Row IDs, or None if entire table"""
     table: Table
 
 
-async def _set_row_counts(conn: asyncpg.Connection, tables: typing.List[Table]):
+async def _set_table_stats(conn: asyncpg.Connection, tables: typing.List[Table]):
     query = """
-        SELECT reltuples
+        SELECT relpages, reltuples
         FROM unnest($1::regclass[]) WITH ORDINALITY AS i (oid, ordinality)
             JOIN pg_class AS pc ON i.oid = pc.oid
         ORDER BY i.ordinality
     """
     result = await conn.fetch(query, [str(table.sql) for table in tables])
     for row, table in zip(result, tables):
+        table.page_count = max(0, row["relpages"])
         table.row_count = int(row["reltuples"])
+
+
+async def _get_column_types(
+    conn: asyncpg.Connection, tables: typing.List[Table]
+) -> typing.List[typing.List[str]]:
+    """
+    Type names of table columns
+    """
+    query = """
+        SELECT i.ordinality, a.attname, t.typname
+        FROM unnest($1::regclass[]) WITH ORDINALITY AS i (oid, ordinality)
+            JOIN pg_attribute AS a ON i.oid = a.attrelid
+            JOIN pg_type AS t ON a.atttypid = t.oid
+        WHERE 0 < a.attnum AND NOT a.attisdropped
+    """
+    result = await conn.fetch(query, [str(table.sql) for table in tables])
+    types = collections.defaultdict(dict)
+    for row in result:
+        types[row["ordinality"]][row["attname"]] = row["typname"]
+    return [
+        [types[i].get(column, "text") for column in table.columns]
+        for i, table in enumerate(tables, 1)
+    ]
@@ -4,17 +4,17 @@ import asyncio
 import dataclasses
 import functools
 import logging
-import os
 import shutil
-import sys
 import tempfile
 import time
 import typing
 
 import asyncpg
+import numpy
 from pg_sql import SqlId, SqlObject, sql_list
 
 from .concurrent import to_thread
+from .concurrent.stream import AsyncWrite, buffered_writer
 from .dump import (
     Dump,
     DumpReferenceDirection,
@@ -25,10 +25,20 @@ from .dump import (
     TableSegment,
 )
 from .log import TRACE
-from .transform import TableTransformer
+from .transform import TransformPool
 
 MAX_SIZE = 1000 * 50
 
+MIN_RANGE_PAGES = 1000
+
+STABLE_RANGE_PAGES = 1000 * 10
+
+SPOOL_SIZE = 1024 * 1024 * 8
+
+BlockRange = typing.Tuple[int, typing.Optional[int]]
+
+T = typing.TypeVar("T")
+
 
 class TempTableStrategy(DumpStrategy):
     @property
@@ -37,20 +47,119 @@ class TempTableStrategy(DumpStrategy):
 
     def start(self, dump: Dump, roots: typing.List[Root]):
         for root in roots:
+            if root.table.full:
+                _start_full_table(dump, root.table)
+                continue
             task = _RootTask(table=root.table, condition=root.condition, dump=dump)
             dump.start_task(task())
 
+    def lay_out(self, dump: Dump):
+        for table, row_ids in dump.result.tracked_rows():
+            for ids in _stable_chunks(row_ids):
+                segment = dump.result.add_segment(table, ids.tolist())
+                task = _SegmentTask(segment=segment, dump=dump)
+                dump.start_task(task())
+
+
+def _stable_chunks(row_ids: numpy.ndarray) -> typing.Iterator[numpy.ndarray]:
+    """
+    Split sorted IDs at fixed block numbers, and then by size, so that chunks
+    depend only on the rows and not on the order they were discovered
+    """
+    ranges = (row_ids >> 16) // STABLE_RANGE_PAGES
+    splits = numpy.flatnonzero(numpy.diff(ranges)) + 1
+    for range_ids in numpy.split(row_ids, splits):
+        for i in range(0, len(range_ids), MAX_SIZE):
+            yield range_ids[i : i + MAX_SIZE]
+
+
+def _start_full_table(dump: Dump, table: Table):
+    """
+    Start dumping entire table, if not already started
+    """
+    if not dump.result.add_full(table):
+        return
+
+    task = _FullTableTask(table=table, dump=dump)
+    dump.start_task(task())
+
+    # discovery stops here, but parents that are also full are cheap to include
+    for reference in table.references:
+        if DumpReferenceDirection.FORWARD not in reference.directions:
+            continue
+        if reference.reference_table.full:
+            _start_full_table(dump, reference.reference_table)
+
+
+def _block_ranges(
+    conn: asyncpg.Connection, table: Table, parallelism: int, stable: bool = False
+) -> typing.List[typing.Optional[BlockRange]]:
+    """
+    Split table into heap block ranges, to be scanned by separate workers.
+    Requires TID range scans (PostgreSQL 14+), otherwise each worker would scan
+    the entire table.
+
+    stable: split at fixed block numbers, regardless of parallelism, so that
+    ranges are the same across dumps
+    """
+    if conn.get_server_version().major < 14:
+        return [None]
+    if stable:
+        starts = list(range(0, table.page_count, STABLE_RANGE_PAGES))
+        if len(starts) <= 1:
+            return [None]
+        return list(zip(starts, starts[1:] + [None]))
+    count = min(parallelism, table.page_count // MIN_RANGE_PAGES)
+    if count <= 1:
+        return [None]
+    # page count is an estimate, so the last range is unbounded
+    starts = [table.page_count * i // count for i in range(count)]
+    return list(zip(starts, starts[1:] + [None]))
+
+
+def _block_range_sql(block_range: BlockRange) -> str:
+    start, end = block_range
+    sql = f"'({start},0)'::tid <= ctid"
+    if end is not None:
+        sql += f" AND ctid < '({end},0)'::tid"
+    return sql
+
+
+def _block_range_str(block_range: typing.Optional[BlockRange]) -> str:
+    if block_range is None:
+        return "all blocks"
+    start, end = block_range
+    return f"blocks {start}-{'' if end is None else end - 1}"
+
 
 @dataclasses.dataclass
 class _RootTask:
     table: Table
     condition: str
     dump: Dump
+    block_range: typing.Optional[BlockRange] = None
+    split: bool = True
 
     async def __call__(self):
         async with self.dump.conn_factory() as conn:
+            if self.split:
+                block_ranges = _block_ranges(
+                    conn, self.table, self.dump.parallelism, self.dump.stable_layout
+                )
+                if 1 < len(block_ranges):
+                    for block_range in block_ranges:
+                        task = _RootTask(
+                            block_range=block_range,
+                            condition=self.condition,
+                            dump=self.dump,
+                            split=False,
+                            table=self.table,
+                        )
+                        self.dump.start_task(task())
+                    return
+
             segments = await _discover_table_condition(
-                conn, self.table, self.condition, self.dump.result
+                conn, self.table, self.condition, self.dump.result, self.block_range
             )
 
             for segment in segments:
@@ -86,6 +195,15 @@ class _TableTask:
             ):
                 return
 
+        to_table = (
+            reference.reference_table
+            if direction == DumpReferenceDirection.FORWARD
+            else reference.table
+        )
+        if to_table.full:
+            _start_full_table(self.dump, to_table)
+            return
+
         segments = await _discover_reference(
             conn,
             self.segment,
@@ -104,70 +222,136 @@ class _TableTask:
             self.dump.start_task(task())
 
     async def __call__(self):
-        with tempfile.TemporaryFile() as tmp:
-            async with self.dump.conn_factory() as conn:
-                await _prepare_discover_reference(conn, self.segment)
-
-                for reference in sorted(
-                    self.segment.table.references,
-                    key=lambda r: r.reference_table.row_count,
-                ):
-                    await self._process_reference(
-                        conn, reference, DumpReferenceDirection.FORWARD
-                    )
-                for reference in sorted(
-                    self.segment.table.reverse_references,
-                    key=lambda r: r.table.row_count,
-                ):
-                    await self._process_reference(
-                        conn, reference, DumpReferenceDirection.REVERSE
-                    )
-                await conn.execute("SET statement_timeout TO 0")
-                await _dump_data(conn, self.segment.table, self.segment.row_ids, tmp)
-
-            tmp.seek(0)
-            try:
-                transformer = self.dump.transformers[self.segment.table.id]
-            except KeyError:
-                # copy file without tranformation
-                async with self.dump.output.open_segment(self.segment) as f:
-                    await to_thread(shutil.copyfileobj, tmp, f)
-            else:
-                if hasattr(os, "fork"):
-                    # in a forked process, transform to new temp file, and then copy
-                    # that transformed temp file
-                    with tempfile.TemporaryFile() as tmp_transformed:
-                        os.set_inheritable(tmp.fileno(), True)
-                        os.set_inheritable(tmp_transformed.fileno(), True)
-                        pid = os.fork()
-                        if not pid:
-                            try:
-                                TableTransformer.transform_binary(
-                                    transformer, tmp, tmp_transformed
-                                )
-                                tmp_transformed.flush()
-                            except BaseException as e:
-                                print(str(e), file=sys.stderr)
-                                os._exit(1)
-                            os._exit(0)
-                        _, exit_code = await to_thread(os.waitpid, pid, 0)
-                        if exit_code:
-                            raise Exception("Transform failed")
-                        tmp_transformed.seek(0)
-                        async with self.dump.output.open_segment(self.segment) as f:
-                            await to_thread(shutil.copyfileobj, tmp_transformed, f)
-                else:
-                    # copy file with transformation
-                    async with self.dump.output.open_segment(self.segment) as f:
-                        await to_thread(
-                            TableTransformer.transform_binary,
-                            transformer,
-                            tmp,
-                            f,
-                        )
+        async with self.dump.conn_factory() as conn:
+            await _prepare_discover_reference(conn, self.segment)
+
+            for reference in sorted(
+                self.segment.table.references,
+                key=lambda r: r.reference_table.row_count,
+            ):
+                await self._process_reference(
+                    conn, reference, DumpReferenceDirection.FORWARD
+                )
+            for reference in sorted(
+                self.segment.table.reverse_references,
+                key=lambda r: r.table.row_count,
+            ):
+                await self._process_reference(
+                    conn, reference, DumpReferenceDirection.REVERSE
+                )
+            if self.dump.stable_layout:
+                # written after discovery, see TempTableStrategy.lay_out
+                return
+            await conn.execute("SET statement_timeout TO 0")
+            await _write_segment(
+                self.dump,
+                self.segment,
+                functools.partial(
+                    _dump_data, conn, self.segment.table, self.segment.row_ids
+                ),
+            )
+
+
+@dataclasses.dataclass
+class _SegmentTask:
+    segment: TableSegment
+    dump: Dump
+
+    async def __call__(self):
+        async with self.dump.conn_factory() as conn:
+            await _prepare_discover_reference(conn, self.segment)
+            await conn.execute("SET statement_timeout TO 0")
+            await _write_segment(
+                self.dump,
+                self.segment,
+                functools.partial(
+                    _dump_data, conn, self.segment.table, self.segment.row_ids
+                ),
+            )
+
 
+@dataclasses.dataclass
+class _FullTableTask:
+    table: Table
+    dump: Dump
 
-async def _dump_data(conn: asyncpg.Connection, table: Table, ids, out: typing.BinaryIO):
+    async def __call__(self):
+        async with self.dump.conn_factory() as conn:
+            block_ranges = _block_ranges(
+                conn, self.table, self.dump.parallelism, self.dump.stable_layout
+            )
+
+        for block_range in block_ranges:
+            segment = self.dump.result.add_untracked(self.table)
+            task = _TableRangeTask(
+                block_range=block_range, dump=self.dump, segment=segment
+            )
+            self.dump.start_task(task())
+
+
+@dataclasses.dataclass
+class _TableRangeTask:
+    block_range: typing.Optional[BlockRange]
+    dump: Dump
+    segment: TableSegment
+
+    async def __call__(self):
+        async with self.dump.conn_factory() as conn:
+            await conn.execute("SET statement_timeout TO 0")
+            row_count = await _write_segment(
+                self.dump,
+                self.segment,
+                functools.partial(_dump_table, conn, self.segment, self.block_range),
+            )
+        self.dump.result.set_row_count(self.segment, row_count)
+
+
+async def _write_segment(
+    dump: Dump,
+    segment: TableSegment,
+    copy: typing.Callable[[AsyncWrite], typing.Awaitable[T]],
+) -> T:
+    """
+    Copy segment data to output. If possible, stream directly to the output.
+    Otherwise, spool and then write.
+    """
+    pool = dump.transform_pool
+    if pool is not None and pool.has_table(segment.table.id):
+        # transform in workers, as data arrives
+        copy = functools.partial(_copy_transformed, pool, segment, copy)
+
+    if not dump.output.busy:
+        async with dump.output.open_segment(segment) as f:
+            async with buffered_writer(f) as write:
+                return await copy(write)
+
+    with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as tmp:
+        async with buffered_writer(tmp) as write:
+            result = await copy(write)
+        tmp.seek(0)
+        await _output_segment(dump, segment, tmp)
+    return result
+
+
+async def _copy_transformed(
+    pool: TransformPool,
+    segment: TableSegment,
+    copy: typing.Callable[[AsyncWrite], typing.Awaitable[T]],
+    output: AsyncWrite,
+) -> T:
+    async with pool.stream(segment.table.id, output) as write:
+        return await copy(write)
+
+
+async def _output_segment(dump: Dump, segment: TableSegment, tmp: typing.BinaryIO):
+    """
+    Write dumped data to output
+    """
+    async with dump.output.open_segment(segment) as f:
+        await to_thread(shutil.copyfileobj, tmp, f)
+
+
+async def _dump_data(conn: asyncpg.Connection, table: Table, ids, output: AsyncWrite):
     """
     Dump data
     """
@@ -179,22 +363,83 @@ async def _dump_data(conn: asyncpg.Connection, table: Table, ids, out: typing.Bi
         FROM {table.sql}
         WHERE ctid = ANY(ARRAY(SELECT tid FROM pg_temp._slice_db))
     """
-    await conn.copy_from_query(query, output=functools.partial(to_thread, out.write))
+    await conn.copy_from_query(query, output=output)
     end = time.perf_counter()
     logging.debug(
         f"Dumped %s rows from table %s (%.3fs)", len(ids), table.id, end - start
     )
 
 
+async def _dump_table(
+    conn: asyncpg.Connection,
+    segment: TableSegment,
+    block_range: typing.Optional[BlockRange],
+    output: AsyncWrite,
+):
+    """
+    Dump entire table, or block range of it, returning the number of rows
+    """
+    table = segment.table
+
+    logging.log(
+        TRACE,
+        f"Dumping %s of table %s as %s/%s",
+        _block_range_str(block_range),
+        table.id,
+        table.id,
+        segment.index,
+    )
+    start = time.perf_counter()
+    if block_range is None and table.transform_sql is None:
+        status = await conn.copy_from_table(
+            table.name,
+            columns=table.columns,
+            output=output,
+            schema_name=table.schema,
+        )
+    else:
+        query = f"""
+            SELECT {sql_list(table.columns_sql)}
+            FROM {table.sql}
+        """
+        if block_range is not None:
+            query += f"WHERE {_block_range_sql(block_range)}"
+        status = await conn.copy_from_query(query, output=output)
+    row_count = int(status.split()[-1])
+    end = time.perf_counter()
+    logging.debug(
+        f"Dumped %s rows from %s of table %s as %s/%s (%.3fs)",
+        row_count,
+        _block_range_str(block_range),
+        table.id,
+        table.id,
+        segment.index,
+        end - start,
+    )
+    return row_count
+
+
 async def _discover_table_condition(
-    conn: asyncpg.Connection, table: Table, condition: str, result: _DiscoveryResult
+    conn: asyncpg.Connection,
+    table: Table,
+    condition: str,
+    result: _DiscoveryResult,
+    block_range: typing.Optional[BlockRange] = None,
 ) -> typing.List[Tid]:
     """
     Discover, using root
     """
-    logging.log(TRACE, f"Finding rows from table %s", table.id)
+    logging.log(
+        TRACE,
+        f"Finding rows from %s of table %s",
+        _block_range_str(block_range),
+        table.id,
+    )
     start = time.perf_counter()
 
+    if block_range is not None:
+        condition = f"({condition}) AND {_block_range_sql(block_range)}"
+
     await conn.execute("SET statement_timeout TO 0")
     query = f"""
         SELECT ctid
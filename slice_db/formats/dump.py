@@ -49,6 +49,7 @@ class DumpTable:
     name: str
     schema: typing.Optional[str]
     sequences: typing.List[str]
+    full: bool = False
 
 
 @dataclasses_json.dataclass_json(
@@ -1,15 +1,30 @@
 import dataclasses
+import json
 import typing
 
 import dataclasses_json
 
-from ..json import DataJsonFormat, package_json_format
+from ..json import JsonFormat, package_json_format
+from ..resource import ResourceFactory
+
+
+@dataclasses_json.dataclass_json(letter_case=dataclasses_json.LetterCase.CAMEL)
+@dataclasses.dataclass()
+class ManifestSchemaEntry:
+    checksum: str
+    """BLAKE2b-128 of uncompressed data, as hex"""
+    compressed_size: int
+    """Compressed size in bytes"""
+    size: int
+    """Uncompressed size in bytes"""
 
 
 @dataclasses_json.dataclass_json(letter_case=dataclasses_json.LetterCase.CAMEL)
 @dataclasses.dataclass()
 class ManifestSchema:
     count: int
+    entries: typing.Optional[typing.List[ManifestSchemaEntry]] = None
+    """Sizes and checksums of statements"""
 
 
 @dataclasses_json.dataclass_json(letter_case=dataclasses_json.LetterCase.CAMEL)
@@ -31,6 +46,14 @@ class ManifestTableSegmentId:
 class ManifestTableSegment:
     row_count: int
     """Number of rows"""
+    codec: str = "deflate"
+    """Compression codec"""
+    checksum: typing.Optional[str] = None
+    """BLAKE2b-128 of uncompressed data, as hex"""
+    compressed_size: typing.Optional[int] = None
+    """Compressed size in bytes"""
+    size: typing.Optional[int] = None
+    """Uncompressed size in bytes"""
 
 
 @dataclasses_json.dataclass_json(letter_case=dataclasses_json.LetterCase.CAMEL)
@@ -42,7 +65,7 @@ class ManifestTable:
     """Name"""
     schema: str
     """Schema"""
-    segments: typing.List[ManifestTableSegment]
+    segments: typing.Sequence[ManifestTableSegment]
     """Segments"""
 
 
@@ -58,4 +81,231 @@ class Manifest:
 MANIFEST_JSON_FORMAT = package_json_format("slice_db.formats", "manifest.json")
 
 
-MANIFEST_DATA_JSON_FORMAT = DataJsonFormat(MANIFEST_JSON_FORMAT, Manifest.schema())
+_SEGMENT_COLUMNS = {
+    "checksum": "checksum",
+    "compressedSize": "compressed_size",
+    "rowCount": "row_count",
+    "size": "size",
+}
+"""Column name and segment attribute"""
+
+
+class ManifestSegments(typing.Sequence[ManifestTableSegment]):
+    """
+    Segments stored as columns, creating each segment only when accessed
+    """
+
+    def __init__(self, columns: typing.Dict[str, typing.Any]):
+        self._columns = columns
+        self._len = len(columns["rowCount"])
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("Segment index out of range")
+        codec = self._columns["codec"]
+        return ManifestTableSegment(
+            checksum=_column_value(self._columns.get("checksum"), index),
+            codec=codec if isinstance(codec, str) else codec[index],
+            compressed_size=_column_value(self._columns.get("compressedSize"), index),
+            row_count=self._columns["rowCount"][index],
+            size=_column_value(self._columns.get("size"), index),
+        )
+
+
+def _column_value(column: typing.Optional[typing.List], index: int):
+    return None if column is None else column[index]
+
+
+class ManifestJsonFormat:
+    """
+    Manifest, with segments as columns
+
+    Segments of large slices are neither validated individually nor converted
+    to dataclasses until accessed.
+    """
+
+    def __init__(self, format: JsonFormat, validate_segments: int):
+        self._format = format
+        self._validate_segments = validate_segments
+
+    def load(self, file_fn: ResourceFactory[typing.TextIO]) -> Manifest:
+        with file_fn() as file:
+            instance = json.load(file)
+        self._validate(instance)
+        return Manifest(
+            post_data=_load_schema(instance.get("postData")),
+            pre_data=_load_schema(instance.get("preData")),
+            sequences={
+                id: ManifestSequence(name=sequence["name"], schema=sequence["schema"])
+                for id, sequence in instance.get("sequences", {}).items()
+            },
+            tables={
+                id: ManifestTable(
+                    columns=table.get("columns", []),
+                    name=table["name"],
+                    schema=table["schema"],
+                    segments=ManifestSegments(_segment_columns(table)),
+                )
+                for id, table in instance["tables"].items()
+            },
+        )
+
+    def dump(
+        self, file_fn: ResourceFactory[typing.TextIO], manifest: Manifest, pretty=False
+    ):
+        instance = {
+            "postData": _dump_schema(manifest.post_data),
+            "preData": _dump_schema(manifest.pre_data),
+            "sequences": {
+                id: {"name": sequence.name, "schema": sequence.schema}
+                for id, sequence in manifest.sequences.items()
+            },
+            "tables": {
+                id: {
+                    "columns": table.columns,
+                    "name": table.name,
+                    "schema": table.schema,
+                    "segmentColumns": _dump_segments(table.segments),
+                }
+                for id, table in manifest.tables.items()
+            },
+        }
+        self._validate(instance)
+        with file_fn() as file:
+            json.dump(instance, file, sort_keys=True, indent=2 if pretty else None)
+
+    def _validate(self, instance):
+        """
+        Validate, sampling segments if there are many
+        """
+        tables = instance.get("tables")
+        if not isinstance(tables, dict):
+            self._format.validate(instance)
+            return
+        count = sum(_segment_count(table) for table in tables.values())
+        if count <= self._validate_segments:
+            self._format.validate(instance)
+            return
+        sample = {
+            **instance,
+            "tables": {
+                id: _sample_table(table, self._validate_segments)
+                if isinstance(table, dict)
+                else table
+                for id, table in tables.items()
+            },
+        }
+        self._format.validate(sample)
+        for id, table in tables.items():
+            if "segmentColumns" in table:
+                _check_columns(id, table["segmentColumns"])
+
+
+def _segment_count(table) -> int:
+    if not isinstance(table, dict):
+        return 0
+    columns = table.get("segmentColumns")
+    if isinstance(columns, dict):
+        return len(columns.get("rowCount", []))
+    return len(table.get("segments", []))
+
+
+def _load_schema(instance) -> ManifestSchema:
+    if instance is None:
+        return ManifestSchema(count=0)
+    entries = instance.get("entries")
+    return ManifestSchema(
+        count=instance["count"],
+        entries=None
+        if entries is None
+        else [
+            ManifestSchemaEntry(
+                checksum=entry["checksum"],
+                compressed_size=entry["compressedSize"],
+                size=entry["size"],
+            )
+            for entry in entries
+        ],
+    )
+
+
+def _dump_schema(schema: ManifestSchema):
+    instance = {"count": schema.count}
+    if schema.entries is not None:
+        instance["entries"] = [
+            {
+                "checksum": entry.checksum,
+                "compressedSize": entry.compressed_size,
+                "size": entry.size,
+            }
+            for entry in schema.entries
+        ]
+    return instance
+
+
+def _segment_columns(table) -> typing.Dict[str, typing.Any]:
+    """
+    Columns of segments, converting segments of older manifests
+    """
+    if "segmentColumns" in table:
+        return table["segmentColumns"]
+    segments = table.get("segments", [])
+    columns = {
+        name: [segment.get(name) for segment in segments]
+        for name in _SEGMENT_COLUMNS.keys()
+    }
+    columns["codec"] = [segment.get("codec", "deflate") for segment in segments]
+    return columns
+
+
+def _dump_segments(segments: typing.Sequence[ManifestTableSegment]):
+    columns = {
+        name: [getattr(segment, attr) for segment in segments]
+        for name, attr in _SEGMENT_COLUMNS.items()
+    }
+    codecs = {segment.codec for segment in segments}
+    if len(codecs) == 1:
+        (columns["codec"],) = codecs
+    else:
+        columns["codec"] = [segment.codec for segment in segments]
+    return columns
+
+
+def _sample_table(table, size: int):
+    if "segmentColumns" in table:
+        table = {
+            **table,
+            "segmentColumns": {
+                name: column[:size] if isinstance(column, list) else column
+                for name, column in table["segmentColumns"].items()
+            },
+        }
+    if "segments" in table:
+        table = {**table, "segments": table["segments"][:size]}
+    return table
+
+
+def _check_columns(id: str, columns):
+    """
+    Check what sampled validation does not: column lengths and row counts
+    """
+    row_counts = columns["rowCount"]
+    for name, column in columns.items():
+        if isinstance(column, list) and len(column) != len(row_counts):
+            raise Exception(
+                f"Table {id} has {len(column)} {name} values, but {len(row_counts)} segments"
+            )
+    if not all(type(row_count) is int and 0 <= row_count for row_count in row_counts):
+        raise Exception(f"Table {id} has invalid rowCount values")
+
+
+MANIFEST_DATA_JSON_FORMAT = ManifestJsonFormat(
+    MANIFEST_JSON_FORMAT, validate_segments=1000
+)
@@ -27,6 +27,7 @@ class TransformTable:
 class Transform:
     tables: typing.Dict[str, TransformTable]
     transforms: typing.Dict[str, TransformInstance]
+    version: int = 1
 
 
 TRANSFORM_JSON_FORMAT = package_json_format("slice_db.formats", "transform.json")
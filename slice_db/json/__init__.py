@@ -26,6 +26,9 @@ class JsonFormat:
     def __init__(self, json_schema: JsonSchema):
         self._json_schema = json_schema
 
+    def validate(self, instance):
+        self._json_schema.validate(instance)
+
     def load(self, file_fn: ResourceFactory[typing.TextIO]):
         with file_fn() as file:
             instance = json.load(file)
@@ -0,0 +1,198 @@
+"""
+Parquet output, one file per table
+"""
+
+import importlib
+import os
+import typing
+
+from .pg.copy import COPY_FORMAT
+
+BATCH_SIZE = 1024 * 64
+"""Number of rows per row group"""
+
+_COMPRESSIONS = {
+    "deflate": "gzip",
+    "lz4": "lz4",
+    "none": "none",
+    "zstd": "zstd",
+}
+"""Parquet compression of codec"""
+
+_INFINITIES = {
+    "date": ("0001-01-01", "9999-12-31"),
+    "timestamp": ("0001-01-01 00:00:00", "9999-12-31 23:59:59.999999"),
+    "timestamptz": ("0001-01-01 00:00:00+00", "9999-12-31 23:59:59.999999+00"),
+}
+"""Values of -infinity and infinity, by PostgreSQL type"""
+
+
+def _import_pyarrow():
+    try:
+        return (
+            importlib.import_module("pyarrow"),
+            importlib.import_module("pyarrow.parquet"),
+        )
+    except ImportError:
+        raise Exception("Parquet output requires the pyarrow package")
+
+
+class ParquetDirectoryWriter:
+    """
+    Write each table as a Parquet file in a directory, each batch of a segment
+    as a row group
+
+    Not thread-safe for the same table.
+    """
+
+    def __init__(self, path: str, codec: str):
+        self._pa, self._pq = _import_pyarrow()
+        self._compression = _COMPRESSIONS[codec]
+        self._path = path
+        self._infinities = {}
+        self._schemas = {}
+        self._writers = {}
+
+    def __enter__(self):
+        os.makedirs(self._path, exist_ok=True)
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_table(self, id: str, columns: typing.List[str], types: typing.List[str]):
+        """
+        Add table, with PostgreSQL type names of columns
+        """
+        self._infinities[id] = [_INFINITIES.get(type) for type in types]
+        self._schemas[id] = self._pa.schema(
+            [
+                self._pa.field(column, _arrow_type(self._pa, type))
+                for column, type in zip(columns, types)
+            ]
+        )
+
+    def convert(self, id: str, file: typing.BinaryIO):
+        """
+        Convert COPY text to record batches, of at most BATCH_SIZE rows
+        """
+        lines = []
+        for line in file:
+            lines.append(line)
+            if len(lines) == BATCH_SIZE:
+                yield self._convert_batch(id, lines)
+                lines = []
+        if lines:
+            yield self._convert_batch(id, lines)
+
+    def _convert_batch(self, id: str, lines: typing.List[bytes]):
+        schema = self._schemas[id]
+        values = [[] for _ in schema]
+        for line in lines:
+            row = COPY_FORMAT.parse_row(line[:-1].decode("utf-8"))
+            for column, field in zip(values, row):
+                column.append(field)
+        return self._pa.record_batch(
+            [
+                _arrow_array(self._pa, field, column, infinities)
+                for field, column, infinities in zip(
+                    schema, values, self._infinities[id]
+                )
+            ],
+            schema=schema,
+        )
+
+    def write(self, id: str, batch):
+        """
+        Write record batch as row group
+        """
+        if id not in self._writers:
+            self._writers[id] = self._pq.ParquetWriter(
+                os.path.join(self._path, f"{id}.parquet"),
+                self._schemas[id],
+                compression=self._compression,
+            )
+        self._writers[id].write_batch(batch)
+
+    def close(self):
+        writers = list(self._writers.values())
+        self._writers.clear()
+        for writer in writers:
+            writer.close()
+
+
+def _arrow_type(pa, type: str):
+    """
+    Arrow type of PostgreSQL type, or string
+    """
+    if type == "bool":
+        return pa.bool_()
+    if type == "bytea":
+        return pa.binary()
+    if type == "date":
+        return pa.date32()
+    if type == "float4":
+        return pa.float32()
+    if type == "float8":
+        return pa.float64()
+    if type == "int2":
+        return pa.int16()
+    if type == "int4":
+        return pa.int32()
+    if type == "int8":
+        return pa.int64()
+    if type == "time":
+        return pa.time64("us")
+    if type == "timestamp":
+        return pa.timestamp("us")
+    if type == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _arrow_array(
+    pa,
+    field,
+    values: typing.List[typing.Optional[str]],
+    infinities: typing.Optional[typing.Tuple[str, str]] = None,
+):
+    if field.type == pa.string():
+        return pa.array(values, pa.string())
+    if field.type == pa.bool_():
+        return pa.array([None if v is None else v == "t" for v in values], pa.bool_())
+    if field.type == pa.binary():
+        return pa.array(
+            [None if v is None else bytes.fromhex(v[2:]) for v in values], pa.binary()
+        )
+    if field.type == pa.time64("us"):
+        try:
+            return pa.array([_parse_time(v) for v in values], pa.time64("us"))
+        except ValueError as e:
+            raise Exception(f"Cannot convert column {field.name} to {field.type}: {e}")
+    if infinities is not None:
+        # infinite dates are clamped to the range of Python dates
+        minimum, maximum = infinities
+        values = [
+            minimum if v == "-infinity" else maximum if v == "infinity" else v
+            for v in values
+        ]
+    try:
+        return pa.array(values, pa.string()).cast(field.type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise Exception(f"Cannot convert column {field.name} to {field.type}: {e}")
+
+
+def _parse_time(value: typing.Optional[str]) -> typing.Optional[int]:
+    """
+    Parse PostgreSQL time as microseconds
+    """
+    if value is None:
+        return None
+    hms, _, fraction = value.partition(".")
+    hours, minutes, seconds = (int(part) for part in hms.split(":"))
+    result = ((hours * 60 + minutes) * 60 + seconds) * 1000000
+    if fraction:
+        result += int(fraction.ljust(6, "0"))
+    if result >= 24 * 60 * 60 * 1000000:
+        raise ValueError(f"Time {value} is out of range")
+    return result
@@ -1,63 +1,112 @@
+import itertools
+import re
 import typing
 
 Field = typing.Optional[str]
 RawRow = typing.List[str]
+Row = typing.List[Field]
+
+_NULL = r"\N"
+
+_ESCAPES = {
+    "\\": "\\\\",
+    "\b": "\\b",
+    "\f": "\\f",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+    "\v": "\\v",
+}
+
+_ESCAPE_TABLE = str.maketrans(_ESCAPES)
+
+_UNESCAPES = {escape[1]: char for char, escape in _ESCAPES.items()}
+
+_NUMERIC_ESCAPES = set("01234567x")
+
+_UNESCAPE_RE = re.compile(r"\\(?:([0-7]{1,3})|x([0-9a-fA-F]{1,2})|(.))", re.DOTALL)
+
+
+def _unescape(text: str) -> str:
+    """
+    Unescape field, handling the single-character escapes that PostgreSQL
+    writes without a regular expression
+    """
+    parts = text.split("\\")
+    result = [parts[0]]
+    escaped = False
+    for part in itertools.islice(parts, 1, None):
+        if escaped:
+            # follows escaped backslash
+            result.append(part)
+            escaped = False
+        elif not part:
+            result.append("\\")
+            escaped = True
+        elif part[0] in _NUMERIC_ESCAPES:
+            return _UNESCAPE_RE.sub(_unescape_match, text)
+        else:
+            result.append(_UNESCAPES.get(part[0], part[0]))
+            result.append(part[1:])
+    return "".join(result)
+
+
+def _unescape_match(match: re.Match) -> str:
+    octal, hex, char = match.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hex is not None:
+        return chr(int(hex, 16))
+    # other characters are taken literally
+    return _UNESCAPES.get(char, char)
 
 
 class CopyFormat:
-    def parse_field(self, text: str) -> Field:
-        if text == r"\N":
-            return None
+    """
+    PostgreSQL COPY text format
+    """
 
+    def parse_field(self, text: str) -> Field:
         if "\\" not in text:
             return text
 
-        i = 0
-        result = ""
-        while i < len(text):
-            try:
-                j = text.index("\\", i)
-            except ValueError:
-                result += text[i:]
-                break
-            result += text[i:j]
-            if text[j + 1] == "\\":
-                result += "\\"
-            elif text[j + 1] == "b":
-                result += "\b"
-            elif text[j + 1] == "f":
-                result += "\f"
-            elif text[j + 1] == "n":
-                result += "\n"
-            elif text[j + 1] == "r":
-                result += "\r"
-            elif text[j + 1] == "t":
-                result += "\t"
-            elif text[j + 1] == "v":
-                result += "\v"
-            i = j + 2
-
-        return result
+        if text == _NULL:
+            return None
+
+        return _unescape(text)
 
     def parse_raw_row(self, text: str) -> RawRow:
         return text.split("\t")
 
+    def parse_row(self, text: str) -> Row:
+        """
+        Split and unescape row, without trailing newline
+        """
+        if "\\" not in text:
+            return text.split("\t")
+
+        parse_field = self.parse_field
+        return [parse_field(field) for field in text.split("\t")]
+
     def serialize_field(self, field: Field) -> str:
         if field is None:
-            return r"\N"
-
-        return (
-            field.replace("\\", "\\\\")
-            .replace("\b", "\\b")
-            .replace("\f", "\\f")
-            .replace("\n", "\\n")
-            .replace("\r", "\\r")
-            .replace("\t", "\\t")
-            .replace("\v", "\\t")
-        )
+            return _NULL
+
+        # special characters are all unprintable, except backslash
+        if "\\" not in field and field.isprintable():
+            return field
+
+        return field.translate(_ESCAPE_TABLE)
 
     def serialize_raw_row(self, row: RawRow) -> str:
         return "\t".join(row)
 
+    def serialize_row(self, row: Row) -> str:
+        """
+        Escape and join row, without trailing newline
+        """
+        serialize_field = self.serialize_field
+        return "\t".join([serialize_field(field) for field in row])
+
 
 COPY_FORMAT = CopyFormat()
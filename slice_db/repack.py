@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import dataclasses
+import enum
+import functools
+import logging
+import shutil
+import threading
+import time
+import typing
+
+from .codec import Codec, DeflateCodec
+from .concurrent import to_thread
+from .formats.manifest import (
+    MANIFEST_DATA_JSON_FORMAT,
+    Manifest,
+    ManifestSchema,
+    ManifestSchemaEntry,
+    ManifestTableSegment,
+)
+from .resource import ResourceFactory
+from .slice import (
+    MemberStats,
+    SliceDirectoryWriter,
+    SliceStreamReader,
+    SliceStreamWriter,
+    SliceWriter,
+    SpooledSliceStream,
+    open_slice_reader,
+)
+
+_CHUNK_SIZE = 1024 * 64
+
+
+class RepackOutputType(enum.Enum):
+    DIRECTORY = enum.auto()
+    SLICE = enum.auto()
+    STREAM = enum.auto()
+
+
+@dataclasses.dataclass
+class RepackIo:
+    input: ResourceFactory[typing.BinaryIO]
+    output: ResourceFactory[typing.BinaryIO]
+    input_directory: typing.Optional[str] = None
+    """Input directory, instead of input"""
+    output_directory: typing.Optional[str] = None
+    """Output directory, for directory output type"""
+
+
+@dataclasses.dataclass
+class RepackParams:
+    output_type: RepackOutputType
+    parallelism: int
+    segment_rows: int
+    """Coalesce segments up to this many rows"""
+    segment_size: int
+    """Coalesce segments up to this many uncompressed bytes"""
+    codec: Codec = DeflateCodec()
+
+
+@dataclasses.dataclass
+class _SegmentGroup:
+    table_id: str
+    index: int
+    """Index of new segment"""
+    sources: typing.List[typing.Tuple[int, ManifestTableSegment]]
+    """Index and manifest of existing segments"""
+
+    @property
+    def row_count(self):
+        return sum(segment.row_count for _, segment in self.sources)
+
+
+async def repack(io: RepackIo, params: RepackParams):
+    """
+    Rewrite slice, with a different codec, container, or segment sizes
+    """
+    logging.info("Repacking slice")
+    start = time.perf_counter()
+
+    with contextlib.ExitStack() as stack:
+        reader = stack.enter_context(open_slice_reader(io.input, io.input_directory))
+        if isinstance(reader, SliceStreamReader):
+            # members of streams are only in order of arrival
+            reader = stack.enter_context(await to_thread(SpooledSliceStream, reader))
+        manifest = MANIFEST_DATA_JSON_FORMAT.load(reader.open_manifest)
+
+        if params.output_type == RepackOutputType.DIRECTORY:
+            writer = stack.enter_context(
+                SliceDirectoryWriter(io.output_directory, params.codec)
+            )
+        else:
+            file = stack.enter_context(io.output())
+            if params.output_type == RepackOutputType.SLICE:
+                writer = stack.enter_context(SliceWriter(file, params.codec))
+            else:
+                writer = stack.enter_context(SliceStreamWriter(file, params.codec))
+        output = _Output(writer)
+
+        groups = [
+            group
+            for id, table in manifest.tables.items()
+            for group in _group_segments(
+                id, table.segments, params.segment_rows, params.segment_size
+            )
+        ]
+
+        lock = asyncio.Semaphore(params.parallelism)
+
+        async def run(fn, *args):
+            async with lock:
+                return await to_thread(fn, *args)
+
+        async def copy_schema(section: str, schema: ManifestSchema):
+            stats = await asyncio.gather(
+                *(
+                    run(
+                        output.write_schema,
+                        section,
+                        i,
+                        functools.partial(reader.open_schema, section, i),
+                    )
+                    for i in range(schema.count)
+                )
+            )
+            return ManifestSchema(
+                count=schema.count,
+                entries=[
+                    ManifestSchemaEntry(
+                        checksum=s.checksum,
+                        compressed_size=s.compressed_size,
+                        size=s.size,
+                    )
+                    for s in stats
+                ],
+            )
+
+        # restore of streams runs pre-data before rows arrive
+        pre_data = await copy_schema("pre-data", manifest.pre_data)
+        if params.output_type == RepackOutputType.STREAM:
+            MANIFEST_DATA_JSON_FORMAT.dump(
+                writer.open_header,
+                Manifest(
+                    pre_data=ManifestSchema(count=pre_data.count),
+                    post_data=ManifestSchema(count=0),
+                    sequences={},
+                    tables={
+                        id: dataclasses.replace(table, segments=[])
+                        for id, table in manifest.tables.items()
+                    },
+                ),
+            )
+
+        segment_stats, post_data = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    run(
+                        output.write_segment,
+                        group,
+                        [
+                            functools.partial(
+                                reader.open_segment, group.table_id, i, segment.codec
+                            )
+                            for i, segment in group.sources
+                        ],
+                    )
+                    for group in groups
+                )
+            ),
+            copy_schema("post-data", manifest.post_data),
+        )
+
+        for id in manifest.sequences.keys():
+            writer.write_sequence(id, reader.read_sequence(id))
+
+        tables = {
+            id: dataclasses.replace(table, segments=[])
+            for id, table in manifest.tables.items()
+        }
+        for group, stats in zip(groups, segment_stats):
+            tables[group.table_id].segments.append(
+                ManifestTableSegment(
+                    checksum=stats.checksum,
+                    codec=params.codec.name,
+                    compressed_size=stats.compressed_size,
+                    row_count=group.row_count,
+                    size=stats.size,
+                )
+            )
+        MANIFEST_DATA_JSON_FORMAT.dump(
+            writer.open_manifest,
+            Manifest(
+                pre_data=pre_data,
+                post_data=post_data,
+                sequences=manifest.sequences,
+                tables=tables,
+            ),
+        )
+
+    end = time.perf_counter()
+    logging.info(
+        "Repacked %d segments into %d (%.3fs)",
+        sum(len(table.segments) for table in manifest.tables.values()),
+        len(groups),
+        end - start,
+    )
+
+
+def _group_segments(
+    table_id: str,
+    segments: typing.Sequence[ManifestTableSegment],
+    segment_rows: int,
+    segment_size: int,
+) -> typing.Iterator[_SegmentGroup]:
+    """
+    Group consecutive segments, up to the limits
+
+    Segments of older slices have no recorded size, so only rows limit them.
+    """
+    group = None
+    index = 0
+    rows = 0
+    size = 0
+    for i, segment in enumerate(segments):
+        if group is not None and (
+            segment_rows < rows + segment.row_count
+            or segment_size < size + (segment.size or 0)
+        ):
+            yield group
+            group = None
+            index += 1
+        if group is None:
+            group = _SegmentGroup(table_id=table_id, index=index, sources=[])
+            rows = 0
+            size = 0
+        group.sources.append((i, segment))
+        rows += segment.row_count
+        size += segment.size or 0
+    if group is not None:
+        yield group
+
+
+class _Output:
+    """
+    Thread-safe writer of members
+    """
+
+    def __init__(self, writer):
+        self._lock = threading.Lock()
+        self._writer = writer
+
+    def write_schema(
+        self,
+        section: str,
+        index: int,
+        open_source: typing.Callable[[], typing.BinaryIO],
+    ) -> MemberStats:
+        with open_source() as file:
+            if isinstance(self._writer, SliceDirectoryWriter):
+                with self._writer.open_schema(section, index) as member:
+                    shutil.copyfileobj(file, member)
+            else:
+                member = self._writer.schema_member(section, index)
+                with member:
+                    shutil.copyfileobj(file, member)
+                    self._write_member(member)
+        return member.stats()
+
+    def write_segment(
+        self,
+        group: _SegmentGroup,
+        open_sources: typing.List[typing.Callable[[], typing.BinaryIO]],
+    ) -> MemberStats:
+        def copy(member):
+            for open_source in open_sources:
+                with open_source() as f:
+                    while True:
+                        data = f.read(_CHUNK_SIZE)
+                        if not data:
+                            break
+                        member.write(data)
+
+        if isinstance(self._writer, SliceDirectoryWriter):
+            with self._writer.open_segment(group.table_id, group.index) as member:
+                copy(member)
+        else:
+            member = self._writer.segment_member(group.table_id, group.index)
+            with member:
+                copy(member)
+                self._write_member(member)
+        return member.stats()
+
+    def _write_member(self, member):
+        member.finish()
+        with self._lock:
+            self._writer.write_member(member)
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import asyncio
 import contextlib
 import dataclasses
@@ -10,6 +12,7 @@ import typing
 import asyncpg
 from pg_sql import SqlId, SqlNumber, SqlObject, SqlString
 
+from .codec import Codec, get_codec
 from .collection.dict import groups
 from .concurrent import to_thread, wait_success
 from .concurrent.graph import GraphRunner
@@ -18,13 +21,19 @@ from .formats.dump import DumpSchema
 from .formats.manifest import (
     MANIFEST_DATA_JSON_FORMAT,
     Manifest,
+    ManifestSequence,
     ManifestTable,
     ManifestTableSegment,
 )
 from .log import TRACE
 from .pg import defer_constraints
 from .resource import AsyncResourceFactory, ResourceFactory
-from .slice import SliceReader
+from .slice import (
+    SliceReader,
+    SliceStreamReader,
+    StreamFrameKind,
+    open_slice_reader,
+)
 
 
 @dataclasses.dataclass
@@ -38,73 +47,177 @@ class RestoreParams:
 class RestoreIo:
     conn: AsyncResourceFactory[asyncpg.Connection]
     input: ResourceFactory[typing.BinaryIO]
+    input_directory: typing.Optional[str] = None
+    """Input directory, instead of input"""
 
 
-async def restore(io, params):
+@contextlib.asynccontextmanager
+async def open_conn_factory(
+    conn: AsyncResourceFactory[asyncpg.Connection], params: RestoreParams
+) -> typing.AsyncIterator[AsyncResourceFactory[asyncpg.Connection]]:
+    """
+    Open factory for restore connections, limited to the parallelism, and
+    sharing one transaction if required
+    """
     if 1 < params.parallelism and params.transaction:
         raise Exception("A single transaction must be disabled for parallelism > 1")
 
     lock = asyncio.Semaphore(params.parallelism)
 
-    with io.input() as file, SliceReader(file) as reader:
-        manifest = MANIFEST_DATA_JSON_FORMAT.load(reader.open_manifest)
+    if params.transaction:
+        async with conn() as shared_conn, shared_conn.transaction():
+
+            @contextlib.asynccontextmanager
+            async def conn_factory():
+                async with lock:
+                    yield shared_conn
 
-        async with contextlib.AsyncExitStack() as stack:
-            if params.transaction:
-                conn = await stack.enter_async_context(io.conn())
-                await stack.enter_async_context(conn.transaction())
+            yield conn_factory
+    else:
+
+        @contextlib.asynccontextmanager
+        async def conn_factory():
+            async with lock, conn() as conn_:
+                yield conn_
+
+        yield conn_factory
 
-                @contextlib.asynccontextmanager
-                async def conn_factory():
-                    async with lock:
-                        yield conn
 
+async def restore(io, params):
+    with open_slice_reader(io.input, io.input_directory) as reader:
+        async with open_conn_factory(io.conn, params) as conn_factory:
+            if isinstance(reader, SliceStreamReader):
+                await _restore_stream(
+                    conn_factory=conn_factory, params=params, reader=reader
+                )
             else:
+                await _restore_slice(
+                    conn_factory=conn_factory, params=params, reader=reader
+                )
 
-                @contextlib.asynccontextmanager
-                async def conn_factory():
-                    async with lock, io.conn() as conn:
-                        yield conn
-
-            if params.include_schema:
-                async with conn_factory() as conn:
-                    for i in range(manifest.pre_data.count):
-                        logging.info("Running pre-data %d", i)
-                        with reader.open_schema("pre-data", i) as f:
-                            schema_sql = f.read().decode("utf-8")
-                        await conn.execute(schema_sql)
 
-            await _restore_sequences(
-                conn_factory=conn_factory,
-                manifest=manifest,
-                reader=reader,
-            )
+async def _restore_slice(
+    conn_factory: AsyncResourceFactory,
+    params: RestoreParams,
+    reader: SliceReader,
+):
+    manifest = MANIFEST_DATA_JSON_FORMAT.load(reader.open_manifest)
 
-            await _restore_rows(
-                conn_factory=conn_factory,
-                include_schema=params.include_schema,
-                manifest=manifest,
-                reader=reader,
-                transaction=params.transaction,
-            )
+    if params.include_schema:
+        async with conn_factory() as conn:
+            for i in range(manifest.pre_data.count):
+                logging.info("Running pre-data %d", i)
+                with reader.open_schema("pre-data", i) as f:
+                    schema_sql = f.read().decode("utf-8")
+                await conn.execute(schema_sql)
+
+    await _restore_sequences(
+        conn_factory=conn_factory,
+        sequences=manifest.sequences,
+        read_sequence=reader.read_sequence,
+    )
 
-            if params.include_schema:
-                async with conn_factory() as conn:
-                    for i in range(manifest.post_data.count):
-                        logging.info("Running post-data %d", i)
-                        with reader.open_schema("post-data", i) as f:
-                            schema_sql = f.read().decode("utf-8")
+    await _restore_rows(
+        conn_factory=conn_factory,
+        include_schema=params.include_schema,
+        manifest=manifest,
+        parallelism=params.parallelism,
+        reader=reader,
+        transaction=params.transaction,
+    )
+
+    if params.include_schema:
+        async with conn_factory() as conn:
+            for i in range(manifest.post_data.count):
+                logging.info("Running post-data %d", i)
+                with reader.open_schema("post-data", i) as f:
+                    schema_sql = f.read().decode("utf-8")
+                await conn.execute(schema_sql)
+
+
+async def _restore_stream(
+    conn_factory: AsyncResourceFactory,
+    params: RestoreParams,
+    reader: SliceStreamReader,
+):
+    """
+    Restore slice stream, loading segments while later frames are still
+    arriving
+    """
+    manifest = None
+    post_data = {}
+    segment_restore = SegmentRestore(
+        conn_factory=conn_factory,
+        include_schema=params.include_schema,
+        parallelism=params.parallelism,
+        transaction=params.transaction,
+    )
+    sequence_values = {}
+    started = False
+    try:
+        while manifest is None:
+            frame = await to_thread(reader.read_frame)
+            if frame.kind == StreamFrameKind.HEADER:
+                with frame.open_text() as f:
+                    header = MANIFEST_DATA_JSON_FORMAT.load(lambda: f)
+                await segment_restore.start(header.tables)
+                started = True
+            elif frame.kind == StreamFrameKind.MANIFEST:
+                with frame.open_text() as f:
+                    manifest = MANIFEST_DATA_JSON_FORMAT.load(lambda: f)
+            elif frame.kind == StreamFrameKind.SCHEMA:
+                with frame.data as f:
+                    schema_sql = f.read().decode("utf-8")
+                if not params.include_schema:
+                    continue
+                if frame.meta["section"] == "pre-data":
+                    async with conn_factory() as conn:
+                        logging.info("Running pre-data %d", frame.meta["index"])
                         await conn.execute(schema_sql)
+                else:
+                    post_data[frame.meta["index"]] = schema_sql
+            elif frame.kind == StreamFrameKind.SEGMENT:
+                if not started:
+                    raise Exception("Slice stream has segment before header")
+                segment_restore.add(
+                    frame.meta["table"],
+                    frame.meta["index"],
+                    get_codec(frame.meta["codec"]),
+                    frame.data,
+                )
+            elif frame.kind == StreamFrameKind.SEQUENCE:
+                with frame.data as f:
+                    sequence_values[frame.meta["sequence"]] = int(f.read())
+            else:
+                frame.data.close()
+
+        if not started:
+            raise Exception("Slice stream has no header")
+        # drain the index, so that the writer is not cut off
+        await to_thread(reader.read_frame)
+    except:
+        await segment_restore.cancel()
+        raise
+
+    for id, sequence in manifest.sequences.items():
+        segment_restore.add_sequence(id, sequence, sequence_values[id])
+    await segment_restore.finish()
+
+    if params.include_schema:
+        async with conn_factory() as conn:
+            for i, schema_sql in sorted(post_data.items()):
+                logging.info("Running post-data %d", i)
+                await conn.execute(schema_sql)
 
 
 async def _restore_sequences(
     conn_factory: AsyncResourceFactory,
-    manifest: Manifest,
-    reader: SliceReader,
+    sequences: typing.Dict[str, ManifestSequence],
+    read_sequence: typing.Callable[[str], int],
 ):
     async with conn_factory() as conn:
-        for id, sequence in manifest.sequences.items():
-            value = SqlNumber(reader.read_sequence(id))
+        for id, sequence in sequences.items():
+            value = SqlNumber(read_sequence(id))
             seq = SqlObject(SqlId(sequence.schema), SqlId(sequence.name))
             await conn.execute(
                 f"""
@@ -119,37 +232,67 @@ async def _restore_rows(
     conn_factory: AsyncResourceFactory,
     include_schema: bool,
     manifest: Manifest,
+    parallelism: int,
     reader: SliceReader,
     transaction: bool,
 ):
-    if include_schema:
-        constraints = []
-    else:
-        async with conn_factory() as conn:
-            constraints = await get_constaints(conn, manifest.tables)
-
-            deferrable_constaints = [
-                SqlObject(SqlId(constraint.schema), SqlId(constraint.name))
-                for constraint in constraints
-                if constraint.deferrable
-            ]
-
-            if deferrable_constaints:
-                if not transaction:
-                    raise Exception(f"Transaction required to defer {constraints[0]}")
-
-                logging.info("Deferring %d constraints", len(deferrable_constaints))
-                await defer_constraints(conn, deferrable_constaints)
+    constraints = await _get_restore_constraints(
+        conn_factory=conn_factory,
+        include_schema=include_schema,
+        tables=manifest.tables,
+        transaction=transaction,
+    )
 
     items = {
         id: RestoreItem(
             conn_factory=conn_factory,
             id=id,
+            parallelism=parallelism,
             reader=reader,
             table=table,
         )
         for id, table in manifest.tables.items()
     }
+    await wait_success(_start_items(items, constraints))
+
+
+async def _get_restore_constraints(
+    conn_factory: AsyncResourceFactory,
+    include_schema: bool,
+    tables: typing.Dict[str, ManifestTable],
+    transaction: bool,
+) -> typing.List[ForeignKey]:
+    """
+    Get constraints between tables, deferring the deferrable ones
+    """
+    if include_schema:
+        return []
+
+    async with conn_factory() as conn:
+        constraints = await get_constaints(conn, tables)
+
+        deferrable_constaints = [
+            SqlObject(SqlId(constraint.schema), SqlId(constraint.name))
+            for constraint in constraints
+            if constraint.deferrable
+        ]
+
+        if deferrable_constaints:
+            if not transaction:
+                raise Exception(f"Transaction required to defer {constraints[0]}")
+
+            logging.info("Deferring %d constraints", len(deferrable_constaints))
+            await defer_constraints(conn, deferrable_constaints)
+
+    return constraints
+
+
+def _start_items(
+    items: typing.Dict[str, typing.Any], constraints: typing.List[ForeignKey]
+) -> typing.List[asyncio.Task]:
+    """
+    Start restoring tables, each after the tables it references
+    """
     tasks = {id: asyncio.create_task(item()) for id, item in items.items()}
 
     for constraint in constraints:
@@ -158,13 +301,14 @@ async def _restore_rows(
         item = items[constraint.table]
         item.deps.append(tasks[constraint.reference_table])
 
-    await wait_success(tasks.values())
+    return list(tasks.values())
 
 
 @dataclasses.dataclass
 class RestoreItem:
     conn_factory: AsyncResourceFactory[asyncpg.Connection]
     id: str
+    parallelism: int
     reader: SliceReader
     table: ManifestTable
     deps: typing.List[asyncio.Task] = dataclasses.field(default_factory=list)
@@ -172,13 +316,150 @@ class RestoreItem:
     async def __call__(self):
         await asyncio.gather(*self.deps)
 
+        # segments are independent, so restore them concurrently, largest
+        # first so that workers finish together
+        segments = iter(
+            sorted(
+                enumerate(self.table.segments),
+                key=lambda item: -(item[1].size or 0),
+            )
+        )
+
+        async def worker():
+            for i, segment in segments:
+                await self._restore_segment(i, segment)
+
+        worker_count = min(self.parallelism, len(self.table.segments))
+        await wait_success(asyncio.create_task(worker()) for _ in range(worker_count))
+
+    async def _restore_segment(self, index: int, segment: ManifestTableSegment):
+        async with self.conn_factory() as conn:
+            with self.reader.open_segment(
+                self.id,
+                index,
+                segment.codec,
+            ) as file:
+                await update_data(conn, self.id, self.table, index, file)
+
+    def __hash__(self):
+        return id(self)
+
+
+class SegmentRestore:
+    """
+    Restore segments as they arrive, each table after the tables it
+    references
+
+    Referenced tables are complete only once all segments have been added,
+    so segments of dependent tables wait until then.
+    """
+
+    def __init__(
+        self,
+        conn_factory: AsyncResourceFactory[asyncpg.Connection],
+        include_schema: bool,
+        parallelism: int,
+        transaction: bool,
+    ):
+        self._conn_factory = conn_factory
+        self._include_schema = include_schema
+        self._items = {}
+        self._parallelism = parallelism
+        self._sequences = {}
+        self._sequence_values = {}
+        self._tasks = []
+        self._transaction = transaction
+
+    async def start(self, tables: typing.Dict[str, ManifestTable]):
+        """
+        Start restoring tables
+        """
+        constraints = await _get_restore_constraints(
+            conn_factory=self._conn_factory,
+            include_schema=self._include_schema,
+            tables=tables,
+            transaction=self._transaction,
+        )
+        self._items = {
+            id: _SegmentRestoreItem(
+                conn_factory=self._conn_factory,
+                id=id,
+                parallelism=self._parallelism,
+                table=table,
+            )
+            for id, table in tables.items()
+        }
+        self._tasks = _start_items(self._items, constraints)
+
+    def add(self, table_id: str, index: int, codec: Codec, file: typing.BinaryIO):
+        """
+        Add segment, taking ownership of the file
+        """
+        try:
+            item = self._items[table_id]
+        except KeyError:
+            file.close()
+            raise Exception(f"Unknown table {table_id}")
+        item.segments.put_nowait((index, codec, file))
+
+    def add_sequence(self, id: str, sequence: ManifestSequence, value: int):
+        """
+        Add sequence value, to be set when finished
+        """
+        self._sequences[id] = sequence
+        self._sequence_values[id] = value
+
+    async def finish(self):
+        """
+        Wait for all added segments, and then set sequences
+        """
+        for item in self._items.values():
+            item.segments.put_nowait(None)
+        await wait_success(self._tasks)
+
+        await _restore_sequences(
+            conn_factory=self._conn_factory,
+            sequences=self._sequences,
+            read_sequence=self._sequence_values.__getitem__,
+        )
+
+    async def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+
+@dataclasses.dataclass
+class _SegmentRestoreItem:
+    conn_factory: AsyncResourceFactory[asyncpg.Connection]
+    id: str
+    parallelism: int
+    table: ManifestTable
+    deps: typing.List[asyncio.Task] = dataclasses.field(default_factory=list)
+    segments: asyncio.Queue = dataclasses.field(default_factory=asyncio.Queue)
+    """Index, codec and file of segments, and then None"""
+
+    async def __call__(self):
+        await asyncio.gather(*self.deps)
+
+        async def worker():
+            while True:
+                segment = await self.segments.get()
+                if segment is None:
+                    # let other workers finish too
+                    self.segments.put_nowait(None)
+                    break
+                await self._restore_segment(*segment)
+
+        await wait_success(
+            asyncio.create_task(worker()) for _ in range(self.parallelism)
+        )
+
+    async def _restore_segment(self, index: int, codec: Codec, file: typing.BinaryIO):
         async with self.conn_factory() as conn:
-            for i, segment in enumerate(self.table.segments):
-                with self.reader.open_segment(
-                    self.id,
-                    i,
-                ) as file:
-                    await update_data(conn, self.id, self.table, i, segment, file)
+            with codec.open_file_reader(file) as f:
+                await update_data(conn, self.id, self.table, index, f)
 
     def __hash__(self):
         return id(self)
@@ -189,10 +470,9 @@ async def update_data(
     id: str,
     table: ManifestTable,
     index: int,
-    segment: ManifestTableSegment,
     in_: typing.BinaryIO,
 ):
-    logging.log(TRACE, f"Restoring %s rows into table %s", segment.row_count, id)
+    logging.log(TRACE, f"Restoring segment %s into table %s", index + 1, id)
     start = time.perf_counter()
 
     async def source():
@@ -202,7 +482,7 @@ async def update_data(
                 break
             yield bytes
 
-    await conn.copy_to_table(
+    status = await conn.copy_to_table(
         table.name,
         source=source(),
         schema_name=table.schema,
@@ -211,7 +491,7 @@ async def update_data(
     end = time.perf_counter()
     logging.debug(
         f"Restored %s rows in table %s (%.3fs)",
-        segment.row_count,
+        status.split()[-1],
         id,
         end - start,
     )
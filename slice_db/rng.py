@@ -0,0 +1,139 @@
+"""
+Deterministic random choices, derived from values and a pepper
+"""
+
+import hashlib
+import random
+import typing
+
+T = typing.TypeVar("T")
+
+_BLAKE2B_KEY_SIZE = 64
+
+
+def bytes_hash_int(input: bytes) -> int:
+    b = hashlib.md5(input).digest()
+    return int.from_bytes(b[0:8], "big")
+
+
+class Random(typing.Protocol):
+    def choice(self, seq: typing.Sequence[T]) -> T:
+        pass
+
+    def randint(self, a: int, b: int) -> int:
+        pass
+
+    def randrange(self, n: int) -> int:
+        pass
+
+
+class RandomEngine(typing.Protocol):
+    """
+    Source of random draws, determined by value and pepper
+
+    Not thread-safe. Draws of a returned generator are valid until the next
+    call.
+    """
+
+    def random(self, data: bytes) -> Random:
+        """
+        Generator determined by data
+        """
+        pass
+
+    def choice(self, data: bytes, seq: typing.Sequence[T]) -> T:
+        """
+        Element determined by data
+        """
+        pass
+
+
+class Md5RandomEngine(RandomEngine):
+    """
+    Version 1: MD5 of data and pepper seeds a Mersenne Twister
+    """
+
+    def __init__(self, pepper: bytes):
+        self._pepper = pepper
+        self._random = random.Random()
+
+    def random(self, data: bytes) -> Random:
+        # same state as a new random.Random, without allocating one
+        self._random.seed(bytes_hash_int(data + self._pepper))
+        return self._random
+
+    def choice(self, data: bytes, seq: typing.Sequence[T]) -> T:
+        return self.random(data).choice(seq)
+
+
+class Blake2RandomEngine(RandomEngine):
+    """
+    Version 2: BLAKE2b of data, keyed by pepper, yields draws directly
+    """
+
+    def __init__(self, pepper: bytes):
+        if _BLAKE2B_KEY_SIZE < len(pepper):
+            pepper = hashlib.blake2b(pepper).digest()
+        self._key = pepper
+
+    def random(self, data: bytes) -> Random:
+        return _Blake2Random(self._key, data)
+
+    def choice(self, data: bytes, seq: typing.Sequence[T]) -> T:
+        b = hashlib.blake2b(data, digest_size=8, key=self._key).digest()
+        return seq[_scale(int.from_bytes(b, "big"), len(seq))]
+
+
+class _Blake2Random(Random):
+    """
+    Stream of 64-bit draws, from successive salted digests
+    """
+
+    def __init__(self, key: bytes, data: bytes):
+        self._block = 0
+        self._data = data
+        self._digest = hashlib.blake2b(data, key=key).digest()
+        self._key = key
+        self._offset = 0
+
+    def _next(self) -> int:
+        if self._offset == len(self._digest):
+            self._block += 1
+            self._digest = hashlib.blake2b(
+                self._data, key=self._key, salt=self._block.to_bytes(16, "big")
+            ).digest()
+            self._offset = 0
+        n = int.from_bytes(self._digest[self._offset : self._offset + 8], "big")
+        self._offset += 8
+        return n
+
+    def choice(self, seq: typing.Sequence[T]) -> T:
+        return seq[self.randrange(len(seq))]
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self.randrange(b - a + 1)
+
+    def randrange(self, n: int) -> int:
+        return _scale(self._next(), n)
+
+
+def _scale(n: int, size: int) -> int:
+    """
+    Scale 64-bit integer to [0, size)
+    """
+    return (n * size) >> 64
+
+
+ENGINES: typing.Dict[int, typing.Callable[[bytes], RandomEngine]] = {
+    1: Md5RandomEngine,
+    2: Blake2RandomEngine,
+}
+"""Random engines, by transform config version"""
+
+
+def random_engine(version: int, pepper: bytes) -> RandomEngine:
+    try:
+        engine = ENGINES[version]
+    except KeyError:
+        raise Exception(f"Unknown transform version {version}")
+    return engine(pepper)
@@ -0,0 +1,183 @@
+"""
+Read rows of slices, without restoring them
+"""
+
+import contextlib
+import datetime
+import decimal
+import json
+import os
+import re
+import typing
+
+from .formats.manifest import MANIFEST_DATA_JSON_FORMAT, Manifest
+from .pg.copy import COPY_FORMAT, Field
+from .slice import (
+    SliceDirectoryReader,
+    SliceReader,
+    SliceStreamFileReader,
+    is_slice_stream,
+)
+
+_CHUNK_SIZE = 1024 * 64
+
+Decoder = typing.Callable[[str], typing.Any]
+
+
+def _decode_bool(text: str) -> bool:
+    return text == "t"
+
+
+def _decode_bytea(text: str) -> bytes:
+    return bytes.fromhex(text[2:])
+
+
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _iso_fraction(text: str) -> str:
+    # PostgreSQL trims fractional seconds, e.g. .5
+    return _FRACTION.sub(lambda m: "." + m.group(1).ljust(6, "0"), text, 1)
+
+
+def _decode_time(text: str) -> datetime.time:
+    return datetime.time.fromisoformat(_iso_fraction(text))
+
+
+def _decode_timestamp(text: str) -> datetime.datetime:
+    text = _iso_fraction(text)
+    # PostgreSQL abbreviates offsets, e.g. +00
+    if text[-3] in "+-":
+        text += ":00"
+    return datetime.datetime.fromisoformat(text)
+
+
+DECODERS: typing.Dict[str, Decoder] = {
+    "bool": _decode_bool,
+    "bytea": _decode_bytea,
+    "date": datetime.date.fromisoformat,
+    "float4": float,
+    "float8": float,
+    "int2": int,
+    "int4": int,
+    "int8": int,
+    "json": json.loads,
+    "jsonb": json.loads,
+    "numeric": decimal.Decimal,
+    "text": str,
+    "time": _decode_time,
+    "timestamp": _decode_timestamp,
+    "timestamptz": _decode_timestamp,
+}
+"""Decoders of PostgreSQL types, by type name"""
+
+
+class RowReader:
+    """
+    Read rows of slice tables, one segment at a time, so that memory is
+    bounded by the longest row
+    """
+
+    def __init__(self, reader):
+        """
+        reader: SliceReader, SliceDirectoryReader, or SliceStreamFileReader
+        """
+        self._reader = reader
+        self.manifest: Manifest = MANIFEST_DATA_JSON_FORMAT.load(reader.open_manifest)
+
+    def rows(
+        self,
+        table_id: str,
+        columns: typing.Optional[typing.List[str]] = None,
+        types: typing.Optional[typing.Dict[str, typing.Union[str, Decoder]]] = None,
+    ) -> typing.Iterator[typing.Tuple[typing.Any, ...]]:
+        """
+        Iterate rows of table, as tuples of fields
+
+        columns: Columns to include, in order. Defaults to all columns.
+        types: PostgreSQL type name or decoder of columns. Fields of other
+        columns are strings. NULL is always None.
+        """
+        try:
+            table = self.manifest.tables[table_id]
+        except KeyError:
+            raise Exception(f"Slice has no table {table_id}")
+        if columns is None:
+            columns = table.columns
+        indices = []
+        for column in columns:
+            try:
+                indices.append(table.columns.index(column))
+            except ValueError:
+                raise Exception(f"Table {table_id} has no column {column}")
+        decoders = [_decoder((types or {}).get(column)) for column in columns]
+        fields = list(zip(indices, decoders))
+
+        for i, segment in enumerate(table.segments):
+            with self._reader.open_segment(table_id, i, segment.codec) as f:
+                for line in _read_lines(f):
+                    row = COPY_FORMAT.parse_raw_row(line)
+                    yield tuple(
+                        _decode(decoder, COPY_FORMAT.parse_field(row[index]))
+                        for index, decoder in fields
+                    )
+
+
+def _decoder(type: typing.Union[None, str, Decoder]) -> typing.Optional[Decoder]:
+    if type is None or callable(type):
+        return type
+    try:
+        return DECODERS[type]
+    except KeyError:
+        raise Exception(f"No decoder for type {type}")
+
+
+def _decode(decoder: typing.Optional[Decoder], field: Field):
+    if field is None or decoder is None:
+        return field
+    return decoder(field)
+
+
+def _read_lines(file: typing.BinaryIO) -> typing.Iterator[str]:
+    """
+    Iterate lines of COPY text, whose escaped fields never contain newlines
+    """
+    pending = []
+    while True:
+        chunk = file.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        pending.append(chunk)
+        if b"\n" not in chunk:
+            continue
+        lines = b"".join(pending).split(b"\n")
+        pending = [lines.pop()]
+        for line in lines:
+            yield line.decode("utf-8")
+    if any(pending):
+        raise Exception("Segment ends without newline")
+
+
+@contextlib.contextmanager
+def open_row_reader(path: str) -> typing.Iterator[RowReader]:
+    """
+    Open slice, slice directory, or slice stream for reading rows
+
+    Streams are read through their index, so they must be seekable files.
+    """
+    if os.path.isdir(path):
+        with SliceDirectoryReader(path) as reader:
+            yield RowReader(reader)
+        return
+
+    with open(path, "rb") as file:
+        if not is_slice_stream(file):
+            with SliceReader(file) as reader:
+                yield RowReader(reader)
+        elif not file.seekable():
+            raise Exception(
+                f"Slice stream {path} is not seekable, repack it to a file first"
+            )
+        else:
+            with SliceStreamFileReader(file) as reader:
+                yield RowReader(reader)
@@ -3,11 +3,40 @@ Slice definitions
 """
 
 import codecs
+import contextlib
+import dataclasses
+import enum
+import functools
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
 import typing
 import zipfile
+import zlib
+
+from .codec import (
+    DEFAULT_CODEC,
+    Codec,
+    CompressedWriter,
+    Compressor,
+    DeflateCodec,
+    NoneCodec,
+    get_codec,
+)
+from .resource import ResourceFactory
 
 _MANIFEST_PATH = "manifest.json"
 
+_SPOOL_SIZE = 1024 * 1024 * 8
+
+_CHUNK_SIZE = 1024 * 64
+
 
 _UTF8_READER: codecs.StreamWriter = codecs.getreader("utf-8")
 
@@ -15,6 +44,23 @@ _UTF8_READER: codecs.StreamWriter = codecs.getreader("utf-8")
 _UTF8_WRITER: codecs.StreamWriter = codecs.getwriter("utf-8")
 
 
+def checksum_hash():
+    """
+    Create hash for checksum of uncompressed member data
+    """
+    return hashlib.blake2b(digest_size=16)
+
+
+@dataclasses.dataclass
+class MemberStats:
+    checksum: str
+    """BLAKE2b-128 of uncompressed data, as hex"""
+    compressed_size: int
+    """Compressed size in bytes"""
+    size: int
+    """Uncompressed size in bytes"""
+
+
 def _schema_path(section: str, index: int):
     return f"{section}/{index + 1}.sql"
 
@@ -53,12 +99,14 @@ class SliceReader:
         return self._zip.open(_schema_path(section, index))
 
     def open_segment(
-        self, table_id: str, index: int
+        self, table_id: str, index: int, codec: str = DEFAULT_CODEC
     ) -> typing.ContextManager[typing.BinaryIO]:
         """
         Open segment
         """
-        return self._zip.open(_segment_path(table_id, index))
+        codec = get_codec(codec)
+        file = self._zip.open(_segment_path(table_id, index) + codec.suffix)
+        return codec.open_reader(file)
 
     def read_sequence(self, id: str):
         with self._zip.open(_sequence_path(id), "r") as f:
@@ -66,14 +114,113 @@ class SliceReader:
             return int(f.read())
 
 
+class SliceMember:
+    """
+    Member compressed independently of the slice, so that many can be
+    compressed concurrently
+    """
+
+    def __init__(self, path: str, codec: Codec, standalone: bool = False):
+        """
+        standalone: compress as a file, rather than as zip member data
+        """
+        self.path = path + (codec.file_suffix if standalone else codec.suffix)
+        self.codec = codec
+        self.standalone = standalone
+        self.compress_size = 0
+        self.compress_type = codec.zip_compression
+        self.crc = 0
+        """CRC of zip member data"""
+        self.size = 0
+        """Uncompressed size"""
+        self._checksum = checksum_hash()
+        self._checksum_hex = None
+        self._compressor = codec.file_compressor() if standalone else codec.compressor()
+        self._file = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._file.close()
+
+    @property
+    def file_size(self):
+        """
+        Size of zip member data
+        """
+        if self.compress_type == zipfile.ZIP_STORED:
+            return self.compress_size
+        return self.size
+
+    def _write_compressed(self, data: bytes):
+        if self.compress_type == zipfile.ZIP_STORED:
+            self.crc = zlib.crc32(data, self.crc)
+        self.compress_size += len(data)
+        self._file.write(data)
+
+    def write(self, data: bytes):
+        if self.compress_type != zipfile.ZIP_STORED:
+            self.crc = zlib.crc32(data, self.crc)
+        self._checksum.update(data)
+        self.size += len(data)
+        self._write_compressed(self._compressor.compress(data))
+
+    def finish(self):
+        """
+        Finish compression
+        """
+        self._write_compressed(self._compressor.flush())
+        self._file.seek(0)
+
+    def write_precompressed(
+        self, file: typing.BinaryIO, size: int, checksum: str, crc: int
+    ):
+        """
+        Add data that is already compressed, e.g. from a segment cache, and
+        finish
+
+        crc: CRC of uncompressed data
+        """
+        if self.compress_type != zipfile.ZIP_STORED:
+            self.crc = crc
+        self.size = size
+        self._checksum_hex = checksum
+        while True:
+            data = file.read(_CHUNK_SIZE)
+            if not data:
+                break
+            self._write_compressed(data)
+        self._file.seek(0)
+
+    def copy_compressed(self, out: typing.BinaryIO):
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, out)
+
+    def stats(self) -> MemberStats:
+        return MemberStats(
+            checksum=self._checksum_hex or self._checksum.hexdigest(),
+            compressed_size=self.compress_size,
+            size=self.size,
+        )
+
+
 class SliceWriter:
     """
     Write slice
     """
 
-    def __init__(self, file: typing.BinaryIO):
+    def __init__(self, file: typing.BinaryIO, codec: Codec = DeflateCodec()):
+        self._codec = codec
         self._zip = zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED)
 
+    @property
+    def codec(self) -> Codec:
+        """
+        Codec of segments
+        """
+        return self._codec
+
     def __enter__(self, *args, **kwargs):
         self._zip.__enter__(*args, **kwargs)
         return self
@@ -99,7 +246,600 @@ class SliceWriter:
         """
         return self._zip.open(_segment_path(table_id, index), "w", force_zip64=True)
 
+    def schema_member(self, section: str, index: int) -> SliceMember:
+        """
+        Create schema member, to be added with write_member
+        """
+        return SliceMember(_schema_path(section, index), DeflateCodec())
+
+    def segment_member(self, table_id: str, index: int) -> SliceMember:
+        """
+        Create segment member, to be added with write_member
+        """
+        return SliceMember(_segment_path(table_id, index), self._codec)
+
+    def write_member(self, member: SliceMember):
+        """
+        Add finished member, copying the already compressed data
+        """
+        zinfo = zipfile.ZipInfo(member.path, time.localtime(time.time())[:6])
+        zinfo.compress_type = member.compress_type
+        zinfo.external_attr = 0o600 << 16
+        zinfo.compress_size = member.compress_size
+        zinfo.CRC = member.crc
+        zinfo.file_size = member.file_size
+
+        # zipfile has no API for adding compressed data, so this follows
+        # ZipFile.open and _ZipWriteFile.close, with sizes known up front
+        zip = self._zip
+        with zip._lock:
+            if zip._seekable:
+                zip.fp.seek(zip.start_dir)
+            zinfo.header_offset = zip.fp.tell()
+            zip._writecheck(zinfo)
+            zip._didModify = True
+            zip.fp.write(zinfo.FileHeader())
+            member.copy_compressed(zip.fp)
+            zip.filelist.append(zinfo)
+            zip.NameToInfo[zinfo.filename] = zinfo
+            zip.start_dir = zip.fp.tell()
+
     def write_sequence(self, id: str, value: int):
         with self._zip.open(_sequence_path(id), "w") as f:
             writer = _UTF8_WRITER(f)
             writer.write(str(value))
+
+
+class SliceDirectoryReader:
+    """
+    Read slice from directory, one file per member
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _open(self, path: str) -> typing.BinaryIO:
+        return open(os.path.join(self._path, path), "rb")
+
+    def open_manifest(self) -> typing.ContextManager[typing.TextIO]:
+        """
+        Open manifest
+        """
+        return _UTF8_READER(self._open(_MANIFEST_PATH))
+
+    def open_schema(self, section: str, index: int):
+        return self._open(_schema_path(section, index))
+
+    def open_segment(
+        self, table_id: str, index: int, codec: str = DEFAULT_CODEC
+    ) -> typing.ContextManager[typing.BinaryIO]:
+        """
+        Open segment
+        """
+        codec = get_codec(codec)
+        file = self._open(_segment_path(table_id, index) + codec.file_suffix)
+        return codec.open_file_reader(file)
+
+    def read_sequence(self, id: str):
+        with self._open(_sequence_path(id)) as f:
+            return int(f.read())
+
+
+class _DirectoryMember(CompressedWriter):
+    def __init__(self, file: typing.BinaryIO, compressor: Compressor):
+        super().__init__(file, compressor)
+        self._checksum = checksum_hash()
+
+    def write(self, data: bytes):
+        self._checksum.update(data)
+        super().write(data)
+
+    def stats(self) -> MemberStats:
+        return MemberStats(
+            checksum=self._checksum.hexdigest(),
+            compressed_size=self.compress_size,
+            size=self.size,
+        )
+
+
+class SliceDirectoryWriter:
+    """
+    Write slice to directory, one file per member
+
+    Files are independent, so they may be written concurrently.
+    """
+
+    def __init__(self, path: str, codec: Codec = DeflateCodec()):
+        self._codec = codec
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def codec(self) -> Codec:
+        """
+        Codec of segments
+        """
+        return self._codec
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _open(self, path: str) -> typing.BinaryIO:
+        path = os.path.join(self._path, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+    def open_manifest(self) -> typing.ContextManager[typing.TextIO]:
+        """
+        Open manifest
+        """
+        return _UTF8_WRITER(self._open(_MANIFEST_PATH))
+
+    def open_schema(self, section: str, index: int) -> _DirectoryMember:
+        """
+        Open schema statement
+        """
+        file = self._open(_schema_path(section, index))
+        return _DirectoryMember(file, NoneCodec().file_compressor())
+
+    def segment_path(self, table_id: str, index: int) -> str:
+        """
+        Path of segment file
+        """
+        return os.path.join(
+            self._path, _segment_path(table_id, index) + self._codec.file_suffix
+        )
+
+    def open_segment(self, table_id: str, index: int) -> _DirectoryMember:
+        """
+        Open segment
+        """
+        file = self._open(_segment_path(table_id, index) + self._codec.file_suffix)
+        return _DirectoryMember(file, self._codec.file_compressor())
+
+    def link_segment(self, table_id: str, index: int, source: str):
+        """
+        Add segment from existing compressed file, linking it if possible
+        """
+        path = self.segment_path(table_id, index)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+
+    def write_sequence(self, id: str, value: int):
+        with self._open(_sequence_path(id)) as f:
+            f.write(str(value).encode("utf-8"))
+
+
+@contextlib.contextmanager
+def open_slice_reader(
+    input: ResourceFactory[typing.BinaryIO], input_directory: typing.Optional[str]
+):
+    """
+    Open reader for slice directory, stream, or ZIP archive
+    """
+    if input_directory is not None:
+        with SliceDirectoryReader(input_directory) as reader:
+            yield reader
+        return
+
+    with input() as file:
+        if is_slice_stream(file):
+            with SliceStreamReader(file) as reader:
+                yield reader
+        else:
+            with SliceReader(file) as reader:
+                yield reader
+
+
+_STREAM_MAGIC = b"SLICEDB\x01"
+
+_STREAM_FRAME = struct.Struct(">BIQ")
+"""Frame kind, metadata size, data size"""
+
+_STREAM_FOOTER = struct.Struct(">Q8s")
+"""Offset of index frame, magic"""
+
+
+class StreamFrameKind(enum.IntEnum):
+    HEADER = 1
+    """Tables, before any segments"""
+    SCHEMA = 2
+    SEGMENT = 3
+    SEQUENCE = 4
+    MANIFEST = 5
+    """Manifest, after all members"""
+    INDEX = 6
+    """Offsets of all frames"""
+
+
+def is_slice_stream(file: typing.BinaryIO) -> bool:
+    """
+    Whether buffered file is a slice stream, without consuming it
+    """
+    return file.peek(len(_STREAM_MAGIC))[: len(_STREAM_MAGIC)] == _STREAM_MAGIC
+
+
+@dataclasses.dataclass
+class SliceStreamFrame:
+    kind: StreamFrameKind
+    meta: typing.Dict[str, typing.Any]
+    """Metadata, e.g. table and index of segment"""
+    data: typing.BinaryIO
+    """Spooled data"""
+
+    def open_text(self) -> typing.ContextManager[typing.TextIO]:
+        return _UTF8_READER(self.data)
+
+
+class SliceStreamReader:
+    """
+    Read slice stream, frame by frame
+    """
+
+    def __init__(self, file: typing.BinaryIO):
+        self._file = file
+        if self._read(len(_STREAM_MAGIC)) != _STREAM_MAGIC:
+            raise Exception("Input is not a slice stream")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _read(self, size: int) -> bytes:
+        data = self._file.read(size)
+        if len(data) != size:
+            raise Exception("Unexpected end of slice stream")
+        return data
+
+    def read_frame_header(
+        self,
+    ) -> typing.Tuple[StreamFrameKind, typing.Dict[str, typing.Any], int]:
+        """
+        Read kind, metadata, and data size of next frame, whose data must be
+        read next
+        """
+        kind, meta_size, data_size = _STREAM_FRAME.unpack(
+            self._read(_STREAM_FRAME.size)
+        )
+        meta = json.loads(self._read(meta_size))
+        return StreamFrameKind(kind), meta, data_size
+
+    def copy_frame_data(self, size: int, output: typing.Optional[typing.BinaryIO]):
+        """
+        Copy data of frame to output, or skip it if None
+        """
+        while size:
+            chunk = self._read(min(size, _CHUNK_SIZE))
+            if output is not None:
+                output.write(chunk)
+            size -= len(chunk)
+
+    def read_frame(self) -> SliceStreamFrame:
+        """
+        Read next frame, spooling its data
+        """
+        kind, meta, data_size = self.read_frame_header()
+        data = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+        self.copy_frame_data(data_size, data)
+        data.seek(0)
+        return SliceStreamFrame(kind=kind, meta=meta, data=data)
+
+
+def _frame_key(kind: StreamFrameKind, meta: typing.Dict[str, typing.Any]):
+    """
+    Key of member frame, or None for other frames
+    """
+    if kind == StreamFrameKind.MANIFEST:
+        return ("manifest",)
+    if kind == StreamFrameKind.SCHEMA:
+        return ("schema", meta["section"], meta["index"])
+    if kind == StreamFrameKind.SEGMENT:
+        return ("segment", meta["table"], meta["index"])
+    if kind == StreamFrameKind.SEQUENCE:
+        return ("sequence", meta["sequence"], 0)
+    return None
+
+
+class _FrameFile:
+    """
+    Random access to frame data in a file, safe to read from many threads
+    """
+
+    def __init__(
+        self,
+        file: typing.BinaryIO,
+        region: typing.Callable[[typing.Tuple], typing.Tuple[int, int]],
+    ):
+        """
+        region: Offset and size of frame data, by frame key
+        """
+        self._file = file
+        self._lock = threading.Lock()
+        self._region = region
+
+    def _open(self, key) -> typing.BinaryIO:
+        try:
+            offset, size = self._region(key)
+        except KeyError:
+            raise Exception(f"Slice stream has no member {'/'.join(map(str, key))}")
+        return _RegionReader(self._file, self._lock, offset, size)
+
+    def open_manifest(self) -> typing.ContextManager[typing.TextIO]:
+        return _UTF8_READER(self._open(("manifest",)))
+
+    def open_schema(self, section: str, index: int):
+        return self._open(("schema", section, index))
+
+    def open_segment(
+        self, table_id: str, index: int, codec: str = DEFAULT_CODEC
+    ) -> typing.ContextManager[typing.BinaryIO]:
+        """
+        Open segment
+        """
+        return get_codec(codec).open_file_reader(
+            self._open(("segment", table_id, index))
+        )
+
+    def read_sequence(self, id: str):
+        with self._open(("sequence", id, 0)) as f:
+            return int(f.read())
+
+
+class SliceStreamFileReader(_FrameFile):
+    """
+    Random access to a seekable slice stream, through its index, without
+    copying frames
+    """
+
+    def __init__(self, file: typing.BinaryIO):
+        super().__init__(file, self._indexed_region)
+        try:
+            file.seek(-_STREAM_FOOTER.size, os.SEEK_END)
+        except OSError:
+            raise Exception("Slice stream is incomplete")
+        index_offset, magic = _STREAM_FOOTER.unpack(file.read(_STREAM_FOOTER.size))
+        if magic != _STREAM_MAGIC:
+            raise Exception("Slice stream is incomplete")
+        offset, size = self._frame_region(index_offset)
+        file.seek(offset)
+        self._offsets = {}
+        for entry in json.loads(file.read(size)):
+            key = _frame_key(StreamFrameKind[entry["kind"].upper()], entry)
+            if key is not None:
+                self._offsets[key] = entry["offset"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _frame_region(self, offset: int) -> typing.Tuple[int, int]:
+        self._file.seek(offset)
+        _, meta_size, data_size = _STREAM_FRAME.unpack(
+            self._file.read(_STREAM_FRAME.size)
+        )
+        return offset + _STREAM_FRAME.size + meta_size, data_size
+
+    def _indexed_region(self, key) -> typing.Tuple[int, int]:
+        offset = self._offsets[key]
+        with self._lock:
+            return self._frame_region(offset)
+
+
+class SpooledSliceStream(_FrameFile):
+    """
+    Random access to a slice stream that has been read to the end, with the
+    data of its frames spooled to a temporary file on disk
+    """
+
+    def __init__(self, reader: SliceStreamReader):
+        self._regions = {}
+        super().__init__(tempfile.TemporaryFile(), self._regions.__getitem__)
+        try:
+            while ("manifest",) not in self._regions:
+                kind, meta, size = reader.read_frame_header()
+                key = _frame_key(kind, meta)
+                if key is None:
+                    reader.copy_frame_data(size, None)
+                    continue
+                self._regions[key] = (self._file.tell(), size)
+                reader.copy_frame_data(size, self._file)
+            self._file.flush()
+            # drain the index, so that the writer is not cut off
+            _, _, size = reader.read_frame_header()
+            reader.copy_frame_data(size, None)
+        except:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+
+class _RegionReader(io.RawIOBase):
+    """
+    Reader of a region of a shared file, which is left open
+    """
+
+    def __init__(
+        self, file: typing.BinaryIO, lock: threading.Lock, offset: int, size: int
+    ):
+        self._end = offset + size
+        self._file = file
+        self._lock = lock
+        self._position = offset
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._end - self._position)
+        if size <= 0:
+            return 0
+        with self._lock:
+            self._file.seek(self._position)
+            data = self._file.read(size)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class _StreamMember(SliceMember):
+    def __init__(
+        self,
+        path: str,
+        codec: Codec,
+        kind: StreamFrameKind,
+        meta: typing.Dict[str, typing.Any],
+    ):
+        super().__init__(path, codec, standalone=True)
+        self.kind = kind
+        self.meta = meta
+
+
+class _FrameTextWriter(io.StringIO):
+    """
+    Buffer text, and write it as a frame when closed
+    """
+
+    def __init__(self, write: typing.Callable[[bytes], None]):
+        super().__init__()
+        self._write = write
+
+    def close(self):
+        if not self.closed:
+            self._write(self.getvalue().encode("utf-8"))
+        super().close()
+
+
+class SliceStreamWriter:
+    """
+    Write slice as a stream of self-delimiting frames, which can be read
+    without seeking
+
+    The header lists tables, so that a reader can start restoring while
+    members are still arriving. The manifest, an index of frame offsets,
+    and a footer locating that index come last.
+    """
+
+    def __init__(self, file: typing.BinaryIO, codec: Codec = DeflateCodec()):
+        self._codec = codec
+        self._file = file
+        self._index = []
+        self._offset = 0
+        self._write(_STREAM_MAGIC)
+
+    @property
+    def codec(self) -> Codec:
+        """
+        Codec of segments
+        """
+        return self._codec
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._offset += len(data)
+
+    def _write_frame(
+        self,
+        kind: StreamFrameKind,
+        meta: typing.Dict[str, typing.Any],
+        size: int,
+        copy: typing.Callable[[typing.BinaryIO], None],
+    ):
+        self._index.append({"kind": kind.name.lower(), "offset": self._offset, **meta})
+        meta_data = json.dumps(meta, sort_keys=True).encode("utf-8")
+        self._write(_STREAM_FRAME.pack(kind, len(meta_data), size))
+        self._write(meta_data)
+        copy(self._file)
+        self._offset += size
+
+    def _write_data_frame(
+        self, kind: StreamFrameKind, meta: typing.Dict[str, typing.Any], data: bytes
+    ):
+        self._write_frame(kind, meta, len(data), lambda f: f.write(data))
+
+    def _write_manifest(self, data: bytes):
+        self._write_data_frame(StreamFrameKind.MANIFEST, {}, data)
+        index_offset = self._offset
+        self._write_data_frame(
+            StreamFrameKind.INDEX, {}, json.dumps(self._index).encode("utf-8")
+        )
+        self._write(_STREAM_FOOTER.pack(index_offset, _STREAM_MAGIC))
+        self._file.flush()
+
+    def open_header(self) -> typing.ContextManager[typing.TextIO]:
+        """
+        Open header, which has tables without segments
+        """
+        return _FrameTextWriter(
+            functools.partial(self._write_data_frame, StreamFrameKind.HEADER, {})
+        )
+
+    def open_manifest(self) -> typing.ContextManager[typing.TextIO]:
+        """
+        Open manifest, which finishes the stream
+        """
+        return _FrameTextWriter(self._write_manifest)
+
+    def schema_member(self, section: str, index: int) -> SliceMember:
+        """
+        Create schema member, to be added with write_member
+        """
+        return _StreamMember(
+            _schema_path(section, index),
+            NoneCodec(),
+            StreamFrameKind.SCHEMA,
+            {"index": index, "section": section},
+        )
+
+    def segment_member(self, table_id: str, index: int) -> SliceMember:
+        """
+        Create segment member, to be added with write_member
+        """
+        return _StreamMember(
+            _segment_path(table_id, index),
+            self._codec,
+            StreamFrameKind.SEGMENT,
+            {"codec": self._codec.name, "index": index, "table": table_id},
+        )
+
+    def write_member(self, member: _StreamMember):
+        """
+        Add finished member as a frame
+        """
+        self._write_frame(
+            member.kind, member.meta, member.compress_size, member.copy_compressed
+        )
+
+    def write_sequence(self, id: str, value: int):
+        self._write_data_frame(
+            StreamFrameKind.SEQUENCE, {"sequence": id}, str(value).encode("utf-8")
+        )
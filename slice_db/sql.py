@@ -1,11 +1,35 @@
 import codecs
 import contextlib
+import os
+import shlex
 import typing
 
 from pg_sql import SqlId, SqlNumber, SqlObject, SqlString, sql_list
 
+from .codec import Codec, CompressedWriter
+
 _UTF_8_WRITER = codecs.getwriter("utf-8")
 
+_DECOMPRESS_COMMANDS = {
+    "deflate": "gzip -dc",
+    "lz4": "lz4 -dc",
+    "none": "cat",
+    "zstd": "zstd -dc",
+}
+"""Shell command to decompress file of codec"""
+
+
+def _copy_header(schema: str, table: str, columns: typing.List[str]) -> str:
+    table_sql = SqlObject(SqlId(schema), SqlId(table))
+    columns_sql = sql_list(SqlId(column) for column in columns)
+    return f"COPY {table_sql} ({columns_sql}) FROM stdin;\n"
+
+
+def _setval(schema: str, name: str, value: int) -> str:
+    seq_name = SqlObject(SqlId(schema), SqlId(name))
+    seq_value = SqlNumber(value)
+    return f"SELECT setval({SqlString(str(seq_name))}, {seq_value}) FROM {seq_name} WHERE last_value < {seq_value};\n"
+
 
 class SqlWriter:
     def __init__(self, file):
@@ -25,10 +49,7 @@ class SqlWriter:
 
         text_writer.write(f"--\n-- Data for {id}/{index}\n--\n")
 
-        table_sql = SqlObject(SqlId(schema), SqlId(table))
-        columns_sql = sql_list(SqlId(column) for column in columns)
-        query = f"COPY {table_sql} ({columns_sql}) FROM stdin;\n"
-        text_writer.write(query)
+        text_writer.write(_copy_header(schema, table, columns))
 
         yield self._file
 
@@ -39,9 +60,103 @@ class SqlWriter:
 
         text_writer.write(f"--\n-- Sequence {id}\n--\n")
 
-        seq_name = SqlObject(SqlId(schema), SqlId(name))
-        seq_value = SqlNumber(value)
-        query = f"SELECT setval({SqlString(str(seq_name))}, {seq_value}) FROM {seq_name} WHERE last_value < {seq_value};\n"
-        text_writer.write(query)
+        text_writer.write(_setval(schema, name, value))
 
         text_writer.write("\n")
+
+
+class SqlDirectoryWriter:
+    """
+    Write SQL as a directory of files, that a generated load.sh script runs
+    with psql
+
+    Each segment is a separate compressed file, so data can be written and
+    loaded concurrently.
+    """
+
+    def __init__(self, path: str, codec: Codec):
+        self._codec = codec
+        self._data_paths = []
+        self._path = path
+        self._sections = set()
+        self._sequences = []
+
+    def __enter__(self):
+        os.makedirs(os.path.join(self._path, "data"), exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def _open_section(self, section: str):
+        self._sections.add(section)
+        return open(os.path.join(self._path, f"{section}.sql"), "wb")
+
+    def open_predata(self):
+        return self._open_section("pre-data")
+
+    def open_postdata(self):
+        return self._open_section("post-data")
+
+    def open_data(
+        self, id: str, index: int, schema: str, table: str, columns: typing.List[str]
+    ) -> CompressedWriter:
+        """
+        Open data file, which must be closed
+        """
+        directory = os.path.join("data", id)
+        os.makedirs(os.path.join(self._path, directory), exist_ok=True)
+        path = os.path.join(directory, f"{index}.sql{self._codec.file_suffix}")
+        self._data_paths.append(path)
+        writer = _DataWriter(
+            open(os.path.join(self._path, path), "wb"), self._codec.file_compressor()
+        )
+        writer.write(_copy_header(schema, table, columns).encode())
+        return writer
+
+    def write_sequence(self, id: str, schema: str, name: str, value: int):
+        self._sequences.append(_setval(schema, name, value))
+
+    def close(self):
+        """
+        Write sequences and loader
+        """
+        with open(os.path.join(self._path, "sequences.sql"), "w") as f:
+            f.writelines(self._sequences)
+
+        psql = "psql -X -q -v ON_ERROR_STOP=1"
+        decompress = _DECOMPRESS_COMMANDS[self._codec.name]
+        lines = [
+            "#!/bin/sh",
+            "# Generated by slicedb. Set JOBS to the number of concurrent psql sessions.",
+            "set -e",
+            'cd "$(dirname "$0")"',
+            'JOBS="${JOBS:-4}"',
+        ]
+        if "pre-data" in self._sections:
+            lines.append(f"{psql} -f pre-data.sql")
+        # commit only if the whole file decompressed, and fail otherwise
+        load = f'{{ echo "BEGIN;" && {decompress} "$0" && echo "COMMIT;"; }} | {psql}'
+        lines.append(f"xargs -n 1 -P \"$JOBS\" bash -o pipefail -c '{load}' <<'EOF'")
+        lines.extend(shlex.quote(path) for path in sorted(self._data_paths))
+        lines.append("EOF")
+        lines.append(f"{psql} -f sequences.sql")
+        if "post-data" in self._sections:
+            lines.append(f"{psql} -f post-data.sql")
+
+        path = os.path.join(self._path, "load.sh")
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.chmod(path, 0o755)
+
+
+class _DataWriter(CompressedWriter):
+    """
+    Compressed COPY data, terminated when closed
+    """
+
+    def close(self):
+        if not self._file.closed:
+            self.write(b"\\.\n")
+        super().close()
@@ -1,12 +1,25 @@
 from __future__ import annotations
 
-import codecs
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import functools
 import importlib
+import io
+import itertools
+import logging
+import multiprocessing
+import shutil
 import typing
 
+from pg_sql import SqlId
+
 from .collection.dict import groups
+from .concurrent.stream import AsyncWrite
 from .formats.transform import TransformInstance, TransformTable
 from .pg.copy import COPY_FORMAT
+from .rng import RandomEngine, random_engine
 
 
 class Transform(typing.Protocol):
@@ -17,13 +30,83 @@ class Transform(typing.Protocol):
 
 
 class Transformer(typing.Protocol):
+    cacheable: bool = False
+    """Whether output depends only on input, so that it may be cached"""
+
     def transform(self, text: typing.Optional[str]):
         pass
 
 
+class SqlTransformer(Transformer, typing.Protocol):
+    """
+    Transformer that may also be expressed in SQL, so that the database applies
+    it while dumping
+    """
+
+    def sql(self, expression: str, type: str) -> typing.Optional[str]:
+        """
+        SQL text expression of the transform of expression, whose type has the
+        given name, or None if it cannot be expressed. Must match transform of
+        the COPY text of each value, including raising where it raises.
+        """
+        pass
+
+
+class BatchTransformer(Transformer, typing.Protocol):
+    """
+    Transformer that may also transform many values at once
+    """
+
+    def transform_batch(
+        self, values: typing.List[typing.Optional[str]]
+    ) -> typing.List[typing.Optional[str]]:
+        """
+        Transform values, in order. Must match transform of each value.
+        """
+        pass
+
+
+def transform_batch(
+    transformer: Transformer, values: typing.List[typing.Optional[str]]
+) -> typing.List[typing.Optional[str]]:
+    """
+    Transform values, using transform_batch if the transformer has it
+    """
+    try:
+        fn = transformer.transform_batch
+    except AttributeError:
+        return [transformer.transform(value) for value in values]
+    return fn(values)
+
+
+def transform_sql(
+    transformer: Transformer, expression: str, type: str
+) -> typing.Optional[str]:
+    """
+    SQL text expression of transform, if the transformer has one
+    """
+    try:
+        fn = transformer.sql
+    except AttributeError:
+        return None
+    return fn(expression, type)
+
+
 class TransformContext:
-    def __init__(self, transformers: typing.Dict[str, Transformer]):
+    def __init__(self, transformers: typing.Dict[str, Transformer], version: int = 1):
         self._transformers = transformers
+        self._version = version
+
+    @property
+    def version(self) -> int:
+        """Version of transform config"""
+        return self._version
+
+    def random_engine(self, pepper: bytes) -> RandomEngine:
+        """
+        Source of deterministic draws, for the version of transform config
+        """
+        return random_engine(self._version, pepper)
 
     def get_transform(self, name: str) -> Transformer:
         try:
@@ -45,10 +128,6 @@ class TransformerProvider:
         return transform.create(context, pepper, instance.config)
 
 
-_UTF8_READ = codecs.getreader("utf-8")
-_UTF8_WRITE = codecs.getwriter("utf-8")
-
-
 class DeferredTransformer(Transformer):
     def __init__(self):
         self._transformer = None
@@ -61,23 +140,144 @@ class DeferredTransformer(Transformer):
             raise Exception("Transformer not initialized")
         return self._transformer.transform(text)
 
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        if self._transformer is None:
+            raise Exception("Transformer not initialized")
+        return transform_batch(self._transformer, values)
+
+    def sql(self, expression: str, type: str):
+        if self._transformer is None:
+            raise Exception("Transformer not initialized")
+        return transform_sql(self._transformer, expression, type)
+
+
+DEFAULT_CACHE_SIZE = 65536
+"""Default number of cached values, per transform"""
+
+
+class CachedTransformer(Transformer):
+    """
+    Least-recently-used cache of a deterministic transformer
+    """
+
+    def __init__(self, transformer: Transformer, size: int):
+        self._cache = collections.OrderedDict()
+        self._size = size
+        self._transformer = transformer
+        self.hits = 0
+        self.misses = 0
+
+    def transform(self, text: typing.Optional[str]):
+        try:
+            result = self._cache[text]
+        except KeyError:
+            self.misses += 1
+            result = self._transformer.transform(text)
+            self._add(text, result)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(text)
+        return result
+
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        cache = self._cache
+        missing = {}
+        for value in values:
+            if value in cache:
+                self.hits += 1
+                cache.move_to_end(value)
+            elif value in missing:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing[value] = None
+        if missing:
+            keys = list(missing.keys())
+            missing.update(zip(keys, transform_batch(self._transformer, keys)))
+        results = [
+            missing[value] if value in missing else cache[value] for value in values
+        ]
+        for value, result in missing.items():
+            self._add(value, result)
+        return results
+
+    def sql(self, expression: str, type: str):
+        return transform_sql(self._transformer, expression, type)
+
+    def _add(self, text: typing.Optional[str], result: typing.Optional[str]):
+        self._cache[text] = result
+        if self._size < len(self._cache):
+            self._cache.popitem(last=False)
+
 
 class Transforms:
-    def __init__(self, transforms: typing.Dict[str, TransformInstance], pepper: bytes):
+    def __init__(
+        self,
+        transforms: typing.Dict[str, TransformInstance],
+        pepper: bytes,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        version: int = 1,
+    ):
+        """
+        cache_size: Number of values to cache, for transformers that declare
+        themselves cacheable. Zero disables caching.
+        version: Version of transform config, which selects the random engine
+        """
         deferred = {name: DeferredTransformer() for name in transforms.keys()}
-        context = TransformContext(deferred)
+        context = TransformContext(deferred, version)
 
         provider = TransformerProvider(pepper)
         self._transforms = {
             name: provider.create(name, context, instance)
             for name, instance in transforms.items()
         }
+        if cache_size:
+            for name, transformer in self._transforms.items():
+                if getattr(transformer, "cacheable", False):
+                    self._transforms[name] = CachedTransformer(transformer, cache_size)
         for name, transformer in self._transforms.items():
             deferred[name].init(transformer)
 
+    def take_cache_stats(self) -> typing.Dict[str, typing.Tuple[int, int]]:
+        """
+        Cache hits and misses of cached transforms since the last call
+        """
+        stats = {}
+        for name, transformer in self._transforms.items():
+            if isinstance(transformer, CachedTransformer) and (
+                transformer.hits or transformer.misses
+            ):
+                stats[name] = (transformer.hits, transformer.misses)
+                transformer.hits = 0
+                transformer.misses = 0
+        return stats
+
     def field(self, name: str):
         return TransformContext(self._transforms).get_transform(name)
 
+    def table_sql(
+        self,
+        transform_columns: typing.Dict[str, str],
+        columns: typing.List[str],
+        types: typing.List[str],
+    ) -> typing.Optional[typing.List[str]]:
+        """
+        SQL expressions that select transformed columns, or None if any
+        transform cannot be expressed in SQL
+
+        types: Type names of columns
+        """
+        expressions = [str(SqlId(column)) for column in columns]
+        for name, transform in transform_columns.items():
+            index = columns.index(name)
+            expression = transform_sql(
+                self._transforms[transform], expressions[index], types[index]
+            )
+            if expression is None:
+                return None
+            expressions[index] = expression
+        return expressions
+
     def table(
         self,
         transform_columns: typing.Dict[str, TransformColumn],
@@ -98,23 +298,107 @@ class _Field:
         self._index = index
         self._transform = transform
 
-    def apply(self, row):
-        field = COPY_FORMAT.parse_field(row[self._index])
-        field = self._transform.transform(field)
-        row[self._index] = COPY_FORMAT.serialize_field(field)
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def transform(self) -> Transformer:
+        return self._transform
+
+
+_BATCH_ROWS = 1024
+"""Rows transformed together"""
+
+
+def _compile_rows(
+    fields: typing.List[_Field], maxsplit: int, binary: bool
+) -> typing.Callable[[typing.List[typing.AnyStr]], typing.AnyStr]:
+    """
+    Generate function that transforms a batch of lines of the table
+
+    Field indices are inlined, as are the common cases of parsing and
+    serializing, and all transformed fields of a row are assigned in one loop.
+    """
+    namespace = {
+        "parse": COPY_FORMAT.parse_field,
+        "serialize": COPY_FORMAT.serialize_field,
+    }
+    lines = ["def transform_rows(lines):"]
+    tab = b"\t" if binary else "\t"
+    lines.append(f"    rows = [line[:-1].split({tab!r}, {maxsplit}) for line in lines]")
+    assignments = []
+    for n, field in enumerate(fields):
+        namespace[f"batch_{n}"] = getattr(
+            field.transform, "transform_batch", None
+        ) or functools.partial(transform_batch, field.transform)
+        field_expr = f"row[{field.index}]"
+        field_values = f"{field_expr}.decode()" if binary else field_expr
+        parse = (
+            f"value if '\\\\' not in value else parse(value)"
+            f" for value in [{field_values} for row in rows]"
+        )
+        lines.append(f"    values_{n} = batch_{n}([{parse}])")
+        value = f"value_{n}"
+        serialize = (
+            f"{value} if {value} is not None and '\\\\' not in {value}"
+            f" and {value}.isprintable() else serialize({value})"
+        )
+        if binary:
+            serialize = f"({serialize}).encode()"
+        assignments.append(f"        {field_expr} = {serialize}")
+    names = "".join(f", value_{n}" for n in range(len(fields)))
+    values = "".join(f", values_{n}" for n in range(len(fields)))
+    lines.append(f"    for row{names} in zip(rows{values}):")
+    lines.extend(assignments)
+    newline = b"\n" if binary else "\n"
+    lines.append(
+        f"    return {newline!r}.join([{tab!r}.join(row) for row in rows]) + {newline!r}"
+    )
+    exec("\n".join(lines), namespace)
+    return namespace["transform_rows"]
 
 
 class TableTransformer:
+    """
+    Transform COPY text of table
+
+    Rows are split only up to the last transformed column, and the remainder is
+    copied through. The rows are transformed by functions generated for the
+    transformed columns.
+    """
+
     def __init__(self, fields: typing.List[_Field]):
         self._fields = fields
+        self._maxsplit = max((field.index + 1 for field in fields), default=0)
+        if fields:
+            self._transform_rows = _compile_rows(fields, self._maxsplit, False)
+            self._transform_rows_bytes = _compile_rows(fields, self._maxsplit, True)
 
     def transform(self, input: typing.TextIO, output: typing.TextIO):
-        for line in input:
-            row = COPY_FORMAT.parse_raw_row(line[:-1])
-            for field in self._fields:
-                field.apply(row)
-            output.write(COPY_FORMAT.serialize_raw_row(row))
-            output.write("\n")
+        if not self._fields:
+            shutil.copyfileobj(input, output)
+            return
+        transform_rows = self._transform_rows
+        while True:
+            lines = list(itertools.islice(input, _BATCH_ROWS))
+            if not lines:
+                break
+            output.write(transform_rows(lines))
+
+    def transform_bytes(self, input: typing.BinaryIO, output: typing.BinaryIO):
+        """
+        Transform UTF-8 COPY text, decoding only transformed fields
+        """
+        if not self._fields:
+            shutil.copyfileobj(input, output)
+            return
+        transform_rows = self._transform_rows_bytes
+        while True:
+            lines = list(itertools.islice(input, _BATCH_ROWS))
+            if not lines:
+                break
+            output.write(transform_rows(lines))
 
     @staticmethod
     def transform_binary(
@@ -122,4 +406,175 @@ class TableTransformer:
         input: typing.BinaryIO,
         output: typing.BinaryIO,
     ):
-        transformer.transform(_UTF8_READ(input), _UTF8_WRITE(output))
+        transformer.transform_bytes(input, output)
+
+
+_worker_error: typing.Optional[BaseException] = None
+_worker_transformers: typing.Dict[str, TableTransformer] = {}
+_worker_transforms: typing.Optional[Transforms] = None
+
+
+def _init_worker(
+    transforms: typing.Dict[str, TransformInstance],
+    pepper: bytes,
+    tables: typing.Dict[str, typing.Tuple[typing.Dict[str, str], typing.List[str]]],
+    cache_size: int,
+    version: int,
+):
+    global _worker_error, _worker_transforms
+    try:
+        _worker_transforms = Transforms(transforms, pepper, cache_size, version)
+        for id, (transform_columns, columns) in tables.items():
+            _worker_transformers[id] = _worker_transforms.table(
+                transform_columns, columns
+            )
+    except BaseException as e:
+        # raise in tasks, rather than breaking the pool
+        _worker_error = e
+
+
+def _transform_chunk(
+    table_id: str, data: bytes
+) -> typing.Tuple[bytes, typing.Dict[str, typing.Tuple[int, int]]]:
+    if _worker_error is not None:
+        raise _worker_error
+    output = io.BytesIO()
+    _worker_transformers[table_id].transform_bytes(io.BytesIO(data), output)
+    return output.getvalue(), _worker_transforms.take_cache_stats()
+
+
+_CHUNK_SIZE = 1024 * 1024
+"""Size of lines sent to a worker at once"""
+
+_MAX_CHUNKS = 2
+"""Chunks of a stream in flight at once"""
+
+
+class TransformPool:
+    """
+    Worker processes that transform COPY data, each initialized once with the
+    transforms
+
+    Workers are spawned rather than forked, so this works on any platform.
+    Data is streamed to workers in chunks of whole lines.
+    """
+
+    def __init__(
+        self,
+        transforms: typing.Dict[str, TransformInstance],
+        pepper: bytes,
+        tables: typing.Dict[str, typing.Tuple[typing.Dict[str, str], typing.List[str]]],
+        parallelism: int,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        version: int = 1,
+    ):
+        """
+        tables: Transformed columns and all columns, by table ID
+        version: Version of transform config
+        """
+        self._cache_stats = {}
+        self._executor = None
+        self._initargs = (transforms, pepper, tables, cache_size, version)
+        self._parallelism = parallelism
+        self._tables = set(tables.keys())
+
+    def __enter__(self):
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._parallelism,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+        return self
+
+    def __exit__(self, *args):
+        self._executor.shutdown(wait=True)
+        for name, (hits, misses) in sorted(self._cache_stats.items()):
+            logging.info(
+                "Transform %s cache hits: %d of %d (%.1f%%)",
+                name,
+                hits,
+                hits + misses,
+                100 * hits / (hits + misses),
+            )
+
+    def has_table(self, table_id: str) -> bool:
+        return table_id in self._tables
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self, table_id: str, output: AsyncWrite
+    ) -> typing.AsyncIterator[AsyncWrite]:
+        """
+        Open writer of COPY data of table, which writes transformed data to
+        output in order
+        """
+        stream = _TransformStream(self, table_id, output)
+        try:
+            yield stream.write
+        except:
+            stream.cancel()
+            raise
+        await stream.close()
+
+    async def _transform(self, table_id: str, data: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        result, stats = await loop.run_in_executor(
+            self._executor, _transform_chunk, table_id, data
+        )
+        for name, (hits, misses) in stats.items():
+            total_hits, total_misses = self._cache_stats.get(name, (0, 0))
+            self._cache_stats[name] = (total_hits + hits, total_misses + misses)
+        return result
+
+
+class _TransformStream:
+    """
+    Reassemble lines from chunks, and transform them in workers, with a bounded
+    number of chunks in flight
+    """
+
+    def __init__(self, pool: TransformPool, table_id: str, output: AsyncWrite):
+        self._buffer = []
+        self._buffer_size = 0
+        self._output = output
+        self._partial = b""
+        self._pending = collections.deque()
+        self._pool = pool
+        self._table_id = table_id
+
+    async def write(self, data: bytes):
+        end = data.rfind(b"\n") + 1
+        if not end:
+            self._partial += data
+            return
+        self._buffer.append(self._partial + data[:end])
+        self._buffer_size += len(self._buffer[-1])
+        self._partial = data[end:]
+        if _CHUNK_SIZE <= self._buffer_size:
+            await self._flush()
+
+    async def close(self):
+        if self._partial:
+            raise Exception("COPY data ends without newline")
+        if self._buffer:
+            await self._flush()
+        while self._pending:
+            await self._output(await self._pending.popleft())
+
+    def cancel(self):
+        for task in self._pending:
+            task.cancel()
+
+    async def _flush(self):
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffer_size = 0
+        self._pending.append(
+            asyncio.ensure_future(self._pool._transform(self._table_id, data))
+        )
+        # backpressure, and order of output
+        while self._pending and (
+            _MAX_CHUNKS < len(self._pending) or self._pending[0].done()
+        ):
+            await self._output(await self._pending.popleft())
@@ -1,32 +1,31 @@
-import importlib.resources
 import typing
 
-from ..collection.dict import groups
+from ..datafile import load_data_file
+from ..rng import RandomEngine
 from ..transform import Transform, TransformContext, Transformer
-from .common import create_random
+from .common import transform_distinct
 from .text import Char, Word, WordCase
 
 
 class AddressLine1Transform(Transform):
-    def __init__(self):
-        with importlib.resources.open_text("slice_db.data", "street.txt") as f:
-            text = f.read()
-        self._streets = [line for line in text.split("\n") if line]
-
     def create(self, context: TransformContext, pepper: bytes, config: any):
-        return _AddressLine1Transformer(self._streets, pepper)
+        return _AddressLine1Transformer(
+            load_data_file("street").values, context.random_engine(pepper)
+        )
 
 
 class _AddressLine1Transformer(Transformer):
-    def __init__(self, streets: typing.List[str], pepper: bytes):
+    cacheable = True
+
+    def __init__(self, streets: typing.Sequence[str], engine: RandomEngine):
+        self._engine = engine
         self._streets = streets
-        self._pepper = pepper
 
     def transform(self, text: typing.Optional[str]):
         if not text:
             return text
 
-        random = create_random(text.encode("utf-8") + self._pepper)
+        random = self._engine.random(text.encode("utf-8"))
         street = random.choice(self._streets)
         case = Word.case(Char.letters(text))
         if case != WordCase.TITLECASE:
@@ -37,110 +36,102 @@ class _AddressLine1Transformer(Transformer):
 
 class AddressLine2Transform(Transform):
     def create(self, manager: TransformContext, pepper: bytes, config: any):
-        return _AddressLine2Transformer(pepper)
+        return _AddressLine2Transformer(manager.random_engine(pepper))
 
 
 class _AddressLine2Transformer(Transformer):
-    def __init__(self, pepper: bytes):
-        self._pepper = pepper
+    cacheable = True
+
+    def __init__(self, engine: RandomEngine):
+        self._engine = engine
 
     def transform(self, text: typing.Optional[str]):
         if not text:
             return text
 
-        random = create_random(text.encode("utf-8") + self._pepper)
-        n = random.randint(1, 999)
+        n = self._engine.random(text.encode("utf-8")).randint(1, 999)
         return f"#{n}"
 
 
 class CityTransform(Transform):
-    def __init__(self):
-        with importlib.resources.open_text("slice_db.data", "city.txt") as f:
-            text = f.read()
-        self._cities = [line for line in text.split("\n") if line]
-
     def create(self, manager: TransformContext, pepper: bytes, config: any):
-        return _CityTransformer(self._cities, pepper)
+        return _CityTransformer(
+            load_data_file("city").values, manager.random_engine(pepper)
+        )
 
 
 class _CityTransformer(Transformer):
-    def __init__(self, cities: typing.List[str], pepper: bytes):
+    cacheable = True
+
+    def __init__(self, cities: typing.Sequence[str], engine: RandomEngine):
         self._cities = cities
-        self._pepper = pepper
+        self._engine = engine
 
     def transform(self, text: typing.Optional[str]):
         if not text:
             return text
 
-        random = create_random(text.encode("utf-8") + self._pepper)
-        city = random.choice(self._cities)
+        city = self._engine.choice(text.encode("utf-8"), self._cities)
         case = Word.case(Char.letters(text))
         return city if case == WordCase.TITLECASE else Word.apply_case(city, case)
 
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        return transform_distinct(self.transform, values)
 
-class GeozipTransform(Transform):
-    def __init__(self):
-        with importlib.resources.open_text("slice_db.data", "zip.txt") as f:
-            text = f.read()
-        options = [line for line in text.split("\n") if line]
-        self._by_geozip = groups(options, lambda x: str(x).zfill(5)[0:3])
-        self._all = options
 
+class GeozipTransform(Transform):
     def create(self, manager: TransformContext, pepper: bytes, config: any):
-        return _GeozipTransformer(self._by_geozip, self._all, pepper)
+        zips = load_data_file("zip")
+        return _GeozipTransformer(
+            zips.groups, zips.values, manager.random_engine(pepper)
+        )
 
 
 class _GeozipTransformer(Transformer):
+    cacheable = True
+
     def __init__(
         self,
-        by_geozip: typing.Dict[str, typing.List[str]],
-        all: typing.List[str],
-        pepper: bytes,
+        by_geozip: typing.Dict[str, typing.Sequence[str]],
+        all: typing.Sequence[str],
+        engine: RandomEngine,
     ):
         self._by_geozip = by_geozip
         self._all = all
-        self._pepper = pepper
+        self._engine = engine
 
     def transform(self, zip: typing.Optional[str]):
         if zip is None:
             return None
 
-        random = create_random(zip.encode("utf-8") + self._pepper)
-
         geo = zip[0:3]
-        choices = self._by_geozip[geo] or self._all
-        result = random.choice(choices)
+        choices = self._by_geozip.get(geo) or self._all
+        result = self._engine.choice(zip.encode("utf-8"), choices)
         return str(result).zfill(5)
 
 
 class UsStateTransform(Transform):
-    def __init__(self):
-        with importlib.resources.open_text("slice_db.data", "us-state.txt") as f:
-            text = f.read()
-        self._states = [line for line in text.split("\n") if line]
-
-        with importlib.resources.open_text("slice_db.data", "us-state-abbr.txt") as f:
-            text = f.read()
-        self._abbr = [line for line in text.split("\n") if line]
-
     def create(self, manager: TransformContext, pepper: bytes, config: any):
         config = config or {}
         return _UsStateTransformer(
-            self._abbr if config.get("abbr", False) else self._states,
-            pepper,
+            load_data_file(
+                "us-state-abbr" if config.get("abbr", False) else "us-state"
+            ).values,
+            manager.random_engine(pepper),
         )
 
 
 class _UsStateTransformer(Transformer):
-    def __init__(self, states: typing.List[str], pepper: bytes):
+    cacheable = True
+
+    def __init__(self, states: typing.Sequence[str], engine: RandomEngine):
+        self._engine = engine
         self._states = states
-        self._pepper = pepper
 
     def transform(self, text: typing.Optional[str]):
         if not text:
             return text
 
-        random = create_random(text.upper().encode("utf-8") + self._pepper)
-        state = random.choice(self._states)
+        state = self._engine.choice(text.upper().encode("utf-8"), self._states)
         case = Word.case(Char.letters(state))
         return Word.apply_case(state, case)
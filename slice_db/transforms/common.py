@@ -1,20 +1,45 @@
-import hashlib
 import random
 import typing
 import re
 
-from ..transform import Transform, TransformContext, Transformer
+from pg_sql import SqlString
 
-
-def bytes_hash_int(input: bytes) -> int:
-    b = hashlib.md5(input).digest()
-    return int.from_bytes(b[0:8], "big")
+from ..rng import bytes_hash_int
+from ..transform import (
+    Transform,
+    TransformContext,
+    Transformer,
+    transform_batch,
+    transform_sql,
+)
 
 
 def create_random(bytes):
     return random.Random(bytes_hash_int(bytes))
 
 
+def transform_distinct(
+    fn: typing.Callable[[typing.Optional[str]], typing.Optional[str]],
+    values: typing.List[typing.Optional[str]],
+) -> typing.List[typing.Optional[str]]:
+    """
+    Apply deterministic function once per distinct value
+    """
+    results = {}
+    output = []
+    for value in values:
+        try:
+            result = results[value]
+        except KeyError:
+            result = results[value] = fn(value)
+        output.append(result)
+    return output
+
+
+_TEXT_TYPES = {"text", "varchar"}
+"""Types whose text cast is their COPY text"""
+
+
 class ComposeTransform(Transform):
     def create(self, context: TransformContext, pepper: bytes, config):
         transforms = [context.get_transform(name) for name in config]
@@ -30,6 +55,19 @@ class ComposeTransformer(Transformer):
             text = transform.transform(text)
         return text
 
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        for transform in self._transforms:
+            values = transform_batch(transform, values)
+        return values
+
+    def sql(self, expression: str, type: str):
+        for transform in self._transforms:
+            expression = transform_sql(transform, expression, type)
+            if expression is None:
+                return None
+            type = "text"
+        return expression
+
 
 class ConstTransform(Transform):
     def create(self, context, pepper, params):
@@ -46,6 +84,12 @@ class _ConstTransformer:
 
         return self._value
 
+    def sql(self, expression: str, type: str):
+        if not isinstance(self._value, str):
+            return None
+        return f"CASE WHEN {expression} IS NULL THEN NULL ELSE {SqlString(self._value)} END"
+
+
 class ReplaceTransform(Transform):
     def create(self, context, pepper, params):
         return _ReplaceTransform(params)
@@ -63,6 +107,20 @@ class _ReplaceTransform:
         regex = re.compile(re.escape(self._old), re.IGNORECASE)
         return regex.sub(self._new, text)
 
+    def sql(self, expression: str, type: str):
+        # other types may cast to text differently than COPY outputs them
+        if type not in _TEXT_TYPES:
+            return None
+        # limit to plain ASCII, where case folding and escapes agree
+        if not self._old or not all(
+            isinstance(value, str) and value.isascii() and "\\" not in value
+            for value in (self._old, self._new)
+        ):
+            return None
+        pattern = re.sub(r"([^a-zA-Z0-9])", r"\\\1", self._old)
+        return f"regexp_replace({expression}, {SqlString(pattern)}, {SqlString(self._new)}, 'gi')"
+
+
 class IncrementingConstTransform(Transform):
     def create(self, context, pepper, config):
         return _IncrementingConstTransform(config)
@@ -81,8 +139,8 @@ class _IncrementingConstTransform:
         if self._exclude is not None and self._exclude in text:
             return text
 
-        self._count = self._count+1
-        return self._value + ' ' + str(self._count)
+        self._count = self._count + 1
+        return self._value + " " + str(self._count)
 
 
 class NullTransform(Transform):
@@ -93,3 +151,6 @@ class NullTransform(Transform):
 class _NullTransformer(Transform):
     def transform(self, text: typing.Optional[str]):
         return None
+
+    def sql(self, expression: str, type: str):
+        return "NULL"
@@ -2,27 +2,85 @@ import calendar
 import datetime
 import typing
 
+from pg_sql import SqlNumber, SqlString
+
+from ..rng import RandomEngine
 from ..transform import Transform, TransformContext, Transformer
-from .common import create_random
+from .common import transform_distinct
 
 
 class DateYearTransform(Transform):
     def create(self, context: TransformContext, pepper: bytes, config):
-        return _DateYearTransformer(pepper)
+        return _DateYearTransformer(context.random_engine(pepper))
 
 
 class _DateYearTransformer(Transformer):
-    def __init__(self, pepper: bytes):
-        self._pepper = pepper
+    cacheable = True
+
+    def __init__(self, engine: RandomEngine):
+        self._engine = engine
 
     def transform(self, text: typing.Optional[str]):
         if text is None:
             return None
 
-        random = create_random(text.encode("utf-8") + self._pepper)
+        random = self._engine.random(text.encode("utf-8"))
 
         date = datetime.date.fromisoformat(text)
         days_in_year = 366 if calendar.isleap(date.year) else 365
         days = random.randrange(days_in_year)
         date = datetime.date(date.year, 1, 1) + datetime.timedelta(days=days)
         return date.isoformat()
+
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        return transform_distinct(self.transform, values)
+
+
+_INFINITE_DATES = {"infinity", "-infinity"}
+
+_MIN_DATE_SQL = SqlString(datetime.date.min.isoformat())
+
+_MAX_DATE_SQL = SqlString(datetime.date.max.isoformat())
+
+
+class DateShiftTransform(Transform):
+    def create(self, context: TransformContext, pepper: bytes, config):
+        return _DateShiftTransformer(config.get("days", 0))
+
+
+class _DateShiftTransformer(Transformer):
+    cacheable = True
+
+    def __init__(self, days: int):
+        self._days = int(days)
+
+    def transform(self, text: typing.Optional[str]):
+        if text is None:
+            return None
+
+        if text in _INFINITE_DATES:
+            return text
+
+        date = datetime.date.fromisoformat(text)
+        date += datetime.timedelta(days=self._days)
+        return date.isoformat()
+
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        return transform_distinct(self.transform, values)
+
+    def sql(self, expression: str, type: str):
+        if type != "date":
+            return None
+        shifted = f"{expression} + {SqlNumber(self._days)}"
+        # dates outside of Python's range fail in the database too
+        return f"""
+            CASE
+                WHEN NOT isfinite({expression})
+                    OR (
+                        {expression} BETWEEN {_MIN_DATE_SQL} AND {_MAX_DATE_SQL}
+                        AND {shifted} BETWEEN {_MIN_DATE_SQL} AND {_MAX_DATE_SQL}
+                    )
+                    THEN ({shifted})::text
+                ELSE ('Date out of range: ' || {expression})::date::text
+            END
+        """
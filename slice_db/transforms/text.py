@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import enum
-import importlib.resources
+import functools
 import re
 import string
 import typing
@@ -9,9 +9,10 @@ import unicodedata
 
 import pyffx
 
-from ..collection.dict import groups
+from ..datafile import load_data_file
+from ..rng import Random, RandomEngine
 from ..transform import Transform, TransformContext, Transformer
-from .common import create_random
+from .common import transform_distinct
 
 
 class AlphanumericTransform(Transform):
@@ -19,30 +20,47 @@ class AlphanumericTransform(Transform):
         if config is None:
             config = {}
         return _AlphanumericTransformer(
-            unique=config.get("unique", False), pepper=pepper
+            unique=config.get("unique", False),
+            engine=context.random_engine(pepper),
+            pepper=pepper,
         )
 
 
 class _AlphanumericTransformer(Transformer):
-    def __init__(self, unique: bool, pepper: bytes):
+    cacheable = True
+
+    def __init__(self, unique: bool, engine: RandomEngine, pepper: bytes):
+        self._engine = engine
         self._unique = unique
         self._pepper = pepper
 
     def transform(self, text: typing.Optional[str]):
+        return self._transform_value({}, text)
+
+    def transform_batch(self, values: typing.List[typing.Optional[str]]):
+        return transform_distinct(functools.partial(self._transform_value, {}), values)
+
+    def _transform_value(
+        self,
+        ciphers: typing.Dict[typing.Tuple[str, int], pyffx.String],
+        text: typing.Optional[str],
+    ):
         if text is None:
             return None
 
         if self._unique:
-            return self._transform_unique(text)
+            return self._transform_unique(ciphers, text)
 
         return self._transform(text)
 
     def _transform(self, text: str):
-        rnd = create_random(text.upper().encode("utf-8") + self._pepper)
+        rnd = self._engine.random(text.upper().encode("utf-8"))
         result = "".join(self._replace(rnd, c) for c in text)
         return result
 
-    def _transform_unique(self, text: str):
+    def _transform_unique(
+        self, ciphers: typing.Dict[typing.Tuple[str, int], pyffx.String], text: str
+    ):
         categories = Char.string_categories(text)
         alphabet = ""
         if CharCategory.UPPERCASE in categories:
@@ -54,13 +72,18 @@ class _AlphanumericTransformer(Transformer):
         if not alphabet:
             alphabet = string.ascii_uppercase + string.ascii_lowercase + string.digits
 
-        c = pyffx.String(self._pepper, alphabet=alphabet, length=len(text))
+        try:
+            c = ciphers[(alphabet, len(text))]
+        except KeyError:
+            c = ciphers[(alphabet, len(text))] = pyffx.String(
+                self._pepper, alphabet=alphabet, length=len(text)
+            )
         text = "".join(
             c if c in alphabet else alphabet[ord(c) % len(alphabet)] for c in text
         )
         return c.encrypt(text)
 
-    def _replace(self, rnd, c):
+    def _replace(self, rnd: Random, c):
         category = Char.char_category(c)
         if category is CharCategory.UPPERCASE:
             return chr(rnd.randint(ord("A"), ord("Z")))
@@ -139,22 +162,26 @@ class Word:
 
 
 class WordTransform:
-    def __init__(self):
-        with importlib.resources.open_text("slice_db.data", "word.txt") as f:
-            text = f.read()
-        self._words = groups((word for word in text.split("\n") if word), len)
-
     def create(self, context: TransformContext, pepper: bytes, config: any):
-        return _WordTransformer(self._words, max(self._words.keys()), pepper)
+        words = {
+            int(length): group
+            for length, group in load_data_file("word").groups.items()
+        }
+        return _WordTransformer(words, max(words.keys()), context.random_engine(pepper))
 
 
 class _WordTransformer:
+    cacheable = True
+
     def __init__(
-        self, words: typing.Dict[str, typing.List[str]], default_length, pepper: bytes
+        self,
+        words: typing.Dict[int, typing.Sequence[str]],
+        default_length,
+        engine: RandomEngine,
     ):
         self._words = words
         self._default_length = default_length
-        self._pepper = pepper
+        self._engine = engine
 
     def transform(self, text: typing.Optional[str]):
         if not text:
@@ -162,7 +189,7 @@ class _WordTransformer:
 
         new_text = ""
 
-        random = create_random(text.upper().encode("utf-8") + self._pepper)
+        random = self._engine.random(text.upper().encode("utf-8"))
 
         word = ""
         i = 0
@@ -178,7 +205,7 @@ class _WordTransformer:
                 continue
             if word:
                 case = Word.case(word)
-                words = self._words[len(word)] or self._words[self._default_length]
+                words = self._words.get(len(word)) or self._words[self._default_length]
                 word = ""
                 new_text += Word.apply_case(random.choice(words), case)
             if c is None:
@@ -0,0 +1,190 @@
+import asyncio
+import dataclasses
+import functools
+import logging
+import time
+import typing
+
+from .codec import get_codec
+from .concurrent import to_thread
+from .formats.manifest import MANIFEST_DATA_JSON_FORMAT, Manifest
+from .resource import ResourceFactory
+from .slice import SliceStreamReader, StreamFrameKind, checksum_hash, open_slice_reader
+
+_CHUNK_SIZE = 1024 * 64
+
+
+@dataclasses.dataclass
+class VerifyIo:
+    input: ResourceFactory[typing.BinaryIO]
+    input_directory: typing.Optional[str] = None
+    """Input directory, instead of input"""
+
+
+@dataclasses.dataclass
+class VerifyParams:
+    parallelism: int
+
+
+@dataclasses.dataclass
+class _Measurement:
+    checksum: typing.Optional[str] = None
+    error: typing.Optional[str] = None
+    size: typing.Optional[int] = None
+
+
+MemberKey = typing.Tuple[str, str, int]
+"""Kind, table ID or section, and index"""
+
+
+async def verify(io: VerifyIo, params: VerifyParams):
+    """
+    Verify sizes and checksums of slice members
+    """
+    logging.info("Verifying slice")
+    start = time.perf_counter()
+
+    lock = asyncio.Semaphore(params.parallelism)
+
+    async def measure(open_member):
+        async with lock:
+            return await to_thread(_measure, open_member)
+
+    with open_slice_reader(io.input, io.input_directory) as reader:
+        if isinstance(reader, SliceStreamReader):
+            manifest, measurements = await _measure_stream(reader, measure)
+        else:
+            manifest = MANIFEST_DATA_JSON_FORMAT.load(reader.open_manifest)
+            keys = [
+                key
+                for key, (_, checksum) in _expected(manifest).items()
+                if checksum is not None
+            ]
+            results = await asyncio.gather(
+                *(measure(_member_opener(reader, manifest, key)) for key in keys)
+            )
+            measurements = dict(zip(keys, results))
+
+    expected = _expected(manifest)
+    failures = 0
+    skipped = 0
+    for key, (size, checksum) in expected.items():
+        if checksum is None:
+            skipped += 1
+            continue
+        error = _check(measurements.get(key), size, checksum)
+        if error is not None:
+            failures += 1
+            logging.error("%s: %s", _describe(key), error)
+
+    end = time.perf_counter()
+    checked = len(expected) - skipped
+    if skipped:
+        logging.info("Skipped %d members without checksums", skipped)
+    if failures:
+        raise Exception(f"{failures} of {checked} members failed verification")
+    logging.info("Verified %d members (%.3fs)", checked, end - start)
+
+
+def _expected(
+    manifest: Manifest,
+) -> typing.Dict[MemberKey, typing.Tuple[int, typing.Optional[str]]]:
+    """
+    Expected sizes and checksums of members
+    """
+    expected = {}
+    for section, schema in (
+        ("pre-data", manifest.pre_data),
+        ("post-data", manifest.post_data),
+    ):
+        if schema.entries is None:
+            for i in range(schema.count):
+                expected[("schema", section, i)] = (None, None)
+        else:
+            for i, entry in enumerate(schema.entries):
+                expected[("schema", section, i)] = (entry.size, entry.checksum)
+    for id, table in manifest.tables.items():
+        for i, segment in enumerate(table.segments):
+            expected[("segment", id, i)] = (segment.size, segment.checksum)
+    return expected
+
+
+def _member_opener(reader, manifest: Manifest, key: MemberKey):
+    kind, id, index = key
+    if kind == "schema":
+        return lambda: reader.open_schema(id, index)
+    codec = manifest.tables[id].segments[index].codec
+    return lambda: reader.open_segment(id, index, codec)
+
+
+async def _measure_stream(
+    reader: SliceStreamReader, measure
+) -> typing.Tuple[Manifest, typing.Dict[MemberKey, _Measurement]]:
+    """
+    Measure members as frames arrive
+    """
+    tasks = {}
+    try:
+        while True:
+            frame = await to_thread(reader.read_frame)
+            if frame.kind == StreamFrameKind.MANIFEST:
+                with frame.open_text() as f:
+                    manifest = MANIFEST_DATA_JSON_FORMAT.load(lambda: f)
+                # drain the index, so that the writer is not cut off
+                await to_thread(reader.read_frame)
+                break
+            if frame.kind == StreamFrameKind.SCHEMA:
+                key = ("schema", frame.meta["section"], frame.meta["index"])
+                open_member = functools.partial(lambda data: data, frame.data)
+            elif frame.kind == StreamFrameKind.SEGMENT:
+                key = ("segment", frame.meta["table"], frame.meta["index"])
+                codec = get_codec(frame.meta["codec"])
+                open_member = functools.partial(codec.open_file_reader, frame.data)
+            else:
+                frame.data.close()
+                continue
+            tasks[key] = asyncio.create_task(measure(open_member))
+        results = await asyncio.gather(*tasks.values())
+    except:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return manifest, dict(zip(tasks.keys(), results))
+
+
+def _measure(open_member: typing.Callable[[], typing.BinaryIO]) -> _Measurement:
+    checksum = checksum_hash()
+    size = 0
+    try:
+        with open_member() as f:
+            while True:
+                data = f.read(_CHUNK_SIZE)
+                if not data:
+                    break
+                checksum.update(data)
+                size += len(data)
+    except Exception as e:
+        return _Measurement(error=f"Failed to read: {e}")
+    return _Measurement(checksum=checksum.hexdigest(), size=size)
+
+
+def _check(
+    measurement: typing.Optional[_Measurement],
+    size: typing.Optional[int],
+    checksum: str,
+) -> typing.Optional[str]:
+    if measurement is None:
+        return "Missing"
+    if measurement.error is not None:
+        return measurement.error
+    if size is not None and measurement.size != size:
+        return f"Expected {size} bytes, but found {measurement.size}"
+    if measurement.checksum != checksum:
+        return f"Expected checksum {checksum}, but found {measurement.checksum}"
+
+
+def _describe(key: MemberKey) -> str:
+    kind, id, index = key
+    if kind == "schema":
+        return f"Statement {index + 1} of {id}"
+    return f"Segment {index + 1} of table {id}"
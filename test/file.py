@@ -11,3 +11,9 @@ def temp_file(prefix=None):
         yield name
     finally:
         os.remove(name)
+
+
+@contextlib.contextmanager
+def temp_dir(prefix=None):
+    with tempfile.TemporaryDirectory(prefix=prefix) as name:
+        yield name
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from file import temp_file
+from pg import connection, open_database, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_copy_command(pg_database, jobs):
+    with temp_file("schema-") as schema_file, connection(
+        "dbname=postgres"
+    ) as admin_conn:
+        admin_conn.autocommit = True
+        with open_database(admin_conn, "target"):
+            _test_copy_command(schema_file, jobs)
+
+
+def _test_copy_command(schema_file, jobs):
+    with connection("") as conn, transaction(conn) as cur:
+        cur.execute(_SCHEMA_SQL)
+
+        cur.execute(
+            """
+                INSERT INTO parent (id)
+                VALUES (1), (2);
+
+                INSERT INTO child (id, parent_id)
+                VALUES (1, 1), (2, 1), (3, 2);
+            """
+        )
+
+    with connection("dbname=target") as conn, transaction(conn) as cur:
+        cur.execute(_SCHEMA_SQL)
+
+    with open(schema_file, "w") as f:
+        json.dump(_SCHEMA_JSON, f)
+
+    run_process(
+        [
+            "slicedb",
+            "copy",
+            "--jobs",
+            str(jobs),
+            "--schema",
+            schema_file,
+            "--root",
+            "public.child",
+            "id < 3",
+            "--target",
+            "postgresql:///target",
+        ]
+        + (["--no-transaction"] if 1 < jobs else [])
+    )
+
+    with connection("dbname=target") as conn, transaction(conn) as cur:
+        cur.execute("TABLE parent")
+        result = cur.fetchall()
+        assert result == [(1,)]
+
+        cur.execute("TABLE child ORDER BY id")
+        result = cur.fetchall()
+        assert result == [(1, 1), (2, 1)]
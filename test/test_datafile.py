@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from slice_db.datafile import (
+    DATA_FILES,
+    DataFile,
+    compile_data_file,
+    load_data_file,
+    read_text_file,
+)
+
+
+def test_data_file():
+    data = DataFile(compile_data_file(["a", "bc", "dé", ""], str))
+    assert list(data.values) == ["a", "bc", "dé", ""]
+    assert data.values[-1] == ""
+    assert {key: list(values) for key, values in data.groups.items()} == {
+        "a": ["a"],
+        "bc": ["bc"],
+        "dé": ["dé"],
+        "": [""],
+    }
+
+
+def test_data_file_groups():
+    data = DataFile(compile_data_file(["a", "bc", "d", "ef"], lambda s: str(len(s))))
+    assert list(data.groups["1"]) == ["a", "d"]
+    assert list(data.groups["2"]) == ["bc", "ef"]
+    assert data.groups["2"][1] == "ef"
+
+
+@pytest.mark.parametrize("name", DATA_FILES.keys())
+def test_data_file_compiled(name):
+    """
+    Compiled data files are up to date with text, see make data
+    """
+    directory = os.path.join(os.path.dirname(__file__), "..", "slice_db", "data")
+    values = read_text_file(os.path.join(directory, f"{name}.txt"))
+    with open(os.path.join(directory, f"{name}.bin"), "rb") as f:
+        assert f.read() == compile_data_file(values, DATA_FILES[name])
+    assert list(load_data_file(name).values) == values
@@ -0,0 +1,184 @@
+import json
+import os
+
+import pytest
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+def _cache_files(cache_dir):
+    return sorted(
+        os.path.join(path, name)
+        for path, _, names in os.walk(cache_dir)
+        for name in names
+    )
+
+
+@pytest.mark.parametrize("output_type", ["directory", "slice"])
+def test_dump_cache(pg_database, output_type):
+    with temp_file("schema-") as schema_file, temp_dir("cache-") as cache_dir, temp_dir(
+        "output-"
+    ) as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    INSERT INTO child (id, parent_id)
+                    VALUES (1, 1), (2, 1), (3, 2);
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        def dump(name):
+            output = os.path.join(output_dir, name)
+            run_process(
+                [
+                    "slicedb",
+                    "dump",
+                    "--schema",
+                    schema_file,
+                    "--root",
+                    "public.parent",
+                    "id = 1",
+                    "--output",
+                    output,
+                    "--output-type",
+                    output_type,
+                    "--segment-cache",
+                    cache_dir,
+                ]
+            )
+            run_process(["slicedb", "verify", "--input", output])
+            return output
+
+        dump("first")
+        cached = _cache_files(cache_dir)
+        assert len(cached) == 2
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("INSERT INTO child (id, parent_id) VALUES (4, 1)")
+
+        second = dump("second")
+        # parent is unchanged, child is new
+        assert len(_cache_files(cache_dir)) == 3
+        assert set(cached) < set(_cache_files(cache_dir))
+
+        if output_type == "directory":
+            assert (
+                os.stat(os.path.join(second, "public.parent", "1.tsv.gz")).st_nlink == 3
+            )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DELETE FROM child;
+
+                    DELETE FROM parent;
+                """
+            )
+
+        run_process(["slicedb", "restore", "--input", second])
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TABLE parent")
+            result = cur.fetchall()
+            assert result == [(1,)]
+
+            cur.execute("TABLE child ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1, 1), (2, 1), (4, 1)]
+
+
+def test_dump_cache_layout(pg_database):
+    with temp_file("schema-") as schema_file, temp_dir("cache-") as cache_dir, temp_dir(
+        "output-"
+    ) as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    INSERT INTO child (id, parent_id)
+                    VALUES (1, 1), (2, 2), (3, 1);
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--jobs",
+                "2",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 2",
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_dir,
+                "--output-type",
+                "directory",
+                "--segment-cache",
+                cache_dir,
+            ]
+        )
+
+        # rows found separately are laid out together
+        with open(os.path.join(output_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        assert manifest["tables"]["public.parent"]["segmentColumns"]["rowCount"] == [2]
+        assert manifest["tables"]["public.child"]["segmentColumns"]["rowCount"] == [3]
@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+@pytest.mark.parametrize("codec", ["deflate", "zstd"])
+def test_dump_directory(pg_database, codec):
+    with temp_file("schema-") as schema_file, temp_dir("output-") as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    INSERT INTO child (id, parent_id)
+                    VALUES (1, 1), (2, 1), (3, 2);
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--codec",
+                codec,
+                "--jobs",
+                "2",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_dir,
+                "--output-type",
+                "directory",
+            ]
+        )
+
+        suffix = ".gz" if codec == "deflate" else ".zst"
+        assert os.path.isfile(os.path.join(output_dir, "manifest.json"))
+        assert os.path.isfile(
+            os.path.join(output_dir, "public.child", "1.tsv" + suffix)
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DELETE FROM child;
+
+                    DELETE FROM parent;
+                """
+            )
+
+        run_process(
+            [
+                "slicedb",
+                "restore",
+                "--input",
+                output_dir,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TABLE parent")
+            result = cur.fetchall()
+            assert result == [(1,)]
+
+            cur.execute("TABLE child")
+            result = cur.fetchall()
+            assert result == [(1, 1), (2, 1)]
@@ -0,0 +1,132 @@
+import json
+
+from file import temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE color (
+        id int PRIMARY KEY,
+        name text NOT NULL
+    );
+
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id),
+        color_id int REFERENCES color (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        },
+        "public.child.child_color_id_fkey": {
+            "columns": ["color_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.color",
+            "table": "public.child",
+        },
+    },
+    "sequences": {},
+    "tables": {
+        "public.color": {
+            "columns": ["id", "name"],
+            "full": True,
+            "name": "color",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id", "color_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+def test_dump_full(pg_database):
+    with temp_file("schema-") as schema_file, temp_file("output-") as output_file:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO color (id, name)
+                    VALUES (1, 'red'), (2, 'green'), (3, 'blue');
+
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    INSERT INTO child (id, parent_id, color_id)
+                    VALUES (1, 1, 1), (2, 1, 1), (3, 2, 2);
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--jobs",
+                "2",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DELETE FROM child;
+
+                    DELETE FROM parent;
+
+                    DELETE FROM color;
+                """
+            )
+
+        run_process(
+            [
+                "slicedb",
+                "restore",
+                "--input",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("SELECT * FROM color ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1, "red"), (2, "green"), (3, "blue")]
+
+            cur.execute("TABLE parent")
+            result = cur.fetchall()
+            assert result == [(1,)]
+
+            cur.execute("SELECT * FROM child ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1, 1, 1), (2, 1, 1)]
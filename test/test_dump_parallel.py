@@ -0,0 +1,107 @@
+import json
+
+from file import temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "full": True,
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+def test_dump_parallel(pg_database):
+    with temp_file("schema-") as schema_file, temp_file("output-") as output_file:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    SELECT generate_series(1, 500000);
+
+                    INSERT INTO child (id, parent_id)
+                    SELECT i, i FROM generate_series(1, 500000) AS i;
+                """
+            )
+
+        with connection("") as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("ANALYZE")
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--jobs",
+                "4",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.child",
+                "id % 2 = 0",
+                "--output",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TRUNCATE child, parent")
+
+        run_process(
+            [
+                "slicedb",
+                "restore",
+                "--jobs",
+                "4",
+                "--no-transaction",
+                "--input",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("SELECT count(*), sum(id) FROM parent")
+            result = cur.fetchall()
+            assert result == [(500000, 500000 * 500001 // 2)]
+
+            cur.execute("SELECT count(*), sum(id) FROM child")
+            result = cur.fetchall()
+            assert result == [(250000, 250000 * 250001)]
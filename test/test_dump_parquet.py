@@ -0,0 +1,255 @@
+import datetime
+import io
+import json
+import math
+import os
+
+import pyarrow
+import pyarrow.parquet
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+from slice_db.parquet import ParquetDirectoryWriter
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY,
+        created timestamptz NOT NULL
+    );
+
+    CREATE TABLE child (
+        id bigint PRIMARY KEY,
+        parent_id int REFERENCES parent (id),
+        name text,
+        active bool,
+        birth_date date,
+        data bytea
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id", "created"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id", "name", "active", "birth_date", "data"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+_TRANSFORM_JSON = {
+    "tables": {"public.child": {"columns": {"name": "name"}}},
+    "transforms": {"name": {"class": "ConstTransform", "config": "x\ty"}},
+}
+
+
+def test_dump_parquet(pg_database):
+    with temp_file("schema-") as schema_file, temp_file(
+        "transform-"
+    ) as transform_file, temp_dir("output-") as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id, created)
+                    VALUES (1, '2020-01-02 03:04:05.5+00'), (2, '2021-01-01');
+
+                    INSERT INTO child (id, parent_id, name, active, birth_date, data)
+                    VALUES
+                        (1, 1, 'John', true, '2000-02-29', '\\x0102'),
+                        (2, 1, NULL, NULL, NULL, NULL),
+                        (3, 2, 'Bill', false, '2001-01-01', '');
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        with open(transform_file, "w") as f:
+            json.dump(_TRANSFORM_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--codec",
+                "zstd",
+                "--schema",
+                schema_file,
+                "--transform",
+                transform_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_dir,
+                "--output-type",
+                "parquet",
+            ]
+        )
+
+        parent = pyarrow.parquet.read_table(
+            os.path.join(output_dir, "public.parent.parquet")
+        )
+        assert parent.schema.field("created").type == pyarrow.timestamp("us", tz="UTC")
+        assert parent.to_pylist() == [
+            {
+                "id": 1,
+                "created": datetime.datetime(
+                    2020, 1, 2, 3, 4, 5, 500000, tzinfo=datetime.timezone.utc
+                ),
+            }
+        ]
+
+        child = pyarrow.parquet.read_table(
+            os.path.join(output_dir, "public.child.parquet")
+        )
+        assert child.schema.field("id").type == pyarrow.int64()
+        assert child.schema.field("parent_id").type == pyarrow.int32()
+        assert sorted(child.to_pylist(), key=lambda row: row["id"]) == [
+            {
+                "id": 1,
+                "parent_id": 1,
+                "name": "x\ty",
+                "active": True,
+                "birth_date": datetime.date(2000, 2, 29),
+                "data": b"\x01\x02",
+            },
+            {
+                "id": 2,
+                "parent_id": 1,
+                "name": None,
+                "active": None,
+                "birth_date": None,
+                "data": None,
+            },
+        ]
+
+
+def test_dump_parquet_types(pg_database):
+    with temp_file("schema-") as schema_file, temp_dir("output-") as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    CREATE TABLE example (
+                        id int PRIMARY KEY,
+                        at time,
+                        day date,
+                        moment timestamp,
+                        instant timestamptz,
+                        value float8
+                    );
+
+                    INSERT INTO example (id, at, day, moment, instant, value)
+                    VALUES
+                        (1, '12:34:56', 'infinity', 'infinity', 'infinity', 'NaN'),
+                        (2, '00:00:00.25', '-infinity', '-infinity', '-infinity', 'Infinity'),
+                        (3, NULL, NULL, NULL, NULL, '-Infinity');
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(
+                {
+                    "references": {},
+                    "sequences": {},
+                    "tables": {
+                        "public.example": {
+                            "columns": [
+                                "id",
+                                "at",
+                                "day",
+                                "moment",
+                                "instant",
+                                "value",
+                            ],
+                            "name": "example",
+                            "schema": "public",
+                            "sequences": [],
+                        },
+                    },
+                },
+                f,
+            )
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.example",
+                "true",
+                "--output",
+                output_dir,
+                "--output-type",
+                "parquet",
+            ]
+        )
+
+        example = pyarrow.parquet.read_table(
+            os.path.join(output_dir, "public.example.parquet")
+        )
+        assert example.schema.field("at").type == pyarrow.time64("us")
+        rows = sorted(example.to_pylist(), key=lambda row: row["id"])
+        assert math.isnan(rows[0].pop("value"))
+        assert rows == [
+            {
+                "id": 1,
+                "at": datetime.time(12, 34, 56),
+                "day": datetime.date.max,
+                "moment": datetime.datetime.max,
+                "instant": datetime.datetime.max.replace(tzinfo=datetime.timezone.utc),
+            },
+            {
+                "id": 2,
+                "at": datetime.time(0, 0, 0, 250000),
+                "day": datetime.date.min,
+                "moment": datetime.datetime.min,
+                "instant": datetime.datetime.min.replace(tzinfo=datetime.timezone.utc),
+                "value": math.inf,
+            },
+            {
+                "id": 3,
+                "at": None,
+                "day": None,
+                "moment": None,
+                "instant": None,
+                "value": -math.inf,
+            },
+        ]
+
+
+def test_parquet_batches(monkeypatch):
+    monkeypatch.setattr("slice_db.parquet.BATCH_SIZE", 2)
+    with temp_dir("output-") as output_dir:
+        with ParquetDirectoryWriter(output_dir, "none") as writer:
+            writer.add_table("public.example", ["id"], ["int4"])
+            file = io.BytesIO(b"1\n2\n3\n")
+            for batch in writer.convert("public.example", file):
+                writer.write("public.example", batch)
+
+        file = pyarrow.parquet.ParquetFile(
+            os.path.join(output_dir, "public.example.parquet")
+        )
+        assert file.metadata.num_row_groups == 2
+        assert file.read().to_pylist() == [{"id": 1}, {"id": 2}, {"id": 3}]
@@ -0,0 +1,179 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id serial PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id),
+        name text
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {
+        "public.parent_id_seq": {"name": "parent_id_seq", "schema": "public"}
+    },
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": ["public.parent_id_seq"],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id", "name"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+@pytest.mark.parametrize("codec", ["deflate", "zstd"])
+def test_dump_sql_directory(pg_database, codec):
+    with temp_file("schema-") as schema_file, temp_dir("output-") as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    SELECT setval('parent_id_seq', 2);
+
+                    INSERT INTO child (id, parent_id, name)
+                    VALUES (1, 1, E'a\\tb'), (2, 1, NULL), (3, 2, 'c');
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--codec",
+                codec,
+                "--include-schema",
+                "--jobs",
+                "2",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_dir,
+                "--output-type",
+                "sql-directory",
+            ]
+        )
+
+        suffix = ".gz" if codec == "deflate" else ".zst"
+        assert os.path.isfile(
+            os.path.join(output_dir, "data", "public.child", "0.sql" + suffix)
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DROP TABLE child;
+
+                    DROP TABLE parent;
+                """
+            )
+
+        run_process(
+            [os.path.join(output_dir, "load.sh")],
+            env=dict(**os.environ, JOBS="2"),
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TABLE parent")
+            result = cur.fetchall()
+            assert result == [(1,)]
+
+            cur.execute("TABLE child ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1, 1, "a\tb"), (2, 1, None)]
+
+            cur.execute("SELECT last_value FROM parent_id_seq")
+            result = cur.fetchall()
+            assert result == [(2,)]
+
+
+def test_dump_sql_directory_corrupt(pg_database):
+    with temp_file("schema-") as schema_file, temp_dir("output-") as output_dir:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1);
+
+                    INSERT INTO child (id, parent_id, name)
+                    SELECT i, 1, md5(i::text)
+                    FROM generate_series(1, 10000) AS i;
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--output",
+                output_dir,
+                "--output-type",
+                "sql-directory",
+            ]
+        )
+
+        # corrupt after whole rows, so that the rows before would load
+        path = os.path.join(output_dir, "data", "public.child", "0.sql.gz")
+        with gzip.open(path, "rb") as f:
+            lines = f.readlines()
+        with open(path, "wb") as f:
+            f.write(gzip.compress(b"".join(lines[: len(lines) // 2])))
+            f.write(b"corrupt")
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TRUNCATE child, parent")
+
+        with pytest.raises(Exception, match="Exited with code"):
+            run_process([os.path.join(output_dir, "load.sh")])
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("SELECT count(*) FROM child")
+            result = cur.fetchall()
+            assert result == [(0,)]
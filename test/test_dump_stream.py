@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+
+from file import temp_file
+from pg import connection, open_database, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+def test_dump_stream(pg_database):
+    with temp_file("schema-") as schema_file, connection(
+        "dbname=postgres"
+    ) as admin_conn:
+        admin_conn.autocommit = True
+        with open_database(admin_conn, "target"):
+            _test_dump_stream(schema_file)
+
+
+def _test_dump_stream(schema_file):
+    with connection("") as conn, transaction(conn) as cur:
+        cur.execute(_SCHEMA_SQL)
+
+        cur.execute(
+            """
+                INSERT INTO parent (id)
+                VALUES (1), (2);
+
+                INSERT INTO child (id, parent_id)
+                VALUES (1, 1), (2, 1), (3, 2);
+            """
+        )
+
+    with open(schema_file, "w") as f:
+        json.dump(_SCHEMA_JSON, f)
+
+    dump = subprocess.Popen(
+        [
+            "slicedb",
+            "dump",
+            "--jobs",
+            "2",
+            "--schema",
+            schema_file,
+            "--root",
+            "public.parent",
+            "id = 1",
+            "--output-type",
+            "stream",
+        ],
+        stdout=subprocess.PIPE,
+    )
+    with connection("dbname=target") as conn, transaction(conn) as cur:
+        cur.execute(_SCHEMA_SQL)
+
+    # restore reads from the pipe, which cannot seek
+    restore = subprocess.run(
+        ["slicedb", "restore"],
+        env={**os.environ, "PGDATABASE": "target"},
+        stdin=dump.stdout,
+    )
+    dump.stdout.close()
+    assert not dump.wait()
+    assert not restore.returncode
+
+    with connection("dbname=target") as conn, transaction(conn) as cur:
+        cur.execute("TABLE parent")
+        result = cur.fetchall()
+        assert result == [(1,)]
+
+        cur.execute("TABLE child")
+        result = cur.fetchall()
+        assert result == [(1, 1), (2, 1)]
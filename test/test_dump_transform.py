@@ -118,3 +118,85 @@ def test_dump_transform(pg_database, snapshot):
             cur.execute("SELECT * FROM child ORDER BY id")
             result = cur.fetchall()
             assert result == [(1, 1, "Patsy","DEMO 1"), (2, 1, "Myron", "DEMO 2")]
+
+
+_TRANSFORM_SQL_JSON = {
+    "tables": {
+        "public.child": {"columns": {"name": "replace", "incrementing_text": "const"}}
+    },
+    "transforms": {
+        "const": {"class": "ConstTransform", "config": "DEMO"},
+        "replace": {"class": "ReplaceTransform", "config": {"old": "i", "new": "o"}},
+    },
+}
+
+
+def test_dump_transform_sql(pg_database):
+    with temp_file("schema-") as schema_file, temp_file(
+        "transform-"
+    ) as transform_file, temp_file("output-") as output_file:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2);
+
+                    INSERT INTO child (id, parent_id, name, incrementing_text)
+                    VALUES (1, 1, 'John','foo'), (2, 1, 'Sue','bar'), (3, 2, 'Bill','baz');
+                """
+            )
+
+        schema = json.loads(json.dumps(_SCHEMA_JSON))
+        schema["tables"]["public.child"]["full"] = True
+        with open(schema_file, "w") as f:
+            json.dump(schema, f)
+
+        with open(transform_file, "w") as f:
+            json.dump(_TRANSFORM_SQL_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--schema",
+                schema_file,
+                "--transform",
+                transform_file,
+                "--pepper",
+                "abc",
+                "--root",
+                "public.parent",
+                "true",
+                "--output",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DELETE FROM child;
+
+                    DELETE FROM parent;
+                """
+            )
+
+        run_process(
+            [
+                "slicedb",
+                "restore",
+                "--input",
+                output_file,
+            ]
+        )
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("SELECT * FROM child ORDER BY id")
+            result = cur.fetchall()
+            assert result == [
+                (1, 1, "John", "DEMO"),
+                (2, 1, "Sue", "DEMO"),
+                (3, 2, "Boll", "DEMO"),
+            ]
@@ -0,0 +1,89 @@
+import io
+import json
+
+import pytest
+
+from slice_db.formats.manifest import (
+    MANIFEST_DATA_JSON_FORMAT,
+    Manifest,
+    ManifestSchema,
+    ManifestTable,
+    ManifestTableSegment,
+)
+
+
+def _roundtrip(manifest: Manifest):
+    output = io.StringIO()
+    output.close = lambda: None
+    MANIFEST_DATA_JSON_FORMAT.dump(lambda: output, manifest)
+    return json.loads(output.getvalue())
+
+
+def test_manifest_columns():
+    manifest = Manifest(
+        pre_data=ManifestSchema(count=0),
+        post_data=ManifestSchema(count=0),
+        sequences={},
+        tables={
+            "public.example": ManifestTable(
+                columns=["id"],
+                name="example",
+                schema="public",
+                segments=[
+                    ManifestTableSegment(row_count=i, codec="none", size=i * 10)
+                    for i in range(5000)
+                ],
+            )
+        },
+    )
+    instance = _roundtrip(manifest)
+    columns = instance["tables"]["public.example"]["segmentColumns"]
+    assert columns["codec"] == "none"
+    assert columns["rowCount"][:3] == [0, 1, 2]
+
+    loaded = MANIFEST_DATA_JSON_FORMAT.load(lambda: io.StringIO(json.dumps(instance)))
+    segments = loaded.tables["public.example"].segments
+    assert len(segments) == 5000
+    assert segments[4999] == ManifestTableSegment(
+        row_count=4999, codec="none", size=49990
+    )
+
+
+def test_manifest_columns_invalid():
+    instance = {
+        "tables": {
+            "public.example": {
+                "columns": ["id"],
+                "name": "example",
+                "schema": "public",
+                "segmentColumns": {
+                    "codec": "none",
+                    "rowCount": [1] * 5000,
+                    "size": [1] * 4999,
+                },
+            }
+        }
+    }
+    with pytest.raises(Exception, match="4999 size values"):
+        MANIFEST_DATA_JSON_FORMAT.load(lambda: io.StringIO(json.dumps(instance)))
+
+
+def test_manifest_segments():
+    instance = {
+        "preData": {"count": 1},
+        "postData": {"count": 0},
+        "sequences": {},
+        "tables": {
+            "public.example": {
+                "columns": ["id"],
+                "name": "example",
+                "schema": "public",
+                "segments": [{"rowCount": 2}, {"codec": "zstd", "rowCount": 3}],
+            }
+        },
+    }
+    loaded = MANIFEST_DATA_JSON_FORMAT.load(lambda: io.StringIO(json.dumps(instance)))
+    assert list(loaded.tables["public.example"].segments) == [
+        ManifestTableSegment(row_count=2),
+        ManifestTableSegment(row_count=3, codec="zstd"),
+    ]
@@ -0,0 +1,33 @@
+import pytest
+
+from slice_db.pg.copy import COPY_FORMAT
+
+
+@pytest.mark.parametrize(
+    "field,text",
+    [
+        (None, r"\N"),
+        ("", ""),
+        ("abc", "abc"),
+        ("\\N", r"\\N"),
+        ("a\\b", r"a\\b"),
+        ("\\\\", r"\\\\"),
+        ("\b\f\n\r\t\v", r"\b\f\n\r\t\v"),
+        ("é\tü", r"é\tü"),
+    ],
+)
+def test_copy_field(field, text):
+    assert COPY_FORMAT.serialize_field(field) == text
+    assert COPY_FORMAT.parse_field(text) == field
+
+
+def test_copy_field_parse_other_escapes():
+    assert COPY_FORMAT.parse_field(r"\101\x41\q\\") == "AAq\\"
+
+
+def test_copy_row():
+    row = ["1", None, "a\tb", "c\\d"]
+    text = COPY_FORMAT.serialize_row(row)
+    assert text == "1\t\\N\ta\\tb\tc\\\\d"
+    assert COPY_FORMAT.parse_row(text) == row
+    assert COPY_FORMAT.parse_row("1\t2") == ["1", "2"]
@@ -0,0 +1,150 @@
+import json
+import os
+import zipfile
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+
+_SCHEMA_SQL = """
+    CREATE TABLE parent (
+        id int PRIMARY KEY
+    );
+
+    CREATE TABLE child (
+        id int PRIMARY KEY,
+        parent_id int REFERENCES parent (id)
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {
+        "public.child.child_parent_id_fkey": {
+            "columns": ["parent_id"],
+            "referenceColumns": ["id"],
+            "referenceTable": "public.parent",
+            "table": "public.child",
+        }
+    },
+    "sequences": {},
+    "tables": {
+        "public.parent": {
+            "columns": ["id"],
+            "name": "parent",
+            "schema": "public",
+            "sequences": [],
+        },
+        "public.child": {
+            "columns": ["id", "parent_id"],
+            "name": "child",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+def test_repack(pg_database):
+    with temp_file("schema-") as schema_file, temp_file(
+        "slice-"
+    ) as slice_file, temp_dir("directory-") as directory, temp_file(
+        "stream-"
+    ) as stream_file:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO parent (id)
+                    VALUES (1), (2), (3);
+
+                    INSERT INTO child (id, parent_id)
+                    VALUES (1, 1), (2, 1), (3, 2), (4, 3);
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.parent",
+                "id = 1",
+                "--root",
+                "public.parent",
+                "id = 2",
+                "--output",
+                slice_file,
+            ]
+        )
+
+        with zipfile.ZipFile(slice_file) as zip, zip.open("manifest.json") as f:
+            manifest = json.load(f)
+        assert manifest["tables"]["public.parent"]["segmentColumns"]["rowCount"] == [
+            1,
+            1,
+        ]
+
+        run_process(
+            [
+                "slicedb",
+                "repack",
+                "--codec",
+                "zstd",
+                "--input",
+                slice_file,
+                "--jobs",
+                "2",
+                "--output",
+                directory,
+                "--output-type",
+                "directory",
+            ]
+        )
+
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        for table in manifest["tables"].values():
+            assert table["segmentColumns"]["codec"] == "zstd"
+            assert len(table["segmentColumns"]["rowCount"]) == 1
+        assert manifest["tables"]["public.child"]["segmentColumns"]["rowCount"] == [3]
+
+        run_process(
+            [
+                "slicedb",
+                "repack",
+                "--input",
+                directory,
+                "--output",
+                stream_file,
+                "--output-type",
+                "stream",
+            ]
+        )
+
+        run_process(["slicedb", "verify", "--input", stream_file])
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(
+                """
+                    DELETE FROM child;
+
+                    DELETE FROM parent;
+                """
+            )
+
+        run_process(["slicedb", "restore", "--input", stream_file])
+
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute("TABLE parent ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1,), (2,)]
+
+            cur.execute("TABLE child ORDER BY id")
+            result = cur.fetchall()
+            assert result == [(1, 1), (2, 1), (3, 2)]
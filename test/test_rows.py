@@ -0,0 +1,126 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+
+from file import temp_dir, temp_file
+from pg import connection, transaction
+from process import run_process
+from slice_db.rows import open_row_reader
+from slice_db.slice import SliceStreamReader
+
+_SCHEMA_SQL = """
+    CREATE TABLE example (
+        id int PRIMARY KEY,
+        name text,
+        created timestamptz
+    );
+"""
+
+_SCHEMA_JSON = {
+    "references": {},
+    "sequences": {},
+    "tables": {
+        "public.example": {
+            "columns": ["id", "name", "created"],
+            "name": "example",
+            "schema": "public",
+            "sequences": [],
+        },
+    },
+}
+
+
+@pytest.mark.parametrize("output_type", ["slice", "stream"])
+def test_rows(pg_database, monkeypatch, output_type):
+    with temp_file("schema-") as schema_file, temp_file("output-") as output_file:
+        with connection("") as conn, transaction(conn) as cur:
+            cur.execute(_SCHEMA_SQL)
+
+            cur.execute(
+                """
+                    INSERT INTO example (id, name, created)
+                    VALUES
+                        (1, E'a\\tb\\nc', '2020-01-02 03:04:05.5+00'),
+                        (2, NULL, NULL),
+                        (3, 'd', '2021-01-01+00');
+                """
+            )
+
+        with open(schema_file, "w") as f:
+            json.dump(_SCHEMA_JSON, f)
+
+        run_process(
+            [
+                "slicedb",
+                "dump",
+                "--schema",
+                schema_file,
+                "--root",
+                "public.example",
+                "id < 3",
+                "--output",
+                output_file,
+                "--output-type",
+                output_type,
+            ],
+            env=dict(**os.environ, PGTZ="UTC"),
+        )
+
+        def collect(*args, **kwargs):
+            raise AssertionError("Frames are collected")
+
+        # streams are read in place, rather than frame by frame
+        monkeypatch.setattr(SliceStreamReader, "read_frame", collect)
+        monkeypatch.setattr(tempfile, "SpooledTemporaryFile", collect)
+        monkeypatch.setattr(tempfile, "TemporaryFile", collect)
+
+        with open_row_reader(output_file) as reader:
+            rows = sorted(reader.rows("public.example"))
+            assert rows == [
+                ("1", "a\tb\nc", "2020-01-02 03:04:05.5+00"),
+                ("2", None, None),
+            ]
+
+            rows = sorted(
+                reader.rows(
+                    "public.example",
+                    columns=["created", "id"],
+                    types={"created": "timestamptz", "id": "int4"},
+                ),
+                key=lambda row: row[1],
+            )
+            assert rows == [
+                (
+                    datetime.datetime(
+                        2020, 1, 2, 3, 4, 5, 500000, tzinfo=datetime.timezone.utc
+                    ),
+                    1,
+                ),
+                (None, 2),
+            ]
+
+
+def test_rows_stream_pipe():
+    with temp_dir("pipe-") as directory:
+        path = os.path.join(directory, "stream")
+        os.mkfifo(path)
+
+        def write():
+            try:
+                with open(path, "wb") as f:
+                    f.write(b"SLICEDB\x01")
+            except BrokenPipeError:
+                pass
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            with pytest.raises(Exception, match="not seekable"):
+                with open_row_reader(path):
+                    pass
+        finally:
+            thread.join()
@@ -0,0 +1,62 @@
+import concurrent.futures
+import io
+import tempfile
+
+from slice_db.codec import ZstdCodec
+from slice_db.slice import SliceStreamReader, SliceStreamWriter, SpooledSliceStream
+
+
+def _stream(segments) -> bytes:
+    file = io.BytesIO()
+    writer = SliceStreamWriter(file, ZstdCodec())
+    for (table_id, index), data in segments.items():
+        member = writer.segment_member(table_id, index)
+        with member:
+            member.write(data)
+            member.finish()
+            writer.write_member(member)
+    writer.write_sequence("public.seq", 3)
+    with writer.open_manifest() as f:
+        f.write("{}")
+    return file.getvalue()
+
+
+class _Pipe(io.RawIOBase):
+    """
+    Non-seekable reader
+    """
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+def test_spooled_slice_stream(monkeypatch):
+    segments = {
+        ("public.a", i): b"".join(b"%d\t%d\n" % (i, j) for j in range(10000))
+        for i in range(8)
+    }
+    data = _stream(segments)
+
+    def spool(*args, **kwargs):
+        raise AssertionError("Frames are spooled in memory")
+
+    monkeypatch.setattr(tempfile, "SpooledTemporaryFile", spool)
+
+    reader = SliceStreamReader(io.BufferedReader(_Pipe(data)))
+    with SpooledSliceStream(reader) as spooled:
+
+        def read(key):
+            with spooled.open_segment(*key, "zstd") as f:
+                return f.read()
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            assert list(executor.map(read, segments.keys())) == list(segments.values())
+        assert spooled.read_sequence("public.seq") == 3
+        with spooled.open_manifest() as f:
+            assert f.read() == "{}"
@@ -0,0 +1,32 @@
+import asyncio
+import io
+
+import pytest
+
+from slice_db.concurrent.stream import buffered_writer
+
+
+def test_buffered_writer():
+    file = io.BytesIO()
+
+    async def run():
+        async with buffered_writer(file, max_chunks=2) as write:
+            for i in range(100):
+                await write(f"{i}\n".encode())
+
+    asyncio.run(run())
+    assert file.getvalue() == "".join(f"{i}\n" for i in range(100)).encode()
+
+
+def test_buffered_writer_error():
+    class BrokenFile:
+        def write(self, b):
+            raise OSError("Broken")
+
+    async def run():
+        async with buffered_writer(BrokenFile(), max_chunks=2) as write:
+            for i in range(100):
+                await write(b"a")
+
+    with pytest.raises(OSError):
+        asyncio.run(run())
@@ -0,0 +1,311 @@
+import asyncio
+import io
+
+import psycopg2
+import pytest
+
+from pg import connection, transaction
+from slice_db.formats.transform import TransformInstance
+from slice_db.transform import (
+    TransformPool,
+    Transforms,
+    transform_batch,
+    transform_sql,
+)
+
+_VALUES = ["Alice", None, "BOB", "Alice", "", "carol"]
+
+
+@pytest.mark.parametrize(
+    "class_,config,values",
+    [
+        ("AlphanumericTransform", None, _VALUES + ["123 Main St"]),
+        ("AlphanumericTransform", {"unique": True}, ["abc", "ABC", "abc", "a1"]),
+        ("CityTransform", None, _VALUES),
+        ("DateYearTransform", None, ["2020-05-01", None, "1999-01-31", "2020-05-01"]),
+        ("GivenNameTransform", None, _VALUES),
+        ("SurnameTransform", None, _VALUES),
+    ],
+)
+def test_transform_batch(class_, config, values):
+    transforms = Transforms(
+        {
+            "": TransformInstance(
+                class_=class_, config=config, module="slice_db.transforms"
+            )
+        },
+        b"abc",
+    )
+    transformer = transforms.field("")
+    assert transform_batch(transformer, values) == [
+        transformer.transform(value) for value in values
+    ]
+
+
+def test_transform_batch_fallback():
+    transforms = Transforms(
+        {
+            "": TransformInstance(
+                class_="IncrementingConstTransform",
+                config={"value": "DEMO"},
+                module="slice_db.transforms",
+            )
+        },
+        b"abc",
+    )
+    assert transform_batch(transforms.field(""), ["a", None, "a", "b"]) == [
+        "DEMO 1",
+        None,
+        "DEMO 2",
+        "DEMO 3",
+    ]
+
+
+def test_table_transformer():
+    transforms = Transforms(
+        {
+            "name": TransformInstance(
+                class_="GivenNameTransform", config=None, module="slice_db.transforms"
+            ),
+            "null": TransformInstance(
+                class_="NullTransform", config=None, module="slice_db.transforms"
+            ),
+        },
+        b"abc",
+    )
+    transformer = transforms.table(
+        {"first_name": "name", "note": "null"}, ["id", "first_name", "note"]
+    )
+    input = "".join(f"{i}\tAlice\tx\\ty\n" for i in range(3000))
+    output = io.StringIO()
+    transformer.transform(io.StringIO(input), output)
+
+    name = transforms.field("name").transform("Alice")
+    assert output.getvalue() == "".join(f"{i}\t{name}\t\\N\n" for i in range(3000))
+
+
+def test_transform_cache():
+    transforms = Transforms(
+        {"": TransformInstance(class_="SurnameTransform")}, b"abc", cache_size=2
+    )
+    transformer = transforms.field("")
+    uncached = Transforms(
+        {"": TransformInstance(class_="SurnameTransform")}, b"abc", cache_size=0
+    ).field("")
+
+    values = ["Smith", "Jones", "Smith", "Brown", "Jones", None, None]
+    assert [transformer.transform(value) for value in values[:3]] + transform_batch(
+        transformer, values[3:]
+    ) == [uncached.transform(value) for value in values]
+    assert transforms.take_cache_stats() == {"": (3, 4)}
+    assert transforms.take_cache_stats() == {}
+
+
+def test_transform_cache_stateful():
+    transforms = Transforms(
+        {
+            "": TransformInstance(
+                class_="IncrementingConstTransform", config={"value": "DEMO"}
+            )
+        },
+        b"abc",
+    )
+    transformer = transforms.field("")
+    assert [transformer.transform("a") for _ in range(2)] == ["DEMO 1", "DEMO 2"]
+    assert transforms.take_cache_stats() == {}
+
+
+def test_table_transformer_bytes():
+    transforms = Transforms(
+        {"": TransformInstance(class_="GivenNameTransform")}, b"abc"
+    )
+    transformer = transforms.table({"b": ""}, ["a", "b", "c"])
+    input = "1\tAlice\tx\\ty\n2\t\\N\tü\n".encode("utf-8")
+    output = io.BytesIO()
+    transformer.transform_bytes(io.BytesIO(input), output)
+
+    name = transforms.field("").transform("Alice")
+    assert output.getvalue() == f"1\t{name}\tx\\ty\n2\t\\N\tü\n".encode("utf-8")
+
+
+def test_table_transformer_columns():
+    transforms = Transforms(
+        {
+            "const": TransformInstance(class_="ConstTransform", config="a\tb"),
+            "null": TransformInstance(class_="NullTransform"),
+            "replace": TransformInstance(
+                class_="ReplaceTransform", config={"old": "x", "new": "\\\\"}
+            ),
+        },
+        b"abc",
+    )
+    transformer = transforms.table(
+        {"e": "replace", "b": "const", "c": "null"}, ["a", "b", "c", "d", "e"]
+    )
+    input = "1\t\\N\tz\tq\\tq\tx\\nx\n2\tb\t\\N\t\\N\t\n"
+    expected = "1\t\\N\t\\N\tq\\tq\t\\\\\\n\\\\\n2\ta\\tb\t\\N\t\\N\t\n"
+
+    output = io.StringIO()
+    transformer.transform(io.StringIO(input), output)
+    assert output.getvalue() == expected
+
+    output = io.BytesIO()
+    transformer.transform_bytes(io.BytesIO(input.encode("utf-8")), output)
+    assert output.getvalue() == expected.encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "class_,value",
+    [
+        ("AddressLine1Transform", "123 Main St"),
+        ("AlphanumericTransform", "123 Main St $9.99"),
+        ("CityTransform", "New York City"),
+        ("GeozipTransform", "10001"),
+        ("SurnameTransform", "Smith"),
+        ("WordTransform", "Hello world 42"),
+    ],
+)
+def test_transform_version_2(class_, value):
+    def transformer(version, pepper=b"abc"):
+        return Transforms(
+            {"": TransformInstance(class_=class_)}, pepper, version=version
+        ).field("")
+
+    result = transformer(2).transform(value)
+    assert result == transformer(2).transform(value)
+    assert result != transformer(2, b"xyz").transform(value)
+    assert result != transformer(1).transform(value)
+
+
+def test_transform_pool_stream(monkeypatch):
+    import slice_db.transform
+
+    monkeypatch.setattr(slice_db.transform, "_CHUNK_SIZE", 64)
+    instances = {"": TransformInstance(class_="SurnameTransform")}
+    input = "".join(f"{i}\tName{i}\n" for i in range(1000)).encode("utf-8")
+    output = []
+
+    async def write(data):
+        output.append(data)
+
+    async def run():
+        with TransformPool(
+            instances, b"abc", {"t": ({"b": ""}, ["a", "b"])}, 2
+        ) as pool:
+            async with pool.stream("t", write) as stream:
+                for i in range(0, len(input), 7):
+                    await stream(input[i : i + 7])
+
+    asyncio.run(run())
+
+    transformer = Transforms(instances, b"abc").field("")
+    assert b"".join(output) == "".join(
+        f"{i}\t{transformer.transform(f'Name{i}')}\n" for i in range(1000)
+    ).encode("utf-8")
+
+
+def test_table_sql():
+    transforms = Transforms(
+        {
+            "const": TransformInstance(
+                class_="ConstTransform", config="x", module="slice_db.transforms"
+            ),
+            "name": TransformInstance(
+                class_="GivenNameTransform", config=None, module="slice_db.transforms"
+            ),
+            "null": TransformInstance(
+                class_="NullTransform", config=None, module="slice_db.transforms"
+            ),
+            "replace": TransformInstance(
+                class_="ReplaceTransform",
+                config={"old": "t", "new": "f"},
+                module="slice_db.transforms",
+            ),
+        },
+        b"abc",
+    )
+    assert transforms.table_sql(
+        {"note": "null", "code": "const"},
+        ["id", "code", "note"],
+        ["int4", "bool", "text"],
+    ) == ["id", "CASE WHEN code IS NULL THEN NULL ELSE 'x' END", "NULL"]
+    assert (
+        transforms.table_sql(
+            {"note": "null", "first_name": "name"},
+            ["first_name", "note"],
+            ["text", "text"],
+        )
+        is None
+    )
+    assert transforms.table_sql({"flag": "replace"}, ["flag"], ["bool"]) is None
+
+
+@pytest.mark.parametrize(
+    "class_,config,type,values",
+    [
+        ("ConstTransform", "it's", "text", ["a", None, ""]),
+        (
+            "DateShiftTransform",
+            {"days": -45},
+            "date",
+            [
+                "2020-03-01",
+                None,
+                "1999-01-31",
+                "infinity",
+                "0001-02-01",
+                "0044-03-15 BC",
+            ],
+        ),
+        ("DateShiftTransform", {"days": 45}, "date", ["9999-12-01", "-infinity"]),
+        ("NullTransform", None, "int4", ["1", None]),
+        (
+            "ReplaceTransform",
+            {"old": "a.b (c)", "new": "x&y"},
+            "varchar",
+            ["A.B (C) a.b (c)", "axb c", None, ""],
+        ),
+    ],
+)
+def test_transform_sql(pg_database, class_, config, type, values):
+    transforms = Transforms(
+        {
+            "": TransformInstance(
+                class_=class_, config=config, module="slice_db.transforms"
+            )
+        },
+        b"abc",
+    )
+    transformer = transforms.field("")
+    sql = f"""
+        SELECT {transform_sql(transformer, "value", type)}
+        FROM (SELECT %s::{type} AS value) AS t
+    """
+    with connection("") as conn:
+        for value in values:
+            try:
+                expected = transformer.transform(value)
+            except (OverflowError, ValueError):
+                with pytest.raises(psycopg2.DataError), transaction(conn) as cur:
+                    cur.execute(sql, [value])
+                continue
+            with transaction(conn) as cur:
+                cur.execute(sql, [value])
+                assert cur.fetchone()[0] == expected
+
+
+@pytest.mark.parametrize(
+    "class_,type", [("DateShiftTransform", "timestamp"), ("ReplaceTransform", "bool")]
+)
+def test_transform_sql_type(class_, type):
+    transforms = Transforms(
+        {
+            "": TransformInstance(
+                class_=class_,
+                config={"days": 1, "old": "t", "new": "f"},
+                module="slice_db.transforms",
+            )
+        },
+        b"abc",
+    )
+    assert transform_sql(transforms.field(""), "value", type) is None